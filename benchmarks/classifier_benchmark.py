@@ -0,0 +1,45 @@
+"""Compare single and batched inference throughput of the Classifier."""
+
+import argparse
+import time
+
+import polars as pl
+
+from incident_scraper.models.classifier import (
+    KEY_COMMENTS,
+    Classifier,
+)
+from incident_scraper.utils.constants import FILE_NAME_INCIDENT_DUMP
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", default=f"./{FILE_NAME_INCIDENT_DUMP}")
+    parser.add_argument("--records", type=int, default=2_000)
+    args = parser.parse_args()
+
+    comments = (
+        pl.read_csv(args.csv, columns=[KEY_COMMENTS])
+        .head(args.records)[KEY_COMMENTS]
+        .fill_null("")
+        .to_list()
+    )
+    prediction_model = Classifier()
+
+    start = time.perf_counter()
+    single = [prediction_model.get_predicted_incident_type(c) for c in comments]
+    single_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = prediction_model.predict_batch(comments)
+    batched_secs = time.perf_counter() - start
+
+    assert single == batched, "Batched predictions differ from single ones."
+    print(f"Records:  {len(comments)}")
+    print(f"Single:   {len(comments) / single_secs:,.1f} records/s")
+    print(f"Batched:  {len(comments) / batched_secs:,.1f} records/s")
+    print(f"Speedup:  {single_secs / batched_secs:,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
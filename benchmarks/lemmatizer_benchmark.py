@@ -0,0 +1,367 @@
+"""Compare the legacy, uncached and memoized Lemmatizer throughput."""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import time
+
+from incident_scraper.external.lemmatizer import Lemmatizer, load_word_class
+from incident_scraper.utils.constants import (
+    FILE_ENCODING_UTF_8,
+    FILE_OPEN_READ,
+    INCIDENT_TYPE_INFO,
+)
+
+GOLDEN_CORPUS = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "tests",
+    "fixtures",
+    "lemmatizer_golden.json",
+)
+
+
+def legacy_title_case(input_string: str) -> str:
+    """custom_title_case before its word list was built once."""
+    # List of articles.
+    articles = ["a", "an", "the"]
+
+    # List of coordinating conjunctions.
+    conjunctions = ["and", "but", "for", "nor", "or", "so", "yet"]
+
+    # List of some short articles.
+    prepositions = [
+        "about",
+        "after",
+        "against",
+        "among",
+        "around",
+        "as",
+        "at",
+        "before",
+        "between",
+        "by",
+        "during",
+        "for",
+        "from",
+        "in",
+        "into",
+        "like",
+        "of",
+        "on",
+        "out",
+        "over",
+        "through",
+        "to",
+        "under",
+        "via",
+        "with",
+        "without",
+    ]
+
+    lower_case = articles + conjunctions + prepositions
+    output_list = []
+
+    # separating each word in the string
+    input_list = input_string.split(" ")
+
+    # checking each word
+    for word in input_list:
+        # if the word exists in the list
+        # then no need to capitalize it
+        if word in lower_case:
+            output_list.append(word)
+
+        # if the word does not exist in
+        # the list, then capitalize it
+        else:
+            output_list.append(word.title())
+
+    return " ".join(output_list)
+
+
+class LegacyLemmatizer:
+    """The Lemmatizer before it was compiled and memoized."""
+
+    @staticmethod
+    def process(incident: str) -> str:
+        incident = (
+            incident.replace("Information / |/ Information ", "")
+            .replace("\\", "/")
+            .replace(" (", " / ")
+            .replace("(", "")
+            .replace(")", "")
+            .replace("&", "and")
+            .replace("Inforation", INCIDENT_TYPE_INFO)
+            .replace("Well Being", "Well-Being")
+            .replace("Infformation", INCIDENT_TYPE_INFO)
+            .replace("Hit & Run", "Hit and Run")
+            .replace("Att.", "Attempted")
+            .replace("Agg.", "Aggravated")
+            .replace("(", "/ ")
+            .replace(")", "")
+            .replace("\n", " ")
+            .replace(" - ", " / ")
+            .replace("/", " / ")
+            .replace("`", "")
+        ).strip()
+        incident = legacy_title_case(incident)
+
+        incident = (
+            incident.replace("Dui", "DUI")
+            .replace("Uc", "UC")
+            .replace("Uuw", "Unlawful Use of a Weapon")
+            .replace("Non Criminal", "Non-Criminal")
+            .replace("Non-Criminal / Damage", "Non-Criminal Damage")
+        )
+
+        incident = re.sub(r"\s{2,}", " ", incident)
+
+        i_types = []
+        updated = False
+        for i_type in incident.split(" / "):
+            lemma = legacy_title_case(
+                " ".join(
+                    [
+                        load_word_class()(w.lower()).lemmatize()
+                        for w in i_type.split(" ")
+                    ]
+                )
+            )
+            lemma = (
+                lemma.replace("Uc", "UC")
+                .replace("UCpd", "UCPD")
+                .replace("Duo", "DUI")
+                .replace("Dui", "DUI")
+                .replace("Mean", "Means")
+                .replace("Attempt ", "Attempted ")
+            )
+
+            lemma = LegacyLemmatizer._map_incident_type(lemma)
+
+            if i_type != lemma:
+                updated = True
+                i_types.append(lemma)
+            else:
+                i_types.append(i_type)
+
+        if updated:
+            lemma_incident = " / ".join(i_types)
+            logging.info(
+                f"Incident type changed from {incident} to {lemma_incident}."
+            )
+            return lemma_incident
+        else:
+            return incident
+
+    @staticmethod
+    def _map_incident_type(incident: str) -> str:
+        TYPE_MAPPINGS: {str: [str]} = {
+            "Aggravated Assault of a Police Officer": [
+                "Aggravated Assault of Police Officer"
+            ],
+            "Aggravated Battery of a Police Officer": [
+                "Aggravated Battery of Police Officer",
+                "Aggravated Battery to Police Officer",
+            ],
+            "Assault": ["Simple Assault Battery", "Simple Assault"],
+            "Assist Other Agency": [
+                "Assist Other Agency Motor Vehicle Theft and Recovery"
+            ],
+            "Battery": ["Battery-Simple", "Simple Battery"],
+            "Battery of a Police Officer": [
+                "Battery of Police Officer",
+                "Battery to Police Officer",
+            ],
+            "Criminal Damage to Vehicle": ["Criminal Damage to Motor Vehicle"],
+            "Damage to Property": [
+                "Criminal Damage to Property",
+                "Damage to City Property",
+                "Damage to Personal Property",
+                "Damage to UC Property",
+                "Damage",
+                "Damaged Property",
+            ],
+            "Domestic Assault": [
+                "Aggravated Domestic Assault",
+                "Domestic Aggravated Assault",
+            ],
+            "Domestic Battery": [
+                "Aggravated Domestic Battery",
+                "Domestic Aggravated Battery",
+            ],
+            "DUI": ["DUI Arrest"],
+            "Found Property": ["Found", "Found Key", "Found Wallet"],
+            "Harassment by Electronic Means": [
+                "Harassing Message",
+                "Harassment via Electronic Means",
+            ],
+            "Harassing Email": ["Harassing Email Message", "Harassing Message"],
+            "Harassing Telephone Call": [
+                "Harassing Phone Call",
+                "Harassment by Telephone",
+            ],
+            "Hazardous Material Incident": [
+                "Haz Mat Event",
+                "Haz Mat Incident",
+                "Haz Mat",
+                "Haz-Mat Incident",
+                "Hazardous Material Event",
+            ],
+            "Hit and Run": [
+                "Hit and Run Property Damage",
+                "Hit and Run Traffic Crash",
+            ],
+            "Homicide": ["Murder"],
+            "Information": ["Information Report"],
+            "Interference with Police Officer": [
+                "Interference with Public Officer"
+            ],
+            "Liquor Law Violation": ["Illegal Consumption by Minor"],
+            "Lost Property": ["Lost", "Lost Phone", "Lost Wallet"],
+            "Medical Call": ["Mental Health Call"],
+            "Medical Transport": [
+                "Mental Health Transport",
+                "Mental Transport",
+            ],
+            "Miscellaneous": [
+                "Miscellaneous Incident Report",
+                "Miscellaneous Incident",
+                "Other",
+            ],
+            "Obstructing a Police Officer": [
+                "Obstruct Police Officer",
+                "Obstructing Peace Officer",
+                "Obstructing Police",
+                "Obstructing a Peace Officer",
+            ],
+            "Other Crime against Person": ["Other Crime Vs. Person"],
+            "Possession of Controlled Substance": [
+                "Narcotic Arrest",
+                "Narcotic",
+                "Possession of Crack Cocaine",
+                "Possession of Drug Paraphernalia",
+                "Possession of Narcotic with Intent to Deliver",
+                "Possession of Narcotic",
+            ],
+            "Possession of Marijuana": ["Possession of Cannabis"],
+            "Property Damage": ["Property Damage Only"],
+            "Reckless Discharge of a Firearm": [
+                "Aggravated Discharge of a Firearm",
+                "Reckless Discharge of Firearm",
+                "Reckless Discharge of a Weapon",
+            ],
+            "Resisting Arrest": ["Resisting Police"],
+            "Robbery": [
+                "Robbery Arrest",
+                "Robbery-Aggravated",
+                "Robbery-Strong Arm",
+            ],
+            "Recovered Vehicle": [
+                "Recovered Motor Vehicle",
+                "Recovered Vehicle",
+                "Recovery of Motor Vehicle",
+            ],
+            "Recovered Stolen Vehicle": [
+                "Recovered Stolen Motor Vehicle",
+                "Recovered Motor Vehicle",
+                "Stolen Motor Vehicle Recovery",
+                "Stolen Vehicle Recovery",
+            ],
+            "Sexual Abuse": ["Criminal Sexual Abuse"],
+            "Sexual Assault": [
+                "Aggravated Criminal Sexual Assault",
+                "Criminal Sexual Assault",
+            ],
+            "Strong Arm": ["Strong Armed"],
+            "Suspicious Mail": ["Suspicious Letter", "Suspicious Package"],
+            "Suspect Narcotic": ["Suspect Narcotic Found"],
+            "Traffic Violation Arrest": [
+                "Traffic Arrest",
+            ],
+            "Trespass to Property": [
+                "Criminal Trespass to Land",
+                "Criminal Trespass to Property",
+                "Criminal Trespass to Residence",
+                "Criminal Trespass",
+                "Trespass to Land",
+            ],
+            "Trespass to Vehicle": [
+                "Criminal Trespass to Motor Vehicle",
+                "Criminal Trespass to Vehicle",
+                "Trespass to Motor Vehicle",
+            ],
+            "Unlawful Discharge of a Firearm": [
+                "Unlawful Discharge of Firearm",
+                "Unlawful Discharge of Weapon",
+                "Unlawful Discharge of a Weapon",
+            ],
+            "Unlawful Possession of a Firearm": [
+                "Unlawful Possession of Firearm",
+                "Unlawful Possession of Handgun",
+                "Unlawful Possession of a Handgun",
+            ],
+            "Unlawful Possession of a Weapon": [
+                "Unlawful Possession of Weapon"
+            ],
+            "Unlawful Use of a Weapon": [
+                "Unlawful Use of Weapon",
+                "Unlawful Use of a Weapon Arrest",
+            ],
+            "Vehicle Theft and Recovery": [
+                "Motor Vehicle Theft and Recovery",
+                "Motor Vehicle Theft Recovery",
+            ],
+            "Well-Being Check": ["Well-Being"],
+        }
+
+        for true_type, type_list in TYPE_MAPPINGS.items():
+            if incident in type_list:
+                incident = true_type
+                break
+
+        return incident
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with open(GOLDEN_CORPUS, FILE_OPEN_READ, encoding=FILE_ENCODING_UTF_8) as f:
+        corpus = json.load(f)
+    # The datastore holds many incidents for each of a few hundred types.
+    random.seed(0)
+    incidents = random.choices(list(corpus), k=args.records)
+    # Load WordNet before timing either implementation
+    load_word_class()("incidents").lemmatize()
+
+    start = time.perf_counter()
+    legacy = [LegacyLemmatizer.process(i) for i in incidents]
+    legacy_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    uncached = [Lemmatizer.process.__wrapped__(i) for i in incidents]
+    uncached_secs = time.perf_counter() - start
+
+    Lemmatizer.process.cache_clear()
+    start = time.perf_counter()
+    memoized = [Lemmatizer.process(i) for i in incidents]
+    memoized_secs = time.perf_counter() - start
+
+    assert legacy == uncached == memoized == [corpus[i] for i in incidents]
+    print(f"Records:   {len(incidents)}")
+    print(f"Legacy:    {len(incidents) / legacy_secs:,.1f} records/s")
+    print(f"Uncached:  {len(incidents) / uncached_secs:,.1f} records/s")
+    print(f"Memoized:  {len(incidents) / memoized_secs:,.1f} records/s")
+    print(
+        f"Speedup:   {legacy_secs / uncached_secs:,.1f}x uncached, "
+        f"{legacy_secs / memoized_secs:,.1f}x memoized"
+    )
+    print(f"Cache:     {Lemmatizer.process.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Compare the neattext and polars comment normalizers on the incident dump."""
+
+import argparse
+import time
+
+import polars as pl
+from neattext import remove_non_ascii, remove_puncts, remove_stopwords
+
+from incident_scraper.models.classifier import (
+    KEY_COMMENTS,
+    normalize_comments,
+)
+from incident_scraper.utils.constants import FILE_NAME_INCIDENT_DUMP
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", default=f"./{FILE_NAME_INCIDENT_DUMP}")
+    args = parser.parse_args()
+
+    df = pl.read_csv(args.csv, columns=[KEY_COMMENTS])
+
+    start = time.perf_counter()
+    neattext_df = df.with_columns(
+        pl.col(KEY_COMMENTS)
+        .map_elements(remove_stopwords, return_dtype=pl.String)
+        .map_elements(remove_non_ascii, return_dtype=pl.String)
+        .map_elements(remove_puncts, return_dtype=pl.String)
+    )
+    neattext_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    polars_df = df.with_columns(normalize_comments(df[KEY_COMMENTS]))
+    polars_secs = time.perf_counter() - start
+
+    assert neattext_df.equals(polars_df), "The normalizers' outputs differ."
+    print(f"Rows:      {df.height}")
+    print(f"neattext:  {neattext_secs:.3f}s")
+    print(f"polars:    {polars_secs:.3f}s")
+    print(f"Speedup:   {neattext_secs / polars_secs:,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
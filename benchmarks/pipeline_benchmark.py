@@ -0,0 +1,374 @@
+"""Measure parse_and_save_records end to end, with every service stubbed."""
+
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Callable, Optional
+from unittest import mock
+
+from google.auth.credentials import AnonymousCredentials
+from google.cloud.ndb import Client
+from lxml import etree, html
+from requests import Response
+from requests.adapters import HTTPAdapter
+
+from incident_scraper import pipeline
+from incident_scraper.external import bulk_writer as bulk_writer_module
+from incident_scraper.external.bulk_writer import BulkWriter
+from incident_scraper.external.geocoder import Geocoder
+from incident_scraper.external.google_nbd import GoogleNBD
+from incident_scraper.external.lemmatizer import Lemmatizer, load_word_class
+from incident_scraper.models import classifier as classifier_module
+from incident_scraper.models.address_parser import AddressParser
+from incident_scraper.models.classifier import (
+    MINIMUM_TYPE_FREQUENCY,
+    MODEL_FILE_MANIFEST,
+    Classifier,
+)
+from incident_scraper.scraper.ucpd_scraper import UCPDScraper
+from incident_scraper.utils.constants import (
+    FILE_ENCODING_UTF_8,
+    FILE_NAME_INCIDENT_DUMP,
+    FILE_OPEN_WRITE,
+    INCIDENT_KEY_ADDRESS,
+    INCIDENT_KEY_LATITUDE,
+    INCIDENT_KEY_LONGITUDE,
+)
+from incident_scraper.utils.metrics import METRICS
+
+UCPD_PAGE_FIXTURE = os.path.join(
+    os.path.dirname(__file__), "fixtures", "ucpd_incident_page.html"
+)
+# The UCPD averages around a dozen reported incidents a day.
+INCIDENTS_PER_DAY = 12
+ID_PLACEHOLDER = "__UCPD_ID__"
+PAGES_PLACEHOLDER = "__TOTAL_PAGES__"
+STAGES = [
+    "scraping",
+    "address_parsing",
+    "timestamp_parsing",
+    "lemmatization",
+    "classification",
+    "geocoding",
+    "writes",
+]
+
+
+class StageTimer:
+    """Total the wall time spent in each wrapped pipeline stage."""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+
+    def wrap(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+
+        return timed
+
+    def iterate(self, stage: str, iterable):
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+            yield item
+
+
+class FixtureAdapter(HTTPAdapter):
+    """Serve pages built from the recorded UCPD page, with unique IDs."""
+
+    def __init__(self, num_incidents: int):
+        super().__init__()
+        page = html.fromstring(open(UCPD_PAGE_FIXTURE, "rb").read())
+        rows = page.cssselect("tbody")[0].cssselect("tr")
+        for row in rows:
+            row[6].text = ID_PLACEHOLDER
+        self._rows = [
+            etree.tostring(r, encoding="unicode").strip() for r in rows
+        ]
+        for row in rows:
+            row.getparent().remove(row)
+        page.cssselect("span.page-link")[0].text = f"1 / {PAGES_PLACEHOLDER}"
+        self._page = etree.tostring(page, encoding="unicode")
+
+        self._num_incidents = num_incidents
+        self._total_pages = max(-(-num_incidents // UCPDScraper.PAGE_SIZE), 1)
+
+    def send(self, request, **kwargs) -> Response:
+        offset = int(re.search(r"offset=(\d+)", request.url).group(1))
+        rows = [
+            self._rows[n % len(self._rows)].replace(ID_PLACEHOLDER, f"B{n}")
+            for n in range(
+                offset,
+                min(offset + UCPDScraper.PAGE_SIZE, self._num_incidents),
+            )
+        ]
+        content = self._page.replace(
+            "<tbody>", "<tbody>\n" + "\n".join(rows), 1
+        ).replace(PAGES_PLACEHOLDER, str(self._total_pages))
+
+        response = Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response.raw = SimpleNamespace(retries=None)
+        response._content = content.encode(FILE_ENCODING_UTF_8)
+        return response
+
+
+class FakeGeocoder(Geocoder):
+    """Resolve every address to the same point, after a fixed delay."""
+
+    LATENCY = 0.0
+
+    def __init__(self, max_workers: int = 8):
+        self._max_workers = max_workers
+
+    def resolve_addresses(self, addresses):
+        unique_addresses = list(dict.fromkeys(addresses))
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            results = executor.map(self._resolve_address, unique_addresses)
+            return dict(zip(unique_addresses, results, strict=True))
+
+    def _resolve_address(self, address: str) -> dict:
+        time.sleep(self.LATENCY)
+        return {
+            INCIDENT_KEY_ADDRESS: f"{address}, Chicago, IL",
+            INCIDENT_KEY_LATITUDE: 41.79,
+            INCIDENT_KEY_LONGITUDE: -87.6,
+        }
+
+
+class InMemoryNBD:
+    """Stand in for GoogleNBD, saving entities to a dict after a delay."""
+
+    def __init__(self, timer: StageTimer, write_latency: float):
+        # A real client, for its context, but put_multi_async never sends RPCs
+        self._client = Client(
+            project="pipeline-benchmark", credentials=AnonymousCredentials()
+        )
+        self._timer = timer
+        self._write_latency = write_latency
+        self.entities = {}
+
+    def get_content_hashes(self, start_date: date) -> dict:
+        return {}
+
+    def incident_writer(
+        self, on_written: Optional[Callable[[list], None]] = None
+    ) -> BulkWriter:
+        writer = BulkWriter(
+            self._client,
+            GoogleNBD._create_incident_from_dict,
+            on_written=on_written,
+        )
+        writer.write = self._timer.wrap("writes", writer.write)
+        writer.flush = self._timer.wrap("writes", writer.flush)
+        return writer
+
+    def put_multi_async(self, entities: list) -> list:
+        time.sleep(self._write_latency)
+        futures = []
+        for e in entities:
+            self.entities[e.key.id()] = e
+            futures.append(mock.Mock(result=lambda: None))
+        return futures
+
+
+def train_stand_in_model(model_directory: str) -> None:
+    """Train a small model on the fixture's comments, when none is saved."""
+    page = html.fromstring(open(UCPD_PAGE_FIXTURE, "rb").read())
+    lines = ["comments,incident"]
+    for row in page.cssselect("tbody")[0].cssselect("tr"):
+        incident, comment = row[0].text, row[4].text.replace('"', "'")
+        lines.extend(
+            [f'"{comment}","{incident}"'] * (MINIMUM_TYPE_FREQUENCY + 1)
+        )
+    # The type list expects at least one blank type, as the real dump has
+    lines.append('"A comment."," "')
+
+    current_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as training_directory:
+        os.chdir(training_directory)
+        try:
+            with open(
+                FILE_NAME_INCIDENT_DUMP,
+                FILE_OPEN_WRITE,
+                encoding=FILE_ENCODING_UTF_8,
+            ) as f:
+                f.write("\n".join(lines))
+            Classifier(build_model=True).train_and_save()
+        finally:
+            os.chdir(current_directory)
+
+
+def run(num_days: int, geocode_latency: float, write_latency: float) -> dict:
+    """Run the pipeline over num_days of incidents and time its stages."""
+    timer = StageTimer()
+    nbd_client = InMemoryNBD(timer, write_latency)
+    num_incidents = num_days * INCIDENTS_PER_DAY
+    scraper = UCPDScraper(request_delay=0)
+    scraper._session.mount("https://", FixtureAdapter(num_incidents))
+
+    # Every size starts with cold memos and metrics, like a fresh run of the
+    # CLI
+    METRICS.reset()
+    AddressParser()._process.cache_clear()
+    lemmatize = Lemmatizer.process
+    lemmatize.cache_clear()
+    Lemmatizer._lemmatize_word.cache_clear()
+
+    with ExitStack() as stack:
+        patches = [
+            mock.patch.object(
+                AddressParser,
+                "process",
+                timer.wrap("address_parsing", AddressParser.process),
+            ),
+            mock.patch.object(
+                Lemmatizer,
+                "process",
+                staticmethod(timer.wrap("lemmatization", lemmatize)),
+            ),
+            mock.patch.object(
+                pipeline,
+                "parse_scraped_incident_timestamp",
+                timer.wrap(
+                    "timestamp_parsing",
+                    pipeline.parse_scraped_incident_timestamp,
+                ),
+            ),
+            mock.patch.object(
+                pipeline,
+                "predict_information_incidents",
+                timer.wrap(
+                    "classification", pipeline.predict_information_incidents
+                ),
+            ),
+            mock.patch.object(
+                pipeline,
+                "geocode_incidents",
+                timer.wrap("geocoding", pipeline.geocode_incidents),
+            ),
+            mock.patch.object(pipeline, "Geocoder", FakeGeocoder),
+            mock.patch.object(FakeGeocoder, "LATENCY", geocode_latency),
+            mock.patch.object(
+                bulk_writer_module,
+                "put_multi_async",
+                nbd_client.put_multi_async,
+            ),
+        ]
+        for patch in patches:
+            stack.enter_context(patch)
+
+        end_date = UCPDScraper.FIRST_INCIDENT_DATE + timedelta(days=num_days)
+        incidents = timer.iterate(
+            "scraping",
+            scraper.iter_incidents(UCPDScraper.FIRST_INCIDENT_DATE, end_date),
+        )
+        start = time.perf_counter()
+        pipeline.parse_and_save_records(incidents, nbd_client)
+        seconds = time.perf_counter() - start
+
+    return {
+        "days": num_days,
+        "incidents": num_incidents,
+        "saved": len(nbd_client.entities),
+        "seconds": round(seconds, 4),
+        "records_per_second": round(num_incidents / seconds, 1),
+        "stage_seconds": {s: round(timer.seconds[s], 4) for s in STAGES},
+        "metrics": METRICS.summary(),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--days",
+        type=int,
+        nargs="+",
+        default=[
+            1,
+            30,
+            (date.today() - UCPDScraper.FIRST_INCIDENT_DATE).days,
+        ],
+        help="The number of days of incidents in each run.",
+    )
+    parser.add_argument("--geocode-latency", type=float, default=0.005)
+    parser.add_argument("--write-latency", type=float, default=0.02)
+    parser.add_argument("--output", default="pipeline_benchmark.json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as model_directory, ExitStack() as stack:
+        if not os.path.isfile(
+            os.path.join(classifier_module.MODEL_DIRECTORY, MODEL_FILE_MANIFEST)
+        ):
+            stack.enter_context(
+                mock.patch.object(
+                    classifier_module, "MODEL_DIRECTORY", model_directory
+                )
+            )
+            print("No saved model was found, training a stand-in model.")
+            train_stand_in_model(model_directory)
+        # The model and WordNet are loaded once per process, so they're loaded
+        # before timing
+        Classifier().predict_batch([""])
+        load_word_class()("incidents").lemmatize()
+
+        results = []
+        for num_days in args.days:
+            result = run(num_days, args.geocode_latency, args.write_latency)
+            results.append(result)
+            print(
+                f"{num_days:>5} days: {result['incidents']:>7} incidents, "
+                f"{result['records_per_second']:>9,.1f} records/s"
+            )
+            for stage, seconds in result["stage_seconds"].items():
+                print(f"{'':>12}{stage:<18} {seconds:>9.3f}s")
+
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "geocode_latency": args.geocode_latency,
+        "write_latency": args.write_latency,
+        "results": results,
+    }
+    with open(args.output, FILE_OPEN_WRITE, encoding=FILE_ENCODING_UTF_8) as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
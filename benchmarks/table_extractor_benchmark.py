@@ -0,0 +1,93 @@
+"""Compare the per-page CPU cost of the cssselect and compiled extractors."""
+
+import argparse
+import logging
+import os
+import time
+
+from lxml import etree, html
+
+from incident_scraper.scraper.table_extractor import IncidentTableExtractor
+
+UCPD_PAGE_FIXTURE = os.path.join(
+    os.path.dirname(__file__), "fixtures", "ucpd_incident_page.html"
+)
+
+
+def cssselect_extract(content: bytes):
+    """Parse a page the way UCPDScraper._get_table used to."""
+    FIRST_INDEX = 0
+    INCIDENT_INDEX = 6
+    incident_dict = {}
+
+    response = html.fromstring(content)
+    container = response.cssselect("thead")
+    categories = container[FIRST_INDEX].cssselect("th")
+    incidents = response.cssselect("tbody")
+    incident_rows = incidents[FIRST_INDEX].cssselect("tr")
+    for incident in incident_rows:
+        if len(incident) == 1:
+            logging.debug(
+                f"This incident has a length of 1: {etree.tostring(incident)}"
+            )
+            continue
+
+        incident_id = incident[INCIDENT_INDEX].text
+        if (
+            incident_id in ["None", ":"]
+            or "No Incident Reports" in incident.text
+        ):
+            logging.debug(
+                f"This incident has an ID of 'None': {etree.tostring(incident)}"
+            )
+            continue
+
+        incident_dict[incident_id] = {}
+        i_dict = {}
+        for index in range(len(categories) - 1):
+            i_dict[str(categories[index].text).strip()] = str(
+                incident[index].text
+            ).strip()
+
+        if [v for v in i_dict.values() if v == "Void"]:
+            logging.debug(
+                "This incident contains voided "
+                f"information: {etree.tostring(incident)}"
+            )
+            continue
+
+        incident_dict[incident_id] = i_dict
+
+    pages = response.cssselect("span.page-link")
+    page_numbers = [num.strip() for num in pages[FIRST_INDEX].text.split(" / ")]
+    return incident_dict, int(page_numbers[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with open(UCPD_PAGE_FIXTURE, "rb") as f:
+        content = f.read()
+    extractor = IncidentTableExtractor()
+    assert cssselect_extract(content) == extractor.extract(content)
+
+    start = time.perf_counter()
+    for _ in range(args.pages):
+        cssselect_extract(content)
+    cssselect_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.pages):
+        extractor.extract(content)
+    compiled_secs = time.perf_counter() - start
+
+    print(f"Pages:      {args.pages}")
+    print(f"cssselect:  {cssselect_secs / args.pages * 1e6:,.1f} µs/page")
+    print(f"Compiled:   {compiled_secs / args.pages * 1e6:,.1f} µs/page")
+    print(f"Speedup:    {cssselect_secs / compiled_secs:,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Compare the cost of the strptime and regex report time parsers."""
+
+import argparse
+import re
+import time
+from datetime import datetime, timedelta
+
+from incident_scraper.utils.constants import TIMEZONE_CHICAGO
+from incident_scraper.utils.functions import parse_scraped_incident_timestamp
+
+# The formats the strptime parser tried, in order
+LEGACY_DATE_FORMATS = [
+    "%m/%d/%y %I:%M %p",
+    "%-m/%-d/%y %-I:%M %p",
+    "%-m/%-d/%y %-I:%M%p",
+    "%m/%d/%y %-H:%M",
+    "%m/%d/%Y %-H:%M",
+    "%-m/%-d/%Y %-H:%M",
+]
+
+# The variants of report times seen on the UCPD's site
+REPORTED_FORMATS = [
+    "{d.month}/{d.day}/{d:%y} {hour}:{d:%M} {d:%p}",
+    "{d:%m}/{d:%d}/{d:%y} {hour}:{d:%M}{d:%p}",
+    "{d.month}/{d.day}/{d:%y} at {hour}:{d:%M} {d:%p}",
+    "{d.month}//{d.day}/{d:%y} {hour}:{d:%M}: {d:%p}",
+    "{d.month}/{d.day}/{d:%y} {hour}; {d:%M} {d:%p}",
+    "Not a date",
+]
+
+
+def strptime_parse(reported: str):
+    """Parse a report time the way parse_and_save_records used to."""
+    reported = reported.replace(";", ":")
+    reported = re.sub(r"\s{0}AM", " AM", reported)
+    reported = re.sub(r"\s{0}PM", " PM", reported)
+    reported = re.sub(r"\s{2,}", " ", reported)
+    reported = (
+        reported.replace("//", "/")
+        .replace("!", "1")
+        .replace(" at ", " ")
+        .replace(":PM", " PM")
+        .replace(":AM", " AM")
+        .replace(": PM", " PM")
+        .replace(": AM", " AM")
+        .replace(": ", ":")
+    )
+
+    result = None
+    for time_format in LEGACY_DATE_FORMATS:
+        try:
+            result = datetime.strptime(reported, time_format)
+        except ValueError:
+            continue
+        break
+
+    if not result:
+        return None
+
+    # The value was localized once for its date and once for the timestamp
+    TIMEZONE_CHICAGO.localize(result).strftime("%Y-%m-%d")
+    return TIMEZONE_CHICAGO.localize(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--values", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    # Spread the values over a year, so they don't share a cached hour
+    start_date = datetime(2023, 1, 1)
+    reported_values = []
+    for n in range(args.values):
+        d = start_date + timedelta(minutes=317 * n % (365 * 24 * 60))
+        reported_values.append(
+            REPORTED_FORMATS[n % len(REPORTED_FORMATS)].format(
+                d=d, hour=d.hour % 12 or 12
+            )
+        )
+    for reported in reported_values:
+        assert strptime_parse(reported) == parse_scraped_incident_timestamp(
+            reported
+        )
+    num_values = args.iterations * len(reported_values)
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        for reported in reported_values:
+            strptime_parse(reported)
+    strptime_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        for reported in reported_values:
+            parse_scraped_incident_timestamp(reported)
+    regex_secs = time.perf_counter() - start
+
+    print(f"Values:    {num_values}")
+    print(f"strptime:  {strptime_secs / num_values * 1e6:,.2f} µs/value")
+    print(f"Regex:     {regex_secs / num_values * 1e6:,.2f} µs/value")
+    print(f"Speedup:   {strptime_secs / regex_secs:,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
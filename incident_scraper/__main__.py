@@ -2,314 +2,298 @@
 
 import argparse
 import logging
-import re
-from datetime import datetime
-from typing import Any
-
-from click import IntRange
-
-from incident_scraper.external.geocoder import Geocoder
-from incident_scraper.external.google_logger import init_logger
-from incident_scraper.external.google_nbd import GoogleNBD
-from incident_scraper.external.lemmatizer import Lemmatizer
-from incident_scraper.models.address_parser import AddressParser
-from incident_scraper.models.classifier import Classifier
-from incident_scraper.models.incident import Incident
-from incident_scraper.scraper.ucpd_scraper import UCPDScraper
+import sys
+from contextlib import nullcontext
+from datetime import date, datetime
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from click import BadParameter, IntRange
+
+from incident_scraper.scraper.crawl_shard import CrawlShard
 from incident_scraper.utils.constants import (
-    INCIDENT_KEY_ADDRESS,
-    INCIDENT_KEY_COMMENTS,
-    INCIDENT_KEY_ID,
-    INCIDENT_KEY_LATITUDE,
-    INCIDENT_KEY_LOCATION,
-    INCIDENT_KEY_LONGITUDE,
-    INCIDENT_KEY_REPORTED,
-    INCIDENT_KEY_REPORTED_DATE,
-    INCIDENT_KEY_SEASON,
-    INCIDENT_KEY_TYPE,
-    INCIDENT_PREDICTED_TYPE,
-    INCIDENT_TYPE_INFO,
-    TIMEZONE_CHICAGO,
-    UCPD_MDY_KEY_DATE_FORMAT,
+    FILE_NAME_SEED_CHECKPOINT,
     SystemFlags,
 )
-from incident_scraper.utils.functions import (
-    determine_season,
-    parse_scraped_incident_timestamp,
-)
+from incident_scraper.utils.import_profiler import ImportProfiler
+from incident_scraper.utils.metrics import METRICS
 
-init_logger()
+# Commands that don't touch GCP, so they don't need its logging client
+OFFLINE_COMMANDS = frozenset([SystemFlags.BUILD_MODEL])
 
 
 # TODO: Chop this up into a service or some other organized structure
-def main():  # noqa: C901
+def main():
     """Run the UCPD Incident Scraper."""
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Log the time spent importing each module.",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help=(
+            "Export the run's metrics to this file, in the Prometheus text "
+            "format if it ends in .prom and as JSON otherwise."
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int_range(0),
+        default=0,
+        help=(
+            "The number of processes that normalize scraped incidents, which "
+            "are normalized in the main process by default."
+        ),
+    )
+    parser.add_argument(
+        "--scraper-workers",
+        # Kept low, since every worker shares the UCPD site's rate limit
+        type=int_range(1, 8),
+        default=4,
+        help=(
+            "The number of threads that fetch UCPD pages, each with its own "
+            "pooled connection."
+        ),
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int_range(1),
+        help="The number of scraped incidents processed and saved at a time.",
+    )
     subparser = parser.add_subparsers(dest="command")
 
     days_back = subparser.add_parser(SystemFlags.DAYS_BACK)
     days_back.add_argument(
         "days",
         # The range is locked between 3 and 30.
-        type=IntRange(3, 90),
+        type=int_range(3, 90),
         default=3,
     )
 
     subparser.add_parser(SystemFlags.BUILD_MODEL)
     subparser.add_parser(SystemFlags.CATEGORIZE)
-    subparser.add_parser(SystemFlags.DOWNLOAD)
+    download = subparser.add_parser(SystemFlags.DOWNLOAD)
+    download_format = download.add_mutually_exclusive_group()
+    download_format.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Also write a gzipped copy of the CSV in the same pass.",
+    )
+    download_format.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Write a typed, compressed Parquet file instead of a CSV.",
+    )
     subparser.add_parser(SystemFlags.LEMMATIZE_CATEGORIES)
-    subparser.add_parser(SystemFlags.SEED)
+    seed = subparser.add_parser(SystemFlags.SEED)
+    seed.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Continue the crawl stored in the checkpoint, instead of starting "
+            "over."
+        ),
+    )
+    seed.add_argument(
+        "--shard",
+        type=shard_spec,
+        help=(
+            "Only scrape the i-th of N shards of the crawl's monthly windows, "
+            "given as i/N. Shards can run in separate processes or machines, "
+            "and aren't checkpointed."
+        ),
+    )
+    seed.add_argument(
+        "--checkpoint",
+        default=FILE_NAME_SEED_CHECKPOINT,
+        help="The SQLite file that the crawl's progress is stored in.",
+    )
     subparser.add_parser(SystemFlags.UPDATE)
 
     args = parser.parse_args()
+    if getattr(args, "shard", None) and args.resume:
+        parser.error("A sharded seed can't be resumed.")
 
-    # General setup
-    nbd_client = GoogleNBD()
-    scraper = UCPDScraper()
+    profiler = ImportProfiler() if args.startup_profile else None
+    with profiler or nullcontext():
+        init_logging(args.command)
+        # Each command only imports, and creates, the clients it uses
+        with METRICS.time("run", command=args.command):
+            run_command(args)
+
+    if profiler is not None:
+        logging.info(f"Startup import profile:\n{profiler.report()}")
+
+    logging.info(f"Run metrics:\n{METRICS.report()}")
+    if args.metrics_file:
+        METRICS.write(args.metrics_file)
+
+
+def int_range(
+    minimum: int, maximum: Optional[int] = None
+) -> Callable[[str], int]:
+    """Create an argument type that parses an integer within bounds."""
+    bounds = IntRange(minimum, maximum)
+
+    def parse(value: str) -> int:
+        try:
+            return bounds.convert(value, None, None)
+        except BadParameter as e:
+            raise argparse.ArgumentTypeError(e.message) from None
+
+    return parse
+
+
+def shard_spec(value: str) -> CrawlShard:
+    """Parse a --shard value, such as 2/4."""
+    try:
+        return CrawlShard.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def init_logging(command: Optional[str]) -> None:
+    """Log to GCP and stdout, or only to stdout for offline commands."""
+    if command is None or command in OFFLINE_COMMANDS:
+        logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+        return
+
+    from incident_scraper.external.google_logger import init_logger
 
-    incidents = {}
+    init_logger()
+
+
+def run_command(args: argparse.Namespace) -> None:
+    """Run the chosen command, importing only the modules it uses."""
     match args.command:
         case SystemFlags.BUILD_MODEL:
-            Classifier(build_model=True).train_and_save()
+            build_model()
         case SystemFlags.CATEGORIZE:
-            categorize_information(nbd_client)
+            categorize()
         case SystemFlags.DAYS_BACK:
-            incidents = scraper.scrape_last_days(args.days)
+            scrape_days_back(args)
         case SystemFlags.DOWNLOAD:
-            nbd_client.download_all()
+            download(args)
         case SystemFlags.LEMMATIZE_CATEGORIES:
-            lemmatize_categories(nbd_client)
+            lemmatize_categories()
         case SystemFlags.SEED:
-            incidents = scraper.scrape_from_beginning_2011()
+            seed(args)
         case SystemFlags.UPDATE:
-            now = datetime.now().date()
-            day_diff = (now - nbd_client.get_latest_date()).days
-            if day_diff > 0:
-                incidents = scraper.scrape_last_days(day_diff - 1)
-            elif now.isoweekday() not in (6, 7):
-                # Use the warning log level if day_diff <= 0, and it's a weekday
-                logging.warning(
-                    f"Scraper did not add any new incidents for {now} with a day diff of {day_diff}"
-                )
-
-    if len(incidents.keys()):
-        parse_and_save_records(incidents, nbd_client)
-
-
-def categorize_information(nbd_client: GoogleNBD) -> None:
-    prediction_model = Classifier()
-    incidents = nbd_client.get_all_information_incidents()
-
-    # Incident counters
-    predicted_labels = 0
-    for i in incidents:
-        pred_type = prediction_model.get_predicted_incident_type(i.comments)
-        if pred_type is not None:
-            predicted_labels += 1
-            i.predicted_incident = pred_type
-
-    logging.info(
-        f"{predicted_labels} of {len(incidents)} 'Information' incidents "
-        "were categorized."
-    )
+            update(args)
+
 
-    nbd_client.update_list_of_incidents(incidents)
+def build_model() -> None:
+    """Train the classifier on the local incident dump, and save it."""
+    from incident_scraper.models.classifier import Classifier
 
+    Classifier(build_model=True).train_and_save()
 
-def lemmatize_categories(nbd_client: GoogleNBD) -> None:
-    incidents = nbd_client.get_all_incidents()
-    logging.info(f"{len(incidents)} incidents fetched.")
 
-    lemmatized_incidents: [Incident] = []
+def categorize() -> None:
+    """Classify the stored 'Information' incidents."""
+    from incident_scraper.external.google_nbd import GoogleNBD
+    from incident_scraper.pipeline import categorize_information
 
-    for i in incidents:
-        lemma_i_type = Lemmatizer.process(i.incident)
-        if i.incident != lemma_i_type:
-            i.incident = lemma_i_type
-            lemmatized_incidents.append(i)
+    categorize_information(GoogleNBD())
 
-    logging.info(
-        f"{len(lemmatized_incidents)} of {len(incidents)} "
-        "were incidents lemmatized."
+
+def download(args: argparse.Namespace) -> None:
+    """Export every stored incident to a local CSV or Parquet file."""
+    from incident_scraper.external.google_nbd import GoogleNBD
+
+    if args.parquet:
+        GoogleNBD().download_all_parquet()
+    else:
+        GoogleNBD().download_all(gzip_copy=args.gzip)
+
+
+def lemmatize_categories() -> None:
+    """Standardize the types of the stored incidents."""
+    from incident_scraper.external.google_nbd import GoogleNBD
+    from incident_scraper.pipeline import (
+        lemmatize_categories as lemmatize_stored_categories,
     )
 
-    nbd_client.update_list_of_incidents(lemmatized_incidents)
+    lemmatize_stored_categories(GoogleNBD())
 
-    logging.info(f"{len(lemmatized_incidents)} types were updated.")
 
+def scrape_days_back(args: argparse.Namespace) -> None:
+    """Scrape and save the incidents of the last few days."""
+    from incident_scraper.scraper.ucpd_scraper import UCPDScraper
 
-def parse_and_save_records(
-    incidents: {str: Any}, nbd_client: GoogleNBD
-) -> None:
-    """Take incidents and save them to the GCP Datastore."""
-    logging.info(
-        f"{len(incidents.keys())} total incidents were scraped from the UCPD "
-        "Incidents' site."
+    save_incidents(
+        args,
+        UCPDScraper(max_workers=args.scraper_workers).iter_last_days(args.days),
+        UCPDScraper.last_days_start(args.days),
     )
 
-    # Instantiate clients
-    addr_parser = AddressParser()
-    geocoder = Geocoder()
-    prediction_model = Classifier()
-    total_incidents = len(incidents.keys())
-
-    # Split list of incidents into groups of 100 and submit them
-    n = 100
-    total_added_incidents = 0
-    list_of_key_lists = [
-        list(incidents.keys())[i * n : (i + 1) * n]
-        for i in range((total_incidents + n - 1) // n)
-    ]
-
-    # Incident Key Tracking
-    num_information_incidents = 0
-    information_incidents_predicted = 0
-
-    for key_list in list_of_key_lists:
-        incident_objs = []
-        geocode_error_incidents = []
-        void_malformed_incidents = []
-        inter_incidents = len(key_list)
-        for key in key_list:
-            i = incidents[key]
-
-            if len(i.keys()) != 6:
-                void_malformed_incidents.append(i)
-                logging.debug(
-                    f"This incident has an insufficient number of keys: {i}"
-                )
-                continue
-
-            i[INCIDENT_KEY_ID] = key
-
-            i[INCIDENT_KEY_LOCATION] = addr_parser.process(
-                i[INCIDENT_KEY_LOCATION]
-            )
-
-            address = (
-                i[INCIDENT_KEY_LOCATION].split(" (")[0]
-                if "(" in i[INCIDENT_KEY_LOCATION]
-                else i[INCIDENT_KEY_LOCATION]
-            )
-
-            i[INCIDENT_KEY_REPORTED] = i[INCIDENT_KEY_REPORTED].replace(
-                ";", ":"
-            )
-
-            formatted_reported_value = parse_scraped_incident_timestamp(i)
-
-            if not formatted_reported_value:
-                void_malformed_incidents.append(i)
-                logging.debug(f"This incident has a malformed date: {i}")
-                continue
-
-            i[INCIDENT_KEY_TYPE] = Lemmatizer.process(i[INCIDENT_KEY_TYPE])
-
-            i[INCIDENT_KEY_COMMENTS] = (
-                i[INCIDENT_KEY_COMMENTS].replace("\n", " ")
-            ).strip()
-
-            i[INCIDENT_KEY_COMMENTS] = re.sub(
-                r"\s{2,}", " ", i[INCIDENT_KEY_COMMENTS]
-            )
-
-            if i[INCIDENT_KEY_TYPE] == INCIDENT_TYPE_INFO:
-                num_information_incidents += 1
-                pred_type = prediction_model.get_predicted_incident_type(
-                    i[INCIDENT_KEY_COMMENTS]
-                )
-                if pred_type is not None:
-                    information_incidents_predicted += 1
-                    i[INCIDENT_PREDICTED_TYPE] = pred_type
-
-            if INCIDENT_PREDICTED_TYPE not in i:
-                i[INCIDENT_PREDICTED_TYPE] = ""
-
-            i[INCIDENT_KEY_REPORTED_DATE] = TIMEZONE_CHICAGO.localize(
-                formatted_reported_value
-            ).strftime(UCPD_MDY_KEY_DATE_FORMAT)
-            i[INCIDENT_KEY_REPORTED] = TIMEZONE_CHICAGO.localize(
-                formatted_reported_value
-            )
-
-            i[INCIDENT_KEY_SEASON] = determine_season(i[INCIDENT_KEY_REPORTED])
-
-            if (
-                geocoder.get_address_information(address, i)
-                and INCIDENT_KEY_ADDRESS in i
-                and -90.0 <= i[INCIDENT_KEY_LATITUDE] <= 90.0
-                and -90.0 <= i[INCIDENT_KEY_LONGITUDE] <= 90.0
-            ):
-                incident_objs.append(i)
-                continue
-            else:
-                geocode_error_incidents.append(i)
-                logging.debug(
-                    "This incident failed to get a valid location with the "
-                    f"Geocoder: {i}"
-                )
-
-            geocode_error_incidents.append(i)
-            logging.debug(
-                "This incident failed to get a location with the GoogleMaps' "
-                f"Geocoder: {i}"
-            )
-        added_incidents = len(incident_objs)
-        logging.info(
-            f"{len(void_malformed_incidents)} of {inter_incidents} contained "
-            "malformed or voided information."
-        )
-        logging.info(
-            f"{len(geocode_error_incidents)} of {inter_incidents} could not be "
-            f"processed by the Geocoder."
+
+def seed(args: argparse.Namespace) -> None:
+    """Scrape and save every incident, as one checkpointed crawl or a shard."""
+    from incident_scraper.scraper.crawl_checkpoint import CrawlCheckpoint
+    from incident_scraper.scraper.ucpd_scraper import UCPDScraper
+
+    scraper = UCPDScraper(max_workers=args.scraper_workers)
+    if args.shard:
+        save_incidents(
+            args,
+            scraper.iter_shard(args.shard),
+            UCPDScraper.FIRST_INCIDENT_DATE,
         )
-        logging.info(
-            f"{added_incidents} of {inter_incidents} incidents were "
-            "successfully processed."
+    else:
+        checkpoint = CrawlCheckpoint(args.checkpoint)
+        save_incidents(
+            args,
+            scraper.iter_checkpointed(checkpoint, args.resume),
+            UCPDScraper.FIRST_INCIDENT_DATE,
+            on_handled=checkpoint.mark_handled,
         )
-        if len(incident_objs):
-            logging.info(
-                f"Adding {added_incidents} of {inter_incidents} incidents to "
-                "the GCP Datastore."
-            )
-            nbd_client.add_incidents(incident_objs)
-            logging.info(
-                f"Completed adding {added_incidents} of {inter_incidents} "
-                "incidents to the GCP Datastore."
-            )
-        total_added_incidents += added_incidents
-
-    logging.info(
-        f"{information_incidents_predicted} of {num_information_incidents} "
-        "'Information' incidents predicted into other categories."
-    )
-    logging.info(
-        f"{total_incidents - total_added_incidents} of {total_incidents} "
-        "incidents could NOT be added to the GCP Datastore."
-    )
 
 
-def update_records() -> None:
-    """Update incident records based on last scraped incident."""
+def update(args: argparse.Namespace) -> None:
+    """Scrape and save the incidents since the latest stored one."""
+    from incident_scraper.external.google_nbd import GoogleNBD
+    from incident_scraper.scraper.ucpd_scraper import UCPDScraper
+
     nbd_client = GoogleNBD()
-    scraper = UCPDScraper()
-    day_diff = (datetime.now().date() - nbd_client.get_latest_date()).days
+    now = datetime.now().date()
+    day_diff = (now - nbd_client.get_latest_date()).days
     if day_diff > 0:
-        incidents = scraper.scrape_last_days(day_diff - 1)
-    else:
-        logging.info("Saved incidents are up-to-date.")
-        return
+        save_incidents(
+            args,
+            UCPDScraper(max_workers=args.scraper_workers).iter_last_days(
+                day_diff - 1
+            ),
+            UCPDScraper.last_days_start(day_diff - 1),
+            nbd_client,
+        )
+    elif now.isoweekday() not in (6, 7):
+        # Use the warning log level if day_diff <= 0, and it's a weekday
+        logging.warning(
+            f"Scraper did not add any new incidents for {now} with a day diff of {day_diff}"
+        )
 
-    total_incidents = len(incidents.keys())
 
-    if total_incidents:
-        parse_and_save_records(incidents, nbd_client)
-    else:
-        logging.info(
-            "No incidents were scraped for "
-            f"{datetime.now().strftime(UCPD_MDY_KEY_DATE_FORMAT)}."
-        )
+def save_incidents(
+    args: argparse.Namespace,
+    incidents: Iterable[Tuple[str, dict]],
+    start_date: date,
+    nbd_client=None,
+    on_handled: Optional[Callable[[List[str]], None]] = None,
+) -> None:
+    """Process scraped incidents, and save them to the Datastore."""
+    from incident_scraper.external.google_nbd import GoogleNBD
+    from incident_scraper.pipeline import CHUNK_SIZE, parse_and_save_records
+
+    parse_and_save_records(
+        incidents,
+        nbd_client or GoogleNBD(),
+        start_date,
+        workers=args.workers,
+        chunk_size=args.chunk_size or CHUNK_SIZE,
+        on_handled=on_handled,
+    )
 
 
 if __name__ == "__main__":
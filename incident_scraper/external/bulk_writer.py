@@ -0,0 +1,148 @@
+"""Contains the chunked, pipelined writer used to save entities in bulk."""
+
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Iterable, List, Optional
+
+from google.api_core import exceptions
+from google.cloud.ndb import Client, put_multi_async
+
+from incident_scraper.utils.functions import chunked
+from incident_scraper.utils.metrics import METRICS
+
+# Transient Datastore errors, the chunk is retried when one is raised.
+RETRYABLE_ERRORS = (
+    exceptions.Aborted,
+    exceptions.DeadlineExceeded,
+    exceptions.InternalServerError,
+    exceptions.ServiceUnavailable,
+    exceptions.TooManyRequests,
+)
+
+
+class BulkWriter:
+    """
+    Save entities to Datastore in chunks, in the background.
+
+    Each chunk is sent with put_multi_async from a worker thread with its own
+    client context, so the caller can process its next chunk while earlier
+    ones are written. At most max_pending chunks are held in memory, and a
+    chunk that fails with a transient error is retried with an exponential
+    backoff. Errors that outlast the retries are raised from flush(). If
+    given, on_written is called from the worker thread with every chunk, as
+    it was queued, once the chunk is saved.
+    """
+
+    # Datastore commits at most 500 entities at a time.
+    BATCH_SIZE = 500
+    NUM_RETRIES = 5
+    RETRY_BACKOFF = 0.5
+    RETRY_BACKOFF_MAX = 8.0
+
+    def __init__(
+        self,
+        client: Client,
+        to_entity: Optional[Callable] = None,
+        batch_size: int = BATCH_SIZE,
+        max_workers: int = 2,
+        max_pending: int = 4,
+        on_written: Optional[Callable[[list], None]] = None,
+    ):
+        self._client = client
+        self._to_entity = to_entity
+        self._on_written = on_written
+        self._batch_size = batch_size
+        self._max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="bulk-writer"
+        )
+        self._pending: Deque[Future] = deque()
+        self._lock = threading.Lock()
+        self._latencies: List[float] = []
+        self._num_entities = 0
+        self._num_retries = 0
+
+    def __enter__(self) -> "BulkWriter":
+        return self
+
+    def __exit__(self, exc_type, *args) -> None:
+        try:
+            # Don't hide the caller's error behind a write error
+            if exc_type is None:
+                self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def write(self, entities: Iterable) -> None:
+        """Queue entities to be saved, blocking while too many are pending."""
+        for chunk in chunked(entities, self._batch_size):
+            while len(self._pending) >= self._max_pending:
+                self._pending.popleft().result()
+            self._pending.append(self._executor.submit(self._put_chunk, chunk))
+
+    def flush(self) -> None:
+        """Wait for every queued chunk to be saved."""
+        while self._pending:
+            self._pending.popleft().result()
+
+    def stats(self) -> dict:
+        """Report the number of entities and chunks written, and their speed."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            num_entities = self._num_entities
+            num_retries = self._num_retries
+
+        return {
+            "entities": num_entities,
+            "chunks": len(latencies),
+            "retries": num_retries,
+            "latency_mean_ms": (
+                statistics.fmean(latencies) * 1000 if latencies else 0.0
+            ),
+            "latency_max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        }
+
+    def _put_chunk(self, chunk: list) -> None:
+        for attempt in range(self.NUM_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                with self._client.context():
+                    entities = (
+                        [self._to_entity(e) for e in chunk]
+                        if self._to_entity
+                        else chunk
+                    )
+                    for future in put_multi_async(entities):
+                        future.result()
+                break
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.NUM_RETRIES:
+                    raise
+
+                backoff = min(
+                    self.RETRY_BACKOFF * 2**attempt, self.RETRY_BACKOFF_MAX
+                )
+                logging.info(
+                    f"Retrying a chunk of {len(chunk)} entities in "
+                    f"{backoff}s after: {e}"
+                )
+                with self._lock:
+                    self._num_retries += 1
+                METRICS.increment("datastore_write_retries")
+                time.sleep(backoff)
+
+        latency = time.perf_counter() - start
+        METRICS.observe("datastore_write", latency)
+        METRICS.increment("datastore_entities_written", len(chunk))
+        with self._lock:
+            self._latencies.append(latency)
+            self._num_entities += len(chunk)
+        logging.debug(
+            f"Saved a chunk of {len(chunk)} entities in {latency * 1000:.1f}ms."
+        )
+        if self._on_written:
+            self._on_written(chunk)
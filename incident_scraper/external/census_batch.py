@@ -0,0 +1,96 @@
+"""Contains the client for the Census Geocoder's batch endpoint."""
+
+import csv
+import io
+import logging
+from typing import Dict, List, Optional
+
+import requests
+
+from incident_scraper.utils.constants import (
+    INCIDENT_KEY_ADDRESS,
+    INCIDENT_KEY_LATITUDE,
+    INCIDENT_KEY_LONGITUDE,
+    LOCATION_CHICAGO,
+    LOCATION_ILLINOIS,
+)
+
+
+class CensusBatchClient:
+    """
+    Resolve many addresses with a single Census Geocoder batch submission.
+
+    For more information on the batch endpoint, visit this link:
+    https://geocoding.geo.census.gov/geocoder/Geocoding_Services_API.html
+    """
+
+    BASE_URL = "https://geocoding.geo.census.gov/geocoder"
+    BATCH_LIMIT = 10_000
+    BENCHMARK = "Public_AR_Current"
+    TIMEOUT = 300
+
+    def __init__(self, base_url: Optional[str] = None):
+        self._url = f"{base_url or self.BASE_URL}/locations/addressbatch"
+
+    def geocode(self, addresses: List[str]) -> Dict[str, Optional[dict]]:
+        """
+        Geocode a list of addresses, BATCH_LIMIT addresses per request.
+
+        Returns a mapping of every given address to its result, or to None if
+        the Census Geocoder could not match it.
+        """
+        results = {}
+        for start in range(0, len(addresses), self.BATCH_LIMIT):
+            batch = addresses[start : start + self.BATCH_LIMIT]
+            results.update(self._post_batch(batch))
+
+        return results
+
+    def _post_batch(self, addresses: List[str]) -> Dict[str, Optional[dict]]:
+        address_file = io.StringIO()
+        writer = csv.writer(address_file)
+        for index, address in enumerate(addresses):
+            writer.writerow(
+                [index, address, LOCATION_CHICAGO, LOCATION_ILLINOIS, ""]
+            )
+
+        r = requests.post(
+            self._url,
+            data={"benchmark": self.BENCHMARK},
+            files={
+                "addressFile": (
+                    "addresses.csv",
+                    address_file.getvalue(),
+                    "text/csv",
+                )
+            },
+            timeout=self.TIMEOUT,
+        )
+        r.raise_for_status()
+
+        results = dict.fromkeys(addresses)
+        for row in csv.reader(io.StringIO(r.text)):
+            # Matched rows are: id, input, "Match", match type, matched
+            # address, "lon,lat", TIGER/Line ID, side.
+            if len(row) < 6 or row[2] != "Match":
+                continue
+
+            try:
+                address = addresses[int(row[0])]
+                longitude, latitude = (float(c) for c in row[5].split(","))
+            except (IndexError, ValueError):
+                logging.debug(f"Unable to parse Census batch row: {row}")
+                continue
+
+            results[address] = {
+                INCIDENT_KEY_ADDRESS: row[4],
+                INCIDENT_KEY_LATITUDE: latitude,
+                INCIDENT_KEY_LONGITUDE: longitude,
+            }
+
+        logging.debug(
+            f"The Census batch geocoder matched "
+            f"{sum(1 for r in results.values() if r)} of {len(addresses)} "
+            "addresses."
+        )
+        return results
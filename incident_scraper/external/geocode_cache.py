@@ -0,0 +1,125 @@
+"""Contains the persistent, on-disk cache of geocoded addresses."""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from incident_scraper.utils.constants import (
+    INCIDENT_KEY_ADDRESS,
+    INCIDENT_KEY_LATITUDE,
+    INCIDENT_KEY_LONGITUDE,
+)
+
+
+class GeocodeCache:
+    """
+    A SQLite-backed geocode cache that outlives the process.
+
+    Entries are keyed by the normalized address and record which provider
+    resolved them and when. The database runs in WAL mode, and every thread
+    gets its own connection, so several workers can read it concurrently.
+    """
+
+    DEFAULT_MAX_ENTRIES = 50_000
+    DEFAULT_TTL_DAYS = 180
+
+    def __init__(
+        self,
+        path: str,
+        ttl_days: int = DEFAULT_TTL_DAYS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self._path = path
+        self._ttl_seconds = ttl_days * 24 * 60 * 60
+        self._max_entries = max_entries
+        self._local = threading.local()
+
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS geocodes (
+                    address TEXT PRIMARY KEY,
+                    provider TEXT NOT NULL,
+                    geocoded_at REAL NOT NULL,
+                    validated_address TEXT NOT NULL,
+                    latitude REAL NOT NULL,
+                    longitude REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS geocodes_geocoded_at "
+                "ON geocodes (geocoded_at)"
+            )
+        self.evict()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def normalize(address: str) -> str:
+        """Normalize an address so trivially different spellings share a key."""
+        return " ".join(address.split()).casefold()
+
+    def get(self, address: str) -> Optional[dict]:
+        """Get an unexpired geocode result for an address, if there is one."""
+        row = (
+            self._connection()
+            .execute(
+                "SELECT validated_address, latitude, longitude FROM geocodes "
+                "WHERE address = ? AND geocoded_at >= ?",
+                (self.normalize(address), time.time() - self._ttl_seconds),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+
+        return {
+            INCIDENT_KEY_ADDRESS: row[0],
+            INCIDENT_KEY_LATITUDE: row[1],
+            INCIDENT_KEY_LONGITUDE: row[2],
+        }
+
+    def set(self, address: str, result: dict, provider: str) -> None:
+        """Store the geocode result for an address."""
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self.normalize(address),
+                    provider,
+                    time.time(),
+                    result[INCIDENT_KEY_ADDRESS],
+                    result[INCIDENT_KEY_LATITUDE],
+                    result[INCIDENT_KEY_LONGITUDE],
+                ),
+            )
+
+    def evict(self) -> None:
+        """Drop expired entries, then the oldest ones beyond the size bound."""
+        with self._connection() as conn:
+            expired = conn.execute(
+                "DELETE FROM geocodes WHERE geocoded_at < ?",
+                (time.time() - self._ttl_seconds,),
+            ).rowcount
+            overflow = conn.execute(
+                "DELETE FROM geocodes WHERE address IN ("
+                "SELECT address FROM geocodes ORDER BY geocoded_at DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            ).rowcount
+
+        if expired or overflow:
+            logging.info(
+                f"Evicted {expired} expired and {overflow} overflowing "
+                "entries from the geocode cache."
+            )
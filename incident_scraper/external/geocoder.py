@@ -1,15 +1,23 @@
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from time import sleep
-from typing import Optional
+from typing import Dict, Iterable, Optional
 
 import requests
 from censusgeocode import CensusGeocode
 from googlemaps import Client
 
+from incident_scraper.external.census_batch import CensusBatchClient
+from incident_scraper.external.geocode_cache import GeocodeCache
 from incident_scraper.models.address_parser import AddressParser
 from incident_scraper.utils.constants import (
+    ENV_GEOCODE_CACHE_PATH,
     ENV_GOOGLE_MAPS_KEY,
+    FILE_NAME_GEOCODE_CACHE,
+    GEOCODER_PROVIDER_CENSUS,
+    GEOCODER_PROVIDER_GOOGLE,
+    GEOCODER_PROVIDER_NONE,
     INCIDENT_KEY_ADDRESS,
     INCIDENT_KEY_LATITUDE,
     INCIDENT_KEY_LONGITUDE,
@@ -18,6 +26,9 @@ from incident_scraper.utils.constants import (
     LOCATION_ILLINOIS,
     LOCATION_US,
 )
+from incident_scraper.utils.metrics import METRICS
+from incident_scraper.utils.rate_limiter import RateLimiter
+from incident_scraper.utils.single_flight import SingleFlight
 
 
 class Geocoder:
@@ -30,37 +41,158 @@ class Geocoder:
         INCIDENT_KEY_LATITUDE: 0.0,
         INCIDENT_KEY_LONGITUDE: 0.0,
     }
+    CENSUS_REQUEST_INTERVAL = 0.1
+    GOOGLE_REQUEST_INTERVAL = 0.02
     NUM_RETRIES = 10
+    RETRY_BACKOFF = 0.5
+    RETRY_BACKOFF_MAX = 30
     TIMEOUT = 5
 
-    def __init__(self):
+    def __init__(self, max_workers: int = 8):
         self._address_cache = {}
         self._address_parser = AddressParser()
+        self._census_batch_client = CensusBatchClient()
         self._census_client = CensusGeocode()
+        self._census_misses = set()
+        self._census_rate_limiter = RateLimiter(self.CENSUS_REQUEST_INTERVAL)
         self._google_client = Client(ENV_GOOGLE_MAPS_KEY)
+        self._google_rate_limiter = RateLimiter(self.GOOGLE_REQUEST_INTERVAL)
+        self._max_workers = max_workers
+        self._persistent_cache = GeocodeCache(
+            ENV_GEOCODE_CACHE_PATH or FILE_NAME_GEOCODE_CACHE
+        )
+        self._single_flight = SingleFlight()
 
     def get_address_information(self, address: str, i_dict: dict) -> bool:
-        if address in self._address_cache:
-            self._get_address_from_cache(i_dict, self._address_cache[address])
+        result = self._single_flight.do(address, self._resolve_address, address)
+
+        # Return if an address was found.
+        return self.assign_address(i_dict, result)
+
+    def resolve_addresses(
+        self, addresses: Iterable[str]
+    ) -> Dict[str, Optional[dict]]:
+        """
+        Geocode a set of addresses concurrently, once per unique address.
+
+        Census-eligible addresses are first submitted as a single batch, after
+        which the rest are resolved by a pool of workers that share the
+        per-provider rate limits.
+        """
+        unique_addresses = list(dict.fromkeys(addresses))
+        self.batch_census_validate(unique_addresses)
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            results = executor.map(
+                lambda a: self._single_flight.do(a, self._resolve_address, a),
+                unique_addresses,
+            )
+            return dict(zip(unique_addresses, results, strict=True))
+
+    @classmethod
+    def assign_address(cls, i_dict: dict, result: Optional[dict]) -> bool:
+        """Copy a geocode result onto an incident, returning if it had one."""
+        cls._get_address_from_cache(i_dict, result)
+        return INCIDENT_KEY_ADDRESS in i_dict
+
+    def _resolve_address(self, address: str) -> Optional[dict]:
+        """Resolve an address, from the cheapest source to the most costly."""
+        result = self._address_cache.get(address)
+        if result:
+            METRICS.increment("geocoder_cache_hits", cache="memory")
+        else:
+            result = self._persistent_cache.get(address)
+            if result:
+                METRICS.increment("geocoder_cache_hits", cache="persistent")
+                self._address_cache[address] = result
+            else:
+                METRICS.increment("geocoder_cache_misses")
 
         if (
-            INCIDENT_KEY_ADDRESS not in i_dict
-            and "between" not in address.lower()
+            not result
+            and address not in self._census_misses
+            and self._is_census_eligible(address)
+        ):
+            result = self._census_validate_address(address)
+            self._store_result(address, result, GEOCODER_PROVIDER_CENSUS)
+
+        if not result:
+            result = self._parse_and_process_address(address)
+            self._store_result(address, result, GEOCODER_PROVIDER_GOOGLE)
+
+        return result
+
+    def batch_census_validate(self, addresses: Iterable[str]) -> None:
+        """
+        Resolve every uncached, Census-eligible address in one submission.
+
+        Matches are added to both caches, so the get_address_information
+        calls that follow don't make a request per address. Addresses the
+        Census couldn't match skip straight to the Google Maps geocoder.
+        """
+        pending = []
+        for address in dict.fromkeys(addresses):
+            if (
+                address in self._address_cache
+                or address in self._census_misses
+                or not self._is_census_eligible(address)
+            ):
+                continue
+
+            result = self._persistent_cache.get(address)
+            if result:
+                self._address_cache[address] = result
+            else:
+                pending.append(address)
+
+        if not pending:
+            return
+
+        try:
+            self._census_rate_limiter.wait()
+            METRICS.increment("geocoder_calls", provider="census_batch")
+            with METRICS.time("geocoder_request", provider="census_batch"):
+                results = self._census_batch_client.geocode(pending)
+        except requests.exceptions.RequestException:
+            logging.info(
+                "Unable to use the Census batch geocoder, falling back to "
+                "single address requests."
+            )
+            return
+
+        matched = 0
+        for address, result in results.items():
+            if result:
+                matched += 1
+                self._address_cache[address] = result
+                self._store_result(address, result, GEOCODER_PROVIDER_CENSUS)
+            else:
+                self._census_misses.add(address)
+
+        logging.info(
+            f"The Census batch geocoder matched {matched} of {len(pending)} "
+            "addresses."
+        )
+
+    @staticmethod
+    def _is_census_eligible(address: str) -> bool:
+        return (
+            "between" not in address.lower()
             and " and " not in address
             and " to " not in address
             and " at " not in address
-        ):
-            self._get_address_from_cache(
-                i_dict, self._census_validate_address(address)
-            )
+        )
 
-        if INCIDENT_KEY_ADDRESS not in i_dict:
-            self._get_address_from_cache(
-                i_dict, self._parse_and_process_address(address)
-            )
+    def _store_result(
+        self, address: str, result: Optional[dict], provider: str
+    ) -> None:
+        """Persist a geocode result so later runs can skip the lookup."""
+        if not result:
+            return
 
-        # Return if an address was found.
-        return INCIDENT_KEY_ADDRESS in i_dict
+        if result is self.NON_FINDABLE_ADDRESS_DICT:
+            provider = GEOCODER_PROVIDER_NONE
+        self._persistent_cache.set(address, result, provider)
 
     @staticmethod
     def _cannot_geocode(address: str, and_cnt: [str]) -> bool:
@@ -128,29 +260,53 @@ class Geocoder:
         return self._address_cache[address]
 
     def _census_validate_address(self, address: str) -> dict:
+        return self._single_flight.do(
+            (GEOCODER_PROVIDER_CENSUS, address),
+            self._request_census_address,
+            address,
+        )
+
+    def _request_census_address(self, address: str) -> dict:
         """Get address from Census geocoder.
 
         For more information on the Census Geocode API, visit this link:
         https://github.com/fitnr/censusgeocode#census-geocode
         """
         response = None
-        for _ in range(self.NUM_RETRIES):
+        for attempt in range(self.NUM_RETRIES):
+            self._census_rate_limiter.wait()
             try:
-                response = self._census_client.address(
-                    street=address,
-                    city=LOCATION_CHICAGO,
-                    state=LOCATION_ILLINOIS,
-                    returntype="locations",
-                    timeout=self.TIMEOUT,
+                METRICS.increment(
+                    "geocoder_calls", provider=GEOCODER_PROVIDER_CENSUS
                 )
+                with METRICS.time(
+                    "geocoder_request", provider=GEOCODER_PROVIDER_CENSUS
+                ):
+                    response = self._census_client.address(
+                        street=address,
+                        city=LOCATION_CHICAGO,
+                        state=LOCATION_ILLINOIS,
+                        returntype="locations",
+                        timeout=self.TIMEOUT,
+                    )
                 if response:
                     break
             except requests.exceptions.RequestException:
+                backoff = min(
+                    self.RETRY_BACKOFF * 2**attempt, self.RETRY_BACKOFF_MAX
+                )
                 logging.info(
-                    f"Pausing {self.TIMEOUT}s between Census Geocode requests."
+                    f"Pausing {backoff}s between Census Geocode requests."
+                )
+                METRICS.increment(
+                    "geocoder_retry_sleeps", provider=GEOCODER_PROVIDER_CENSUS
+                )
+                METRICS.increment(
+                    "geocoder_retry_sleep_seconds",
+                    backoff,
+                    provider=GEOCODER_PROVIDER_CENSUS,
                 )
-                sleep(self.TIMEOUT)
-                pass
+                sleep(backoff)
 
         if response:
             logging.debug(f"Using the Census geocoder for: {address}")
@@ -175,7 +331,10 @@ class Geocoder:
             "Using the Google Maps reverse geocoder for: "
             f"{latitude}, {longitude}"
         )
-        resp = self._google_client.reverse_geocode((latitude, longitude))
+        self._google_rate_limiter.wait()
+        METRICS.increment("geocoder_calls", provider="google_reverse")
+        with METRICS.time("geocoder_request", provider="google_reverse"):
+            resp = self._google_client.reverse_geocode((latitude, longitude))
 
         if resp:
             self._address_cache[original_addr] = {
@@ -195,18 +354,30 @@ class Geocoder:
         return self._address_cache[original_addr]
 
     def _google_validate_address(self, address: str) -> dict:
+        return self._single_flight.do(
+            (GEOCODER_PROVIDER_GOOGLE, address),
+            self._request_google_address,
+            address,
+        )
+
+    def _request_google_address(self, address: str) -> dict:
         """Get address from Google Maps geocoder.
 
         For more information on the Google Maps API, visit this link:
         https://github.com/googlemaps/google-maps-services-python#usage
         """
-        resp = self._google_client.addressvalidation(
-            [address],
-            # Enable Coding Accuracy Support System
-            enableUspsCass=True,
-            locality=LOCATION_HYDE_PARK,
-            regionCode=LOCATION_US,
-        )
+        self._google_rate_limiter.wait()
+        METRICS.increment("geocoder_calls", provider=GEOCODER_PROVIDER_GOOGLE)
+        with METRICS.time(
+            "geocoder_request", provider=GEOCODER_PROVIDER_GOOGLE
+        ):
+            resp = self._google_client.addressvalidation(
+                [address],
+                # Enable Coding Accuracy Support System
+                enableUspsCass=True,
+                locality=LOCATION_HYDE_PARK,
+                regionCode=LOCATION_US,
+            )
 
         if "result" in resp:
             result = resp["result"]
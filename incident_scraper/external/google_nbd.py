@@ -1,23 +1,30 @@
 """Contains code relating to the Google Cloud Platform Datastore service."""
 
 import csv
+import gzip
 import json
 import logging
+from contextlib import ExitStack
 from datetime import date, datetime
+from typing import Callable, Dict, Iterator, List, Optional, Set
 
 from google.cloud.datastore.helpers import GeoPoint
-from google.cloud.ndb import Client, GeoPt, put_multi
+from google.cloud.ndb import Client, GeoPt, GeoPtProperty, Key, Query, get_multi
 from google.oauth2 import service_account
 
+from incident_scraper.external.bulk_writer import BulkWriter
 from incident_scraper.models.incident import Incident
 from incident_scraper.utils.constants import (
     ENV_GCP_CREDENTIALS,
     ENV_GCP_PROJECT_ID,
+    FILE_ENCODING_UTF_8,
     FILE_NAME_INCIDENT_DUMP,
+    FILE_NAME_INCIDENT_PARQUET,
     FILE_OPEN_WRITE,
     FILE_TYPE_JSON,
     INCIDENT_KEY_ADDRESS,
     INCIDENT_KEY_COMMENTS,
+    INCIDENT_KEY_CONTENT_HASH,
     INCIDENT_KEY_ID,
     INCIDENT_KEY_LATITUDE,
     INCIDENT_KEY_LOCATION,
@@ -28,8 +35,13 @@ from incident_scraper.utils.constants import (
     INCIDENT_KEY_TYPE,
     INCIDENT_PREDICTED_TYPE,
     INCIDENT_TYPE_INFO,
+    PARQUET_COMPRESSION,
+    PARQUET_ROW_GROUP_SIZE,
+    TIMEZONE_CHICAGO,
     UCPD_MDY_KEY_DATE_FORMAT,
 )
+from incident_scraper.utils.functions import chunked
+from incident_scraper.utils.metrics import METRICS
 
 
 def get_incident(ucpd_id: str):
@@ -44,9 +56,27 @@ def get_incident(ucpd_id: str):
 class GoogleNBD:
     """Create the client and access GCP NBD functionality."""
 
+    # The CSV and Parquet columns, in the order to_dict() used to give them.
+    # Internal properties, such as the content hash, aren't exported.
+    CSV_FIELDS = [
+        Incident.comments._name,
+        Incident.disposition._name,
+        Incident.incident._name,
+        Incident.location._name,
+        Incident.occurred._name,
+        Incident.predicted_incident._name,
+        Incident.reported._name,
+        Incident.reported_date._name,
+        Incident.season._name,
+        Incident.ucpd_id._name,
+        Incident.validated_address._name,
+        Incident.validated_location._name,
+    ]
     ENTITY_TYPE = "Incident"
+    PAGE_SIZE = 500
 
-    def __init__(self):
+    def __init__(self, page_size: int = PAGE_SIZE):
+        self._page_size = page_size
         if ENV_GCP_CREDENTIALS.endswith(FILE_TYPE_JSON):
             self._client = Client(ENV_GCP_PROJECT_ID)
         else:
@@ -78,6 +108,7 @@ class GoogleNBD:
                 incident[INCIDENT_KEY_LATITUDE],
                 incident[INCIDENT_KEY_LONGITUDE],
             ),
+            content_hash=incident.get(INCIDENT_KEY_CONTENT_HASH),
         )
 
     def add_incident(self, incident: dict) -> None:
@@ -86,62 +117,253 @@ class GoogleNBD:
             nbd_incident = self._create_incident_from_dict(incident)
             nbd_incident.put(incident)
 
-    def add_incidents(self, incidents: [Incident]) -> None:
+    def add_incidents(self, incidents: [dict]) -> None:
         """Add Incidents to datastore in bulk."""
-        with self._client.context():
-            incident_keys = []
-            for i in incidents:
-                nbd_incident = self._create_incident_from_dict(i)
-                incident_keys.append(nbd_incident)
-            put_multi(incident_keys)
-
-    def download_all(self) -> None:
-        """Download all incidents from datastore."""
-        with self._client.context():
-            query = Incident.query().order(-Incident.reported_date).fetch()
-
-        json_incidents = []
-        logging.info(f"Downloaded {len(query)} incident records.")
-        for i in query:
-            record = {}
-            for key, value in i.to_dict().items():
-                if isinstance(value, GeoPoint):
-                    record[key] = (
-                        str(value.latitude) + "," + str(value.longitude)
+        with self.incident_writer() as writer:
+            writer.write(incidents)
+
+    def bulk_writer(self) -> BulkWriter:
+        """Create a writer that saves Incident models in the background."""
+        return BulkWriter(self._client)
+
+    def incident_writer(
+        self, on_written: Optional[Callable[[list], None]] = None
+    ) -> BulkWriter:
+        """Create a writer that saves incident dicts in the background."""
+        return BulkWriter(
+            self._client, self._create_incident_from_dict, on_written=on_written
+        )
+
+    def _iter_query(
+        self, create_query: Callable[[], Query], **options
+    ) -> Iterator:
+        """
+        Page through a query's results with cursors.
+
+        Each page is fetched in its own client context, so only one page of
+        entities is held at a time and the client can be used between pages.
+        """
+        cursor = None
+        more = True
+        while more:
+            with self._client.context(), METRICS.time("datastore_page_fetch"):
+                page, cursor, more = create_query().fetch_page(
+                    self._page_size, start_cursor=cursor, **options
+                )
+            yield from page
+
+    def download_all(self, gzip_copy: bool = False) -> None:
+        """
+        Stream all incidents from datastore into a CSV.
+
+        Rows are written page by page under a fixed header taken from the
+        Incident model, and a gzipped copy can be written in the same pass.
+        """
+        num_incidents = 0
+        with ExitStack() as stack:
+            csv_files = [
+                stack.enter_context(
+                    open(
+                        FILE_NAME_INCIDENT_DUMP,
+                        FILE_OPEN_WRITE,
+                        encoding=FILE_ENCODING_UTF_8,
+                        newline="",
                     )
-                    continue
-                record[key] = value
-            json_incidents.append(record)
-
-        with open(FILE_NAME_INCIDENT_DUMP, FILE_OPEN_WRITE) as csv_file:
-            csv_writer = csv.DictWriter(
-                csv_file,
-                fieldnames=json_incidents[0].keys(),
-                delimiter=",",
-                quoting=csv.QUOTE_MINIMAL,
-            )
-            csv_writer.writeheader()
-            csv_writer.writerows(json_incidents)
-        logging.info(f"Saved {len(json_incidents)} incident records to a CSV.")
+                )
+            ]
+            if gzip_copy:
+                csv_files.append(
+                    stack.enter_context(
+                        gzip.open(
+                            f"{FILE_NAME_INCIDENT_DUMP}.gz",
+                            "wt",
+                            encoding=FILE_ENCODING_UTF_8,
+                            newline="",
+                        )
+                    )
+                )
 
-    def get_all_incidents(self) -> [Incident]:
-        """Get ALL incidents."""
-        with self._client.context():
-            return Incident.query().order(-Incident.reported_date).fetch()
+            csv_writers = [
+                csv.writer(f, delimiter=",", quoting=csv.QUOTE_MINIMAL)
+                for f in csv_files
+            ]
+            for csv_writer in csv_writers:
+                csv_writer.writerow(self.CSV_FIELDS)
+
+            for i in self.iter_all_incidents():
+                row = [
+                    self._to_csv_value(getattr(i, f)) for f in self.CSV_FIELDS
+                ]
+                for csv_writer in csv_writers:
+                    csv_writer.writerow(row)
+                num_incidents += 1
+
+        logging.info(f"Saved {num_incidents} incident records to a CSV.")
+
+    def download_all_parquet(self) -> None:
+        """
+        Stream all incidents from datastore into a typed Parquet file.
+
+        Rows are written in row groups as they're fetched, with the report
+        date and time as real dates and timestamps and the validated location
+        split into float latitude and longitude columns.
+        """
+        # pyarrow is only imported by the command that writes Parquet
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = self._parquet_schema()
+        num_incidents = 0
+        with pq.ParquetWriter(
+            FILE_NAME_INCIDENT_PARQUET,
+            schema,
+            compression=PARQUET_COMPRESSION,
+        ) as writer:
+            for incidents in chunked(
+                self.iter_all_incidents(), PARQUET_ROW_GROUP_SIZE
+            ):
+                writer.write_table(
+                    pa.Table.from_pylist(
+                        [self._to_parquet_row(i) for i in incidents],
+                        schema=schema,
+                    )
+                )
+                num_incidents += len(incidents)
+
+        logging.info(f"Saved {num_incidents} incident records to Parquet.")
+
+    @classmethod
+    def _parquet_schema(cls):
+        import pyarrow as pa
+
+        fields = []
+        for name in cls.CSV_FIELDS:
+            if name == Incident.reported._name:
+                fields.append(
+                    pa.field(name, pa.timestamp("us", tz=TIMEZONE_CHICAGO.zone))
+                )
+            elif name == Incident.reported_date._name:
+                fields.append(pa.field(name, pa.date32()))
+            elif isinstance(Incident._properties[name], GeoPtProperty):
+                fields.append(pa.field(f"{name}_latitude", pa.float64()))
+                fields.append(pa.field(f"{name}_longitude", pa.float64()))
+            else:
+                fields.append(pa.field(name, pa.string()))
+
+        return pa.schema(fields)
+
+    @classmethod
+    def _to_parquet_row(cls, incident: Incident) -> dict:
+        row = {}
+        for name in cls.CSV_FIELDS:
+            value = getattr(incident, name)
+            if isinstance(Incident._properties[name], GeoPtProperty):
+                row[f"{name}_latitude"] = value.latitude if value else None
+                row[f"{name}_longitude"] = value.longitude if value else None
+            elif value and name == Incident.reported._name:
+                row[name] = datetime.fromisoformat(value)
+            elif value and name == Incident.reported_date._name:
+                row[name] = date.fromisoformat(value)
+            else:
+                row[name] = value or None
+
+        return row
+
+    @staticmethod
+    def _to_csv_value(value):
+        if isinstance(value, GeoPoint):
+            return str(value.latitude) + "," + str(value.longitude)
+
+        return value
 
-    def get_all_information_incidents(self) -> [Incident]:
-        """Get all 'Information' categorized incidents."""
+    def count_incidents(self) -> int:
+        """Count all incidents with a keys-only query."""
         with self._client.context():
-            return (
-                Incident.query()
-                .filter(Incident.incident == INCIDENT_TYPE_INFO)
-                .fetch()
+            return Incident.query().count()
+
+    def get_incident_types(self) -> List[str]:
+        """Get every distinct incident type from the index alone."""
+        return [
+            i.incident
+            for i in self._iter_query(
+                lambda: Incident.query(
+                    projection=[Incident.incident], distinct=True
+                )
+            )
+        ]
+
+    def iter_all_incidents(self) -> Iterator[Incident]:
+        """Yield ALL incidents, newest first, one page at a time."""
+        return self._iter_query(
+            lambda: Incident.query().order(-Incident.reported_date)
+        )
+
+    def iter_incidents_of_type(self, incident_type: str) -> Iterator[Incident]:
+        """Yield all incidents of a type, one page at a time."""
+        return self._iter_query(
+            lambda: Incident.query(Incident.incident == incident_type)
+        )
+
+    def get_incident_keys_of_type(self, incident_type: str) -> List[Key]:
+        """Get the keys of all incidents of a type, from the index alone."""
+        return list(
+            self._iter_query(
+                lambda: Incident.query(Incident.incident == incident_type),
+                keys_only=True,
             )
+        )
+
+    def get_incidents(self, keys: List[Key]) -> List[Optional[Incident]]:
+        """Look incidents up by key, with None for any that were deleted."""
+        with self._client.context(), METRICS.time("datastore_lookup"):
+            return get_multi(keys)
+
+    def iter_information_incidents(self) -> Iterator[Incident]:
+        """Yield all 'Information' categorized incidents, one page at a time."""
+        return self.iter_incidents_of_type(INCIDENT_TYPE_INFO)
+
+    def get_content_hashes(self, start_date: date) -> Dict[str, Set[str]]:
+        """
+        Get the content hashes of incidents reported on or after a date.
+
+        Only the index is read, and a mapping of UCPD ID to the hashes stored
+        for it is returned. A projection leaves out incidents saved before
+        content hashes were stored, so the stored IDs are listed by a
+        keys-only query first, and those without a hash map to an empty set.
+        """
+
+        def create_query(**options) -> Callable[[], Query]:
+            return lambda: Incident.query(
+                Incident.reported_date
+                >= start_date.strftime(UCPD_MDY_KEY_DATE_FORMAT),
+                **options,
+            )
+
+        # Incident keys are named "{UCPD ID}_{reported date}"
+        content_hashes = {
+            key.id().rsplit("_", 1)[0]: set()
+            for key in self._iter_query(create_query(), keys_only=True)
+        }
+        for i in self._iter_query(
+            create_query(projection=[Incident.ucpd_id, Incident.content_hash])
+        ):
+            content_hashes.setdefault(i.ucpd_id, set()).add(i.content_hash)
+
+        num_unhashed = sum(not hashes for hashes in content_hashes.values())
+        logging.info(
+            f"Fetched the content hashes of {len(content_hashes)} incidents "
+            f"reported since {start_date}, {num_unhashed} of which have none."
+        )
+        return content_hashes
 
     def get_latest_date(self) -> date:
         """Get latest incident date."""
         with self._client.context():
-            query = Incident.query().order(-Incident.reported_date).fetch(1)
+            query = (
+                Incident.query(projection=[Incident.reported_date])
+                .order(-Incident.reported_date)
+                .fetch(1)
+            )
             if query:
                 return datetime.strptime(
                     query[0].reported_date, UCPD_MDY_KEY_DATE_FORMAT
@@ -157,5 +379,5 @@ class GoogleNBD:
 
     def update_list_of_incidents(self, incidents: [Incident]) -> None:
         """Update all incident entries in datastore."""
-        with self._client.context():
-            put_multi(incidents)
+        with self.bulk_writer() as writer:
+            writer.write(incidents)
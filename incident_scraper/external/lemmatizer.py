@@ -1,47 +1,261 @@
 import logging
+import os
 import re
-
-import nltk
-from textblob import Word
+from functools import lru_cache
+from typing import Tuple
 
 from incident_scraper.utils.constants import INCIDENT_TYPE_INFO
 from incident_scraper.utils.functions import custom_title_case
 
-nltk.download("wordnet")
+CACHE_SIZE = 4096
+NLTK_DATA_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "nltk_data",
+)
+# Each replacement is applied to the output of the one before it, so the
+# order of these tables matters.
+RAW_REPLACEMENTS: Tuple[Tuple[str, str], ...] = (
+    ("Information / |/ Information ", ""),
+    ("\\", "/"),
+    (" (", " / "),
+    ("(", ""),
+    (")", ""),
+    ("&", "and"),
+    ("Inforation", INCIDENT_TYPE_INFO),
+    ("Well Being", "Well-Being"),
+    ("Infformation", INCIDENT_TYPE_INFO),
+    ("Att.", "Attempted"),
+    ("Agg.", "Aggravated"),
+    ("\n", " "),
+    (" - ", " / "),
+    ("/", " / "),
+    ("`", ""),
+)
+TITLE_CASE_REPLACEMENTS: Tuple[Tuple[str, str], ...] = (
+    ("Dui", "DUI"),
+    ("Uc", "UC"),
+    ("Uuw", "Unlawful Use of a Weapon"),
+    ("Non Criminal", "Non-Criminal"),
+    ("Non-Criminal / Damage", "Non-Criminal Damage"),
+)
+LEMMA_REPLACEMENTS: Tuple[Tuple[str, str], ...] = (
+    ("Uc", "UC"),
+    ("UCpd", "UCPD"),
+    ("Duo", "DUI"),
+    ("Dui", "DUI"),
+    ("Mean", "Means"),
+    ("Attempt ", "Attempted "),
+)
+TYPE_MAPPINGS: {str: [str]} = {
+    "Aggravated Assault of a Police Officer": [
+        "Aggravated Assault of Police Officer"
+    ],
+    "Aggravated Battery of a Police Officer": [
+        "Aggravated Battery of Police Officer",
+        "Aggravated Battery to Police Officer",
+    ],
+    "Assault": ["Simple Assault Battery", "Simple Assault"],
+    "Assist Other Agency": [
+        "Assist Other Agency Motor Vehicle Theft and Recovery"
+    ],
+    "Battery": ["Battery-Simple", "Simple Battery"],
+    "Battery of a Police Officer": [
+        "Battery of Police Officer",
+        "Battery to Police Officer",
+    ],
+    "Criminal Damage to Vehicle": ["Criminal Damage to Motor Vehicle"],
+    "Damage to Property": [
+        "Criminal Damage to Property",
+        "Damage to City Property",
+        "Damage to Personal Property",
+        "Damage to UC Property",
+        "Damage",
+        "Damaged Property",
+    ],
+    "Domestic Assault": [
+        "Aggravated Domestic Assault",
+        "Domestic Aggravated Assault",
+    ],
+    "Domestic Battery": [
+        "Aggravated Domestic Battery",
+        "Domestic Aggravated Battery",
+    ],
+    "DUI": ["DUI Arrest"],
+    "Found Property": ["Found", "Found Key", "Found Wallet"],
+    "Harassment by Electronic Means": [
+        "Harassing Message",
+        "Harassment via Electronic Means",
+    ],
+    "Harassing Email": ["Harassing Email Message", "Harassing Message"],
+    "Harassing Telephone Call": [
+        "Harassing Phone Call",
+        "Harassment by Telephone",
+    ],
+    "Hazardous Material Incident": [
+        "Haz Mat Event",
+        "Haz Mat Incident",
+        "Haz Mat",
+        "Haz-Mat Incident",
+        "Hazardous Material Event",
+    ],
+    "Hit and Run": [
+        "Hit and Run Property Damage",
+        "Hit and Run Traffic Crash",
+    ],
+    "Homicide": ["Murder"],
+    "Information": ["Information Report"],
+    "Interference with Police Officer": ["Interference with Public Officer"],
+    "Liquor Law Violation": ["Illegal Consumption by Minor"],
+    "Lost Property": ["Lost", "Lost Phone", "Lost Wallet"],
+    "Medical Call": ["Mental Health Call"],
+    "Medical Transport": [
+        "Mental Health Transport",
+        "Mental Transport",
+    ],
+    "Miscellaneous": [
+        "Miscellaneous Incident Report",
+        "Miscellaneous Incident",
+        "Other",
+    ],
+    "Obstructing a Police Officer": [
+        "Obstruct Police Officer",
+        "Obstructing Peace Officer",
+        "Obstructing Police",
+        "Obstructing a Peace Officer",
+    ],
+    "Other Crime against Person": ["Other Crime Vs. Person"],
+    "Possession of Controlled Substance": [
+        "Narcotic Arrest",
+        "Narcotic",
+        "Possession of Crack Cocaine",
+        "Possession of Drug Paraphernalia",
+        "Possession of Narcotic with Intent to Deliver",
+        "Possession of Narcotic",
+    ],
+    "Possession of Marijuana": ["Possession of Cannabis"],
+    "Property Damage": ["Property Damage Only"],
+    "Reckless Discharge of a Firearm": [
+        "Aggravated Discharge of a Firearm",
+        "Reckless Discharge of Firearm",
+        "Reckless Discharge of a Weapon",
+    ],
+    "Resisting Arrest": ["Resisting Police"],
+    "Robbery": [
+        "Robbery Arrest",
+        "Robbery-Aggravated",
+        "Robbery-Strong Arm",
+    ],
+    "Recovered Vehicle": [
+        "Recovered Motor Vehicle",
+        "Recovered Vehicle",
+        "Recovery of Motor Vehicle",
+    ],
+    "Recovered Stolen Vehicle": [
+        "Recovered Stolen Motor Vehicle",
+        "Recovered Motor Vehicle",
+        "Stolen Motor Vehicle Recovery",
+        "Stolen Vehicle Recovery",
+    ],
+    "Sexual Abuse": ["Criminal Sexual Abuse"],
+    "Sexual Assault": [
+        "Aggravated Criminal Sexual Assault",
+        "Criminal Sexual Assault",
+    ],
+    "Strong Arm": ["Strong Armed"],
+    "Suspicious Mail": ["Suspicious Letter", "Suspicious Package"],
+    "Suspect Narcotic": ["Suspect Narcotic Found"],
+    "Traffic Violation Arrest": [
+        "Traffic Arrest",
+    ],
+    "Trespass to Property": [
+        "Criminal Trespass to Land",
+        "Criminal Trespass to Property",
+        "Criminal Trespass to Residence",
+        "Criminal Trespass",
+        "Trespass to Land",
+    ],
+    "Trespass to Vehicle": [
+        "Criminal Trespass to Motor Vehicle",
+        "Criminal Trespass to Vehicle",
+        "Trespass to Motor Vehicle",
+    ],
+    "Unlawful Discharge of a Firearm": [
+        "Unlawful Discharge of Firearm",
+        "Unlawful Discharge of Weapon",
+        "Unlawful Discharge of a Weapon",
+    ],
+    "Unlawful Possession of a Firearm": [
+        "Unlawful Possession of Firearm",
+        "Unlawful Possession of Handgun",
+        "Unlawful Possession of a Handgun",
+    ],
+    "Unlawful Possession of a Weapon": ["Unlawful Possession of Weapon"],
+    "Unlawful Use of a Weapon": [
+        "Unlawful Use of Weapon",
+        "Unlawful Use of a Weapon Arrest",
+    ],
+    "Vehicle Theft and Recovery": [
+        "Motor Vehicle Theft and Recovery",
+        "Motor Vehicle Theft Recovery",
+    ],
+    "Well-Being Check": ["Well-Being"],
+}
+# Some aliases are listed under more than one type, and the first type
+# listed wins, so the index is built from the last mapping to the first.
+TYPE_ALIASES: {str: str} = {
+    alias: true_type
+    for true_type, aliases in reversed(TYPE_MAPPINGS.items())
+    for alias in aliases
+}
+
+
+@lru_cache(maxsize=1)
+def load_word_class() -> type:
+    """
+    Import TextBlob's Word class, backed by the bundled WordNet data.
+
+    Importing NLTK also imports sklearn and pandas, so it's deferred until a
+    word first needs lemmatizing. WordNet is never downloaded at runtime, so
+    a missing copy fails with instructions for bundling it.
+    """
+    import nltk
+    from textblob import Word
+
+    if NLTK_DATA_DIRECTORY not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIRECTORY)
+
+    try:
+        nltk.data.find("corpora/wordnet")
+    except LookupError:
+        raise LookupError(
+            f"WordNet wasn't found in {NLTK_DATA_DIRECTORY} or NLTK's other "
+            "data directories. Run `make wordnet` to bundle it."
+        ) from None
+
+    return Word
+
+
+def replace_all(text: str, replacements: Tuple[Tuple[str, str], ...]) -> str:
+    for old, new in replacements:
+        text = text.replace(old, new)
+
+    return text
 
 
 class Lemmatizer:
     @staticmethod
+    @lru_cache(maxsize=CACHE_SIZE)
     def process(incident: str) -> str:
-        incident = (
-            incident.replace("Information / |/ Information ", "")
-            .replace("\\", "/")
-            .replace(" (", " / ")
-            .replace("(", "")
-            .replace(")", "")
-            .replace("&", "and")
-            .replace("Inforation", INCIDENT_TYPE_INFO)
-            .replace("Well Being", "Well-Being")
-            .replace("Infformation", INCIDENT_TYPE_INFO)
-            .replace("Hit & Run", "Hit and Run")
-            .replace("Att.", "Attempted")
-            .replace("Agg.", "Aggravated")
-            .replace("(", "/ ")
-            .replace(")", "")
-            .replace("\n", " ")
-            .replace(" - ", " / ")
-            .replace("/", " / ")
-            .replace("`", "")
-        ).strip()
-        incident = custom_title_case(incident)
+        """
+        Standardize an incident type string.
 
-        incident = (
-            incident.replace("Dui", "DUI")
-            .replace("Uc", "UC")
-            .replace("Uuw", "Unlawful Use of a Weapon")
-            .replace("Non Criminal", "Non-Criminal")
-            .replace("Non-Criminal / Damage", "Non-Criminal Damage")
-        )
+        There are only a few hundred distinct raw types, so results are
+        memoized by the raw string; process.cache_info() reports the hits.
+        """
+        incident = replace_all(incident, RAW_REPLACEMENTS).strip()
+        incident = custom_title_case(incident)
+        incident = replace_all(incident, TITLE_CASE_REPLACEMENTS)
 
         incident = re.sub(r"\s{2,}", " ", incident)
 
@@ -50,19 +264,11 @@ class Lemmatizer:
         for i_type in incident.split(" / "):
             lemma = custom_title_case(
                 " ".join(
-                    [Word(w.lower()).lemmatize() for w in i_type.split(" ")]
+                    [Lemmatizer._lemmatize_word(w) for w in i_type.split(" ")]
                 )
             )
-            lemma = (
-                lemma.replace("Uc", "UC")
-                .replace("UCpd", "UCPD")
-                .replace("Duo", "DUI")
-                .replace("Dui", "DUI")
-                .replace("Mean", "Means")
-                .replace("Attempt ", "Attempted ")
-            )
-
-            lemma = Lemmatizer._map_incident_type(lemma)
+            lemma = replace_all(lemma, LEMMA_REPLACEMENTS)
+            lemma = TYPE_ALIASES.get(lemma, lemma)
 
             if i_type != lemma:
                 updated = True
@@ -80,169 +286,6 @@ class Lemmatizer:
             return incident
 
     @staticmethod
-    def _map_incident_type(incident: str) -> str:
-        TYPE_MAPPINGS: {str: [str]} = {
-            "Aggravated Assault of a Police Officer": [
-                "Aggravated Assault of Police Officer"
-            ],
-            "Aggravated Battery of a Police Officer": [
-                "Aggravated Battery of Police Officer",
-                "Aggravated Battery to Police Officer",
-            ],
-            "Assault": ["Simple Assault Battery", "Simple Assault"],
-            "Assist Other Agency": [
-                "Assist Other Agency Motor Vehicle Theft and Recovery"
-            ],
-            "Battery": ["Battery-Simple", "Simple Battery"],
-            "Battery of a Police Officer": [
-                "Battery of Police Officer",
-                "Battery to Police Officer",
-            ],
-            "Criminal Damage to Vehicle": ["Criminal Damage to Motor Vehicle"],
-            "Damage to Property": [
-                "Criminal Damage to Property",
-                "Damage to City Property",
-                "Damage to Personal Property",
-                "Damage to UC Property",
-                "Damage",
-                "Damaged Property",
-            ],
-            "Domestic Assault": [
-                "Aggravated Domestic Assault",
-                "Domestic Aggravated Assault",
-            ],
-            "Domestic Battery": [
-                "Aggravated Domestic Battery",
-                "Domestic Aggravated Battery",
-            ],
-            "DUI": ["DUI Arrest"],
-            "Found Property": ["Found", "Found Key", "Found Wallet"],
-            "Harassment by Electronic Means": [
-                "Harassing Message",
-                "Harassment via Electronic Means",
-            ],
-            "Harassing Email": ["Harassing Email Message", "Harassing Message"],
-            "Harassing Telephone Call": [
-                "Harassing Phone Call",
-                "Harassment by Telephone",
-            ],
-            "Hazardous Material Incident": [
-                "Haz Mat Event",
-                "Haz Mat Incident",
-                "Haz Mat",
-                "Haz-Mat Incident",
-                "Hazardous Material Event",
-            ],
-            "Hit and Run": [
-                "Hit and Run Property Damage",
-                "Hit and Run Traffic Crash",
-            ],
-            "Homicide": ["Murder"],
-            "Information": ["Information Report"],
-            "Interference with Police Officer": [
-                "Interference with Public Officer"
-            ],
-            "Liquor Law Violation": ["Illegal Consumption by Minor"],
-            "Lost Property": ["Lost", "Lost Phone", "Lost Wallet"],
-            "Medical Call": ["Mental Health Call"],
-            "Medical Transport": [
-                "Mental Health Transport",
-                "Mental Transport",
-            ],
-            "Miscellaneous": [
-                "Miscellaneous Incident Report",
-                "Miscellaneous Incident",
-                "Other",
-            ],
-            "Obstructing a Police Officer": [
-                "Obstruct Police Officer",
-                "Obstructing Peace Officer",
-                "Obstructing Police",
-                "Obstructing a Peace Officer",
-            ],
-            "Other Crime against Person": ["Other Crime Vs. Person"],
-            "Possession of Controlled Substance": [
-                "Narcotic Arrest",
-                "Narcotic",
-                "Possession of Crack Cocaine",
-                "Possession of Drug Paraphernalia",
-                "Possession of Narcotic with Intent to Deliver",
-                "Possession of Narcotic",
-            ],
-            "Possession of Marijuana": ["Possession of Cannabis"],
-            "Property Damage": ["Property Damage Only"],
-            "Reckless Discharge of a Firearm": [
-                "Aggravated Discharge of a Firearm",
-                "Reckless Discharge of Firearm",
-                "Reckless Discharge of a Weapon",
-            ],
-            "Resisting Arrest": ["Resisting Police"],
-            "Robbery": [
-                "Robbery Arrest",
-                "Robbery-Aggravated",
-                "Robbery-Strong Arm",
-            ],
-            "Recovered Vehicle": [
-                "Recovered Motor Vehicle",
-                "Recovered Vehicle",
-                "Recovery of Motor Vehicle",
-            ],
-            "Recovered Stolen Vehicle": [
-                "Recovered Stolen Motor Vehicle",
-                "Recovered Motor Vehicle",
-                "Stolen Motor Vehicle Recovery",
-                "Stolen Vehicle Recovery",
-            ],
-            "Sexual Abuse": ["Criminal Sexual Abuse"],
-            "Sexual Assault": [
-                "Aggravated Criminal Sexual Assault",
-                "Criminal Sexual Assault",
-            ],
-            "Strong Arm": ["Strong Armed"],
-            "Suspicious Mail": ["Suspicious Letter", "Suspicious Package"],
-            "Suspect Narcotic": ["Suspect Narcotic Found"],
-            "Traffic Violation Arrest": [
-                "Traffic Arrest",
-            ],
-            "Trespass to Property": [
-                "Criminal Trespass to Land",
-                "Criminal Trespass to Property",
-                "Criminal Trespass to Residence",
-                "Criminal Trespass",
-                "Trespass to Land",
-            ],
-            "Trespass to Vehicle": [
-                "Criminal Trespass to Motor Vehicle",
-                "Criminal Trespass to Vehicle",
-                "Trespass to Motor Vehicle",
-            ],
-            "Unlawful Discharge of a Firearm": [
-                "Unlawful Discharge of Firearm",
-                "Unlawful Discharge of Weapon",
-                "Unlawful Discharge of a Weapon",
-            ],
-            "Unlawful Possession of a Firearm": [
-                "Unlawful Possession of Firearm",
-                "Unlawful Possession of Handgun",
-                "Unlawful Possession of a Handgun",
-            ],
-            "Unlawful Possession of a Weapon": [
-                "Unlawful Possession of Weapon"
-            ],
-            "Unlawful Use of a Weapon": [
-                "Unlawful Use of Weapon",
-                "Unlawful Use of a Weapon Arrest",
-            ],
-            "Vehicle Theft and Recovery": [
-                "Motor Vehicle Theft and Recovery",
-                "Motor Vehicle Theft Recovery",
-            ],
-            "Well-Being Check": ["Well-Being"],
-        }
-
-        for true_type, type_list in TYPE_MAPPINGS.items():
-            if incident in type_list:
-                incident = true_type
-                break
-
-        return incident
+    @lru_cache(maxsize=CACHE_SIZE)
+    def _lemmatize_word(word: str) -> str:
+        return load_word_class()(word.lower()).lemmatize()
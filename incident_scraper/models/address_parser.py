@@ -1,6 +1,62 @@
 import re
+from functools import lru_cache
 from typing import Tuple
 
+# Applied in order, each to the output of the one before it.
+REGEX_REPLACEMENTS = [
+    (re.compile(pattern), replacement)
+    for pattern, replacement in [
+        ("between", "between "),
+        (r"\s{2,}", " "),
+        (r" Drive$", " Dr."),
+        (r" Court$", " Ct."),
+        (r"^Shore Dr.", "S. Shore Dr."),
+        ("St. St,?", "St."),
+        ("Dr. Dr,?", "Dr."),
+        (r"E,?\.?\w?E\.", "E."),
+        (r"S,?\.? S\.", "S."),
+        (
+            r"\(?S. Woodlawn Ave. Charter School\)?$",
+            "(S. Woodlawn Ave. Charter School)",
+        ),
+    ]
+]
+STRING_REPLACEMENTS = [
+    ("&", "and"),
+    ("..", "."),
+    ("South S.", "S."),
+    ("East E.", "E."),
+    ("\n", " "),
+    ("Ave. Ave", "Ave."),
+    ("Blvd. Blvd", "Blvd."),
+    ("St. Street", "St."),
+    (" Drive ", " Dr. "),
+    (" Dr ", " Dr. "),
+    (" s. ", " S. "),
+    (" e. ", " E. "),
+    ("S. S.", "S."),
+    ("E. E.", "E."),
+    (" st. ", " St. "),
+    ("St..", "St."),
+    ("St. St.", "St."),
+    (" Court ", " Ct. "),
+    (" Pl ", " Pl. "),
+    (" pl. ", " Pl. "),
+    ("Midway Pl.", "Midway Plaisance"),
+    ("South Shore", "S. Shore"),
+    ("Woodland", "Woodlawn"),
+    ("Between", "between"),
+    (" and Shore Dr.", " and S. Shore Dr."),
+]
+# Street rewrites that end the non-ordinal corrections once one applies.
+SPECIAL_CASE_REPLACEMENTS = [
+    ("E. S. Harper Ave. Ct.", "E. Harper Ct."),
+    ("S. Harper Ave. Ct.", "S. Harper Ave."),
+    ("E. S. Hyde Park Blvd.", "E. Hyde Park Blvd."),
+]
+ADDRESS_CACHE_SIZE = 8192
+ORDINAL_TOKEN_REGEX = re.compile(r"\d{2}(?:st|nd|rd|th)")
+
 
 class AddressParser:
     """
@@ -13,9 +69,16 @@ class AddressParser:
     def __new__(cls):
         if cls.__instance is None:
             cls.__instance = super().__new__(cls)
+            cls.__instance._initialized = False
         return cls.__instance
 
     def __init__(self):
+        # Every AddressParser() call returns the same instance, so it's only
+        # set up the first time.
+        if self._initialized:
+            return
+        self._initialized = True
+
         self._numerical_streets = [self._make_ordinal(s) for s in range(37, 95)]
         self._street_corrections = [
             self._create_street_tuple("Berkeley"),
@@ -57,6 +120,7 @@ class AddressParser:
         self._street_corrections_final.extend(
             ["S. Shore Dr.", "Midway Plaisance", "E. Drexel Sq.", "E. Park Pl."]
         )
+        self._process = lru_cache(maxsize=ADDRESS_CACHE_SIZE)(self._normalize)
 
     @staticmethod
     def _create_street_tuple(
@@ -84,7 +148,16 @@ class AddressParser:
         return str(n) + suffix
 
     def _correct_ordinals(self, address: str) -> str:
+        # The corrections never add a numbered street, so only the ones in
+        # the address to begin with need checking.
+        ordinal_tokens = set(ORDINAL_TOKEN_REGEX.findall(address))
+        if not ordinal_tokens:
+            return address
+
         for s in self._numerical_streets:
+            if s not in ordinal_tokens:
+                continue
+
             dir_s = f"E. {s}"
             if s in address and dir_s not in address:
                 address = address.replace(s, dir_s)
@@ -100,39 +173,40 @@ class AddressParser:
         return address
 
     def _correct_non_ordinals(self, address: str) -> str:
-        for sc in self._street_corrections:
-            if "E. S. Harper Ave. Ct." in address:
-                address = address.replace(
-                    "E. S. Harper Ave. Ct.", "E. Harper Ct."
-                )
+        # Like the numbered streets, only the street names in the address to
+        # begin with can be corrected. The special cases end the corrections,
+        # and only need checking again after a correction changes the address.
+        changed = True
+        for name, dir_name, full_name in self._street_corrections:
+            if name not in address:
+                continue
+
+            if changed and self._has_special_case(address):
                 break
 
-            if "S. Harper Ave. Ct." in address:
-                address = address.replace(
-                    "S. Harper Ave. Ct.", "S. Harper Ave."
-                )
-                break
-
-            if "E. S. Hyde Park Blvd." in address:
-                address = address.replace(
-                    "E. S. Hyde Park Blvd.", "E. Hyde Park Blvd."
-                )
-                break
-
-            name, dir_name, full_name = sc
-
-            if name in address and dir_name not in address:
+            original = address
+            if dir_name not in address:
                 address = address.replace(name, dir_name)
 
             if dir_name in address and full_name not in address:
                 address = address.replace(dir_name, full_name)
 
-        non_ordinal_streets = [
-            s for s in self._street_corrections_final if s in address
-        ]
-        if (
-            len(non_ordinal_streets) == 3
-            and "S. Hyde Park Blvd." in non_ordinal_streets
+            changed = address != original
+
+        for old, new in SPECIAL_CASE_REPLACEMENTS:
+            if old in address:
+                address = address.replace(old, new)
+                break
+
+        return self._finish_non_ordinals(address)
+
+    @staticmethod
+    def _has_special_case(address: str) -> bool:
+        return any(old in address for old, _ in SPECIAL_CASE_REPLACEMENTS)
+
+    def _finish_non_ordinals(self, address: str) -> str:
+        if "S. Hyde Park Blvd." in address and (
+            sum(s in address for s in self._street_corrections_final) == 3
         ):
             address = address.replace(
                 "S. Hyde Park Blvd.", "E. Hyde Park Blvd."
@@ -145,48 +219,11 @@ class AddressParser:
 
     @staticmethod
     def _correct_replacements(address: str) -> str:
-        address = re.sub("between", "between ", address)
-        address = re.sub(r"\s{2,}", " ", address)
-        address = re.sub(r" Drive$", " Dr.", address)
-        address = re.sub(r" Court$", " Ct.", address)
-        address = re.sub(r"^Shore Dr.", "S. Shore Dr.", address)
-        address = re.sub("St. St,?", "St.", address)
-        address = re.sub("Dr. Dr,?", "Dr.", address)
-        address = re.sub(r"E,?\.?\w?E\.", "E.", address)
-        address = re.sub(r"S,?\.? S\.", "S.", address)
-        address = re.sub(
-            r"\(?S. Woodlawn Ave. Charter School\)?$",
-            "(S. Woodlawn Ave. Charter School)",
-            address,
-        )
+        for pattern, replacement in REGEX_REPLACEMENTS:
+            address = pattern.sub(replacement, address)
 
-        address = (
-            address.replace("&", "and")
-            .replace("..", ".")
-            .replace("South S.", "S.")
-            .replace("East E.", "E.")
-            .replace("\n", " ")
-            .replace("Ave. Ave", "Ave.")
-            .replace("Blvd. Blvd", "Blvd.")
-            .replace("St. Street", "St.")
-            .replace(" Drive ", " Dr. ")
-            .replace(" Dr ", " Dr. ")
-            .replace(" s. ", " S. ")
-            .replace(" e. ", " E. ")
-            .replace("S. S.", "S.")
-            .replace("E. E.", "E.")
-            .replace(" st. ", " St. ")
-            .replace("St..", "St.")
-            .replace("St. St.", "St.")
-            .replace(" Court ", " Ct. ")
-            .replace(" Pl ", " Pl. ")
-            .replace(" pl. ", " Pl. ")
-            .replace("Midway Pl.", "Midway Plaisance")
-            .replace("South Shore", "S. Shore")
-            .replace("Woodland", "Woodlawn")
-            .replace("Between", "between")
-            .replace(" and Shore Dr.", " and S. Shore Dr.")
-        )
+        for old, new in STRING_REPLACEMENTS:
+            address = address.replace(old, new)
 
         return address
 
@@ -238,6 +275,17 @@ class AddressParser:
         return parsed_addresses
 
     def process(self, address: str) -> str:
+        """
+        Standardize an address, memoized by the raw address string.
+
+        Hit and miss counts are available from cache_info().
+        """
+        return self._process(address)
+
+    def cache_info(self):
+        return self._process.cache_info()
+
+    def _normalize(self, address: str) -> str:
         address = self._correct_replacements(address)
         address = self._correct_ordinals(address)
         address = self._correct_non_ordinals(address)
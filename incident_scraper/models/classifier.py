@@ -1,80 +1,196 @@
+import glob
+import hashlib
+import json
 import logging
 import os
-import pickle
-from functools import reduce
-from typing import Optional
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional
 
 import numpy as np
 import polars as pl
-from neattext import remove_non_ascii, remove_puncts, remove_stopwords
+from neattext.pattern_data import STOPWORDS_en
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics import accuracy_score, precision_score, recall_score
 from sklearn.model_selection import train_test_split
 from sklearn.multioutput import MultiOutputClassifier
-from xgboost import XGBClassifier
+from xgboost import Booster, XGBClassifier
 
-from incident_scraper.utils.constants import INCIDENT_TYPE_INFO
+from incident_scraper.utils.constants import (
+    FILE_ENCODING_UTF_8,
+    FILE_NAME_INCIDENT_DUMP,
+    FILE_NAME_INCIDENT_PARQUET,
+    FILE_OPEN_READ,
+    FILE_OPEN_WRITE,
+    INCIDENT_TYPE_INFO,
+)
 from incident_scraper.utils.functions import custom_title_case
+from incident_scraper.utils.metrics import METRICS
 
-INCIDENT_FILE = "incident_dump.csv"
 KEY_COMMENTS = "comments"
 KEY_INCIDENT_TYPE = "incident"
 KEY_VALIDATED_LOCATION = "validated_location"
 MINIMUM_TYPE_FREQUENCY = 20
-SAVED_MODEL_LOCATION = (
-    os.getcwd().replace("\\", "/")
-    + "/incident_scraper/data/xgb_prediction_model.pkl"
-)
-SAVED_VECTORIZER_LOCATION = (
-    os.getcwd().replace("\\", "/") + "/incident_scraper/data/xgb_vectorizer.pkl"
-)
-SAVED_TYPES_LOCATION = (
-    os.getcwd().replace("\\", "/") + "/incident_scraper/data/xgb_types.pkl"
+MODEL_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "xgb_model",
 )
-TEXT_NORMALIZING_FUNCTIONS = [
-    remove_stopwords,
-    remove_non_ascii,
-    remove_puncts,
-    str.lower,
-]
+MODEL_FILE_BOOSTER = "booster_{}.ubj"
+MODEL_FILE_IDF = "idf.npy"
+MODEL_FILE_MANIFEST = "manifest.json"
+MODEL_FILE_VOCABULARY = "vocabulary.npy"
+MODEL_FORMAT_VERSION = 1
+PREDICTION_THRESHOLD = 0.5
+# neattext's "most common" punctuation marks
+PUNCTUATION_REGEX = r"""[!"&',\-.;?_`]"""
+ROW_INDEX = "row_index"
+STOPWORDS = sorted(STOPWORDS_en)
+TYPE_INDEX = "type_index"
+# str.split() also splits on the \x1c-\x1f separators, which \s doesn't match
+WORD_REGEX = r"[^\s\x1c-\x1f]+"
 
 
-class Classifier:
-    def __init__(self, build_model: bool = False):
-        self._vectorizer = TfidfVectorizer(
-            lowercase=True,
-            max_features=1000,
-            stop_words="english",
-            max_df=0.85,
+class ModelArtifacts(NamedTuple):
+    boosters: List[Booster]
+    types: List[str]
+    vectorizer: TfidfVectorizer
+    version: str
+
+
+def create_vectorizer(
+    vocabulary: Optional[Dict[str, int]] = None,
+) -> TfidfVectorizer:
+    return TfidfVectorizer(
+        lowercase=True,
+        max_features=1000,
+        stop_words="english",
+        max_df=0.85,
+        vocabulary=vocabulary,
+    )
+
+
+def file_checksum(path: str) -> str:
+    with open(path, mode="rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+@lru_cache(maxsize=None)
+def load_model_artifacts(directory: str) -> ModelArtifacts:
+    """
+    Load the saved model artifacts, once per process and directory.
+
+    Every file is checked against the manifest's checksums before use. The
+    vocabulary and IDF arrays are memory-mapped and the boosters are read
+    from XGBoost's native UBJSON format, so nothing is unpickled.
+    """
+    manifest_path = os.path.join(directory, MODEL_FILE_MANIFEST)
+    if not os.path.isfile(manifest_path):
+        raise FileNotFoundError(
+            f"No model manifest found at {manifest_path}, "
+            "run build-model to create one."
+        )
+
+    with open(manifest_path, FILE_OPEN_READ, encoding=FILE_ENCODING_UTF_8) as f:
+        manifest = json.load(f)
+
+    if manifest["format_version"] != MODEL_FORMAT_VERSION:
+        raise ValueError(
+            f"Model format version {manifest['format_version']} is not "
+            f"supported, expected {MODEL_FORMAT_VERSION}."
+        )
+    for file_name, checksum in manifest["checksums"].items():
+        if file_checksum(os.path.join(directory, file_name)) != checksum:
+            raise ValueError(
+                f"The checksum of {file_name} does not match the manifest."
+            )
+
+    vocabulary = np.load(
+        os.path.join(directory, MODEL_FILE_VOCABULARY), mmap_mode="r"
+    )
+    vectorizer = create_vectorizer(
+        {term: i for i, term in enumerate(vocabulary.tolist())}
+    )
+    vectorizer.idf_ = np.load(
+        os.path.join(directory, MODEL_FILE_IDF), mmap_mode="r"
+    )
+
+    boosters = [
+        Booster(model_file=os.path.join(directory, file_name))
+        for file_name in manifest["boosters"]
+    ]
+
+    logging.info(f"Loaded model version {manifest['model_version']}.")
+    return ModelArtifacts(
+        boosters=boosters,
+        types=manifest["types"],
+        vectorizer=vectorizer,
+        version=manifest["model_version"],
+    )
+
+
+def load_training_data(directory: str = ".") -> pl.DataFrame:
+    """
+    Read the comments and incident types of the downloaded incidents.
+
+    The Parquet dump is scanned lazily, so only its two needed columns are
+    decoded. The CSV dump is read when there is no Parquet dump.
+    """
+    parquet_path = os.path.join(directory, FILE_NAME_INCIDENT_PARQUET)
+    if os.path.isfile(parquet_path):
+        incidents = pl.scan_parquet(parquet_path)
+    else:
+        incidents = pl.scan_csv(
+            os.path.join(directory, FILE_NAME_INCIDENT_DUMP)
         )
 
+    return incidents.select(KEY_COMMENTS, KEY_INCIDENT_TYPE).collect()
+
+
+def normalize_comments(comments: pl.Series) -> pl.Series:
+    """
+    Remove stopwords, non-ASCII characters and punctuation from comments.
+
+    Gives the same output as neattext's remove_stopwords, remove_non_ascii and
+    remove_puncts applied in that order, but runs as native polars operations
+    over the whole column instead of a Python callback per row. The words are
+    exploded into one flat column so the stopword lookup is a single hash
+    join, rather than one per comment.
+    """
+    word = pl.col(comments.name)
+    without_stopwords = (
+        comments.str.extract_all(WORD_REGEX)
+        .to_frame()
+        .with_row_index(ROW_INDEX)
+        .explode(comments.name)
+        .group_by(ROW_INDEX, maintain_order=True)
+        .agg(
+            word.filter(~word.str.to_lowercase().is_in(STOPWORDS)).str.join(" ")
+        )
+        .to_series(1)
+    )
+
+    return (
+        pl.select(pl.when(comments.is_not_null()).then(without_stopwords))
+        .to_series()
+        .str.normalize("NFKD")
+        .str.replace_all(r"[^\x00-\x7F]", "")
+        .str.replace_all(PUNCTUATION_REGEX, "")
+        .alias(comments.name)
+    )
+
+
+class Classifier:
+    def __init__(self, build_model: bool = False):
         if build_model:
-            self._df = (
-                pl.read_csv(
-                    f"./{INCIDENT_FILE}",
-                )
-                .select(KEY_COMMENTS, KEY_INCIDENT_TYPE)
-                .with_columns(
-                    pl.col(KEY_COMMENTS).map_elements(
-                        remove_stopwords, return_dtype=pl.String
-                    )
-                )
-                .with_columns(
-                    pl.col(KEY_COMMENTS).map_elements(
-                        remove_non_ascii, return_dtype=pl.String
-                    )
-                )
-                .with_columns(
-                    pl.col(KEY_COMMENTS).map_elements(
-                        remove_puncts, return_dtype=pl.String
-                    )
-                )
+            self._vectorizer = create_vectorizer()
+            self._df = load_training_data()
+            self._df = self._df.with_columns(
+                normalize_comments(self._df[KEY_COMMENTS])
             )
             self._unique_types = self._create_unique_type_list()
             self._clean_data()
             self._model = None
-        else:
-            self._load_model()
 
     @staticmethod
     def _reset_category_casing(category: str) -> str:
@@ -109,42 +225,56 @@ class Classifier:
         return incident_list
 
     def _clean_data(self) -> None:
-        for i in self._unique_types:
-            self._df = self._df.with_columns(
-                pl.col(KEY_INCIDENT_TYPE)
-                .str.to_lowercase()
-                .str.split(" / ")
-                .list.eval(
-                    pl.element()
-                    .str.starts_with(i)
-                    .and_(pl.element().str.ends_with(i))
-                )
-                .list.any()
-                .cast(pl.Int8)
-                .alias(i),
-            )
-
         self._df = self._df.filter(
             pl.col(KEY_INCIDENT_TYPE) != INCIDENT_TYPE_INFO
-        )
+        ).select(KEY_COMMENTS, KEY_INCIDENT_TYPE)
 
-        min_type_cnt = (
-            self._df.select(pl.sum(*self._unique_types))
-            .transpose(include_header=True)
-            .filter(pl.col("column_0") > MINIMUM_TYPE_FREQUENCY)
+        elements = (
+            self._df.select(
+                pl.col(KEY_INCIDENT_TYPE).str.to_lowercase().str.split(" / ")
+            )
+            .with_row_index(ROW_INDEX)
+            .explode(KEY_INCIDENT_TYPE)
         )
 
-        min_type_cnt_list = [t[0] for t in min_type_cnt.select("column").rows()]
+        # The same few hundred elements repeat across every row, so each
+        # distinct one is matched against the types only once.
+        element_types = pl.DataFrame(
+            {
+                KEY_INCIDENT_TYPE: element,
+                TYPE_INDEX: [
+                    i
+                    for i, t in enumerate(self._unique_types)
+                    if element.startswith(t) and element.endswith(t)
+                ],
+            }
+            for element in elements[KEY_INCIDENT_TYPE].drop_nulls().unique()
+        )
+        matches = elements.join(
+            element_types.explode(TYPE_INDEX).drop_nulls(),
+            on=KEY_INCIDENT_TYPE,
+        )
 
-        self._df = self._df.select(
-            KEY_COMMENTS, KEY_INCIDENT_TYPE, *min_type_cnt_list
+        labels = np.zeros(
+            (self._df.height, len(self._unique_types)), dtype=np.int8
         )
+        labels[
+            matches[ROW_INDEX].to_numpy(), matches[TYPE_INDEX].to_numpy()
+        ] = 1
 
-        self._df = self._df.to_pandas(use_pyarrow_extension_array=True)
+        frequent_types = labels.sum(axis=0) > MINIMUM_TYPE_FREQUENCY
+        self._labels = labels[:, frequent_types]
+        self._unique_types = [
+            t
+            for t, frequent in zip(
+                self._unique_types, frequent_types, strict=True
+            )
+            if frequent
+        ]
 
     def _train(self) -> None:
-        X = self._df[KEY_COMMENTS].tolist()
-        y = np.asarray(self._df[self._df.columns[2:]], dtype=int)
+        X = self._df[KEY_COMMENTS].to_list()
+        y = self._labels
         self._vectorizer.fit(X)
 
         X_train, X_test, y_train, y_test = train_test_split(
@@ -173,37 +303,110 @@ class Classifier:
         logging.info(f"Recall Score: {recall}")
 
     def _save_model(self) -> None:
-        pickle.dump(self._model, open(SAVED_MODEL_LOCATION, mode="wb"))
-        pickle.dump(
-            self._vectorizer, open(SAVED_VECTORIZER_LOCATION, mode="wb")
+        os.makedirs(MODEL_DIRECTORY, exist_ok=True)
+        for stale_booster in glob.glob(
+            os.path.join(MODEL_DIRECTORY, MODEL_FILE_BOOSTER.format("*"))
+        ):
+            os.remove(stale_booster)
+
+        np.save(
+            os.path.join(MODEL_DIRECTORY, MODEL_FILE_VOCABULARY),
+            self._vectorizer.get_feature_names_out().astype(str),
+        )
+        np.save(
+            os.path.join(MODEL_DIRECTORY, MODEL_FILE_IDF),
+            self._vectorizer.idf_,
         )
-        pickle.dump(self._unique_types, open(SAVED_TYPES_LOCATION, mode="wb"))
 
-    def _load_model(self) -> None:
-        if os.path.isfile(SAVED_MODEL_LOCATION) and os.path.isfile(
-            SAVED_VECTORIZER_LOCATION
-        ):
-            self._model = pickle.load(open(SAVED_MODEL_LOCATION, mode="rb"))
-            self._vectorizer = pickle.load(
-                open(SAVED_VECTORIZER_LOCATION, mode="rb")
-            )
-            self._unique_types = pickle.load(
-                open(SAVED_TYPES_LOCATION, mode="rb")
+        booster_files = []
+        for i, estimator in enumerate(self._model.estimators_):
+            booster_files.append(MODEL_FILE_BOOSTER.format(f"{i:03d}"))
+            estimator.get_booster().save_model(
+                os.path.join(MODEL_DIRECTORY, booster_files[-1])
             )
 
+        manifest = {
+            "format_version": MODEL_FORMAT_VERSION,
+            "model_version": datetime.now(timezone.utc).strftime(
+                "%Y%m%dT%H%M%SZ"
+            ),
+            "types": self._unique_types,
+            "boosters": booster_files,
+            "checksums": {
+                file_name: file_checksum(
+                    os.path.join(MODEL_DIRECTORY, file_name)
+                )
+                for file_name in [
+                    MODEL_FILE_VOCABULARY,
+                    MODEL_FILE_IDF,
+                    *booster_files,
+                ]
+            },
+        }
+        with open(
+            os.path.join(MODEL_DIRECTORY, MODEL_FILE_MANIFEST),
+            FILE_OPEN_WRITE,
+            encoding=FILE_ENCODING_UTF_8,
+        ) as f:
+            json.dump(manifest, f, indent=2)
+
+        load_model_artifacts.cache_clear()
+        logging.info(f"Saved model version {manifest['model_version']}.")
+
     def train_and_save(self) -> None:
         self._train()
         self._save_model()
 
     def get_predicted_incident_type(self, comment: str) -> Optional[str]:
-        comment = reduce(lambda t, f: f(t), TEXT_NORMALIZING_FUNCTIONS, comment)
-        vectorized_comment = self._vectorizer.transform([comment])
-        prediction = self._model.predict(vectorized_comment).tolist()[0]
-        label_indexes = [
-            i for i in range(len(prediction)) if prediction[i] == 1
-        ]
-        if label_indexes:
-            labels = [self._unique_types[i] for i in label_indexes]
-            return self._reset_category_casing(" / ".join(labels))
+        return self.predict_batch([comment])[0]
+
+    def predict_batch(self, comments: List[str]) -> List[Optional[str]]:
+        """
+        Predict the incident type of every comment in one pass.
+
+        The comments are vectorized into a single sparse matrix, so the
+        per-estimator overhead is paid once per batch rather than per comment.
+        """
+        if not comments:
+            return []
+
+        with METRICS.time("classifier_predict"):
+            predicted_types = self._predict_batch(comments)
+        METRICS.increment("classifier_comments", len(comments))
+
+        return predicted_types
+
+    def _predict_batch(self, comments: List[str]) -> List[Optional[str]]:
+        normalized_comments = (
+            normalize_comments(
+                pl.Series(KEY_COMMENTS, comments, dtype=pl.String)
+            )
+            .str.to_lowercase()
+            .to_list()
+        )
+        artifacts = load_model_artifacts(MODEL_DIRECTORY)
+        vectorized_comments = artifacts.vectorizer.transform(
+            normalized_comments
+        )
+        predictions = np.column_stack(
+            [
+                booster.inplace_predict(vectorized_comments)
+                > PREDICTION_THRESHOLD
+                for booster in artifacts.boosters
+            ]
+        )
+
+        predicted_types = []
+        for prediction in predictions.tolist():
+            labels = [
+                artifacts.types[i]
+                for i in range(len(prediction))
+                if prediction[i]
+            ]
+            predicted_types.append(
+                self._reset_category_casing(" / ".join(labels))
+                if labels
+                else None
+            )
 
-        return None
+        return predicted_types
@@ -18,3 +18,5 @@ class Incident(Model):
     season = StringProperty(indexed=True)
     validated_address = StringProperty()
     validated_location = GeoPtProperty()
+    # A hash of the incident as scraped, used to skip unchanged incidents
+    content_hash = StringProperty(indexed=True)
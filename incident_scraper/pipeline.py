@@ -0,0 +1,487 @@
+"""Contains the steps that scrape, standardize and store incidents."""
+
+import logging
+import re
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from multiprocessing import get_context
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from incident_scraper.external.geocoder import Geocoder
+from incident_scraper.external.google_nbd import GoogleNBD
+from incident_scraper.external.lemmatizer import Lemmatizer
+from incident_scraper.models.address_parser import AddressParser
+from incident_scraper.scraper.ucpd_scraper import UCPDScraper
+from incident_scraper.utils.constants import (
+    INCIDENT_KEY_ADDRESS,
+    INCIDENT_KEY_COMMENTS,
+    INCIDENT_KEY_CONTENT_HASH,
+    INCIDENT_KEY_ID,
+    INCIDENT_KEY_LATITUDE,
+    INCIDENT_KEY_LOCATION,
+    INCIDENT_KEY_LONGITUDE,
+    INCIDENT_KEY_REPORTED,
+    INCIDENT_KEY_REPORTED_DATE,
+    INCIDENT_KEY_SEASON,
+    INCIDENT_KEY_TYPE,
+    INCIDENT_PREDICTED_TYPE,
+    INCIDENT_TYPE_INFO,
+    UCPD_MDY_KEY_DATE_FORMAT,
+)
+from incident_scraper.utils.functions import (
+    chunked,
+    determine_season,
+    incident_content_hash,
+    parse_scraped_incident_timestamp,
+)
+
+# The number of incidents geocoded and saved at a time
+CHUNK_SIZE = 100
+STORED_CHANGED = "changed"
+STORED_NEW = "new"
+STORED_UNCHANGED = "unchanged"
+
+
+class ScreenedChunk(NamedTuple):
+    num_scraped: int
+    malformed: List[dict]
+    candidates: List[dict]
+    # The UCPD IDs of the malformed and unchanged incidents
+    skipped_ids: List[str]
+
+
+def categorize_information(nbd_client: GoogleNBD) -> None:
+    # sklearn and xgboost are only imported by the steps that classify
+    from incident_scraper.models.classifier import Classifier
+
+    prediction_model = Classifier()
+
+    # Incident counters
+    num_incidents = 0
+    predicted_labels = 0
+
+    # Predict one page of incidents while the last one is being saved
+    with nbd_client.bulk_writer() as writer:
+        for incidents in chunked(
+            nbd_client.iter_information_incidents(), GoogleNBD.PAGE_SIZE
+        ):
+            num_incidents += len(incidents)
+            pred_types = prediction_model.predict_batch(
+                [i.comments for i in incidents]
+            )
+            for i, pred_type in zip(incidents, pred_types, strict=True):
+                if pred_type is not None:
+                    predicted_labels += 1
+                    i.predicted_incident = pred_type
+
+            writer.write(incidents)
+
+    logging.info(
+        f"{predicted_labels} of {num_incidents} 'Information' incidents "
+        "were categorized."
+    )
+    logging.info(f"Bulk writer stats: {writer.stats()}")
+
+
+def lemmatize_categories(nbd_client: GoogleNBD) -> None:
+    num_incidents = nbd_client.count_incidents()
+    incident_types = nbd_client.get_incident_types()
+    logging.info(
+        f"{len(incident_types)} incident types fetched for {num_incidents} "
+        "incidents."
+    )
+
+    # Only the incidents of types that lemmatize differently are fetched.
+    # Rewriting an incident moves it out of its type's query, and possibly
+    # into another's, so every key is collected before anything is written.
+    updates = []
+    for incident_type in incident_types:
+        lemma_i_type = Lemmatizer.process(incident_type)
+        if incident_type != lemma_i_type:
+            updates.extend(
+                (key, lemma_i_type)
+                for key in nbd_client.get_incident_keys_of_type(incident_type)
+            )
+
+    num_lemmatized_incidents = 0
+    with nbd_client.bulk_writer() as writer:
+        for chunk in chunked(updates, GoogleNBD.PAGE_SIZE):
+            incidents = []
+            for i, (_, lemma_i_type) in zip(
+                nbd_client.get_incidents([key for key, _ in chunk]),
+                chunk,
+                strict=True,
+            ):
+                if i is not None:
+                    i.incident = lemma_i_type
+                    incidents.append(i)
+            if incidents:
+                writer.write(incidents)
+                num_lemmatized_incidents += len(incidents)
+
+    logging.info(
+        f"{num_lemmatized_incidents} of {num_incidents} "
+        "were incidents lemmatized."
+    )
+    logging.info(f"Lemmatizer cache: {Lemmatizer.process.cache_info()}")
+    logging.info(f"Bulk writer stats: {writer.stats()}")
+
+    logging.info(f"{num_lemmatized_incidents} types were updated.")
+
+
+def parse_and_save_records(
+    incidents: Iterable[Tuple[str, dict]],
+    nbd_client: GoogleNBD,
+    start_date: Optional[date] = None,
+    workers: int = 0,
+    chunk_size: int = CHUNK_SIZE,
+    on_handled: Optional[Callable[[List[str]], None]] = None,
+) -> None:
+    """
+    Take incidents and save them to the GCP Datastore.
+
+    Incidents are consumed as a stream of (UCPD ID, incident) pairs and saved
+    in fixed-size chunks by a background writer, so each chunk is written
+    while the next one is scraped, parsed and geocoded. If the start of the
+    scraped date range is given, incidents already stored with the same
+    content are skipped before any parsing, geocoding or classification.
+    With more than one worker, the chunks are normalized by a process pool.
+    If given, on_handled is called with the UCPD IDs of incidents once
+    they're saved, or once they're skipped as unchanged, malformed or
+    impossible to geocode.
+    """
+    stored_hashes = (
+        nbd_client.get_content_hashes(start_date) if start_date else {}
+    )
+    storage_counts = Counter()
+
+    # Instantiate clients
+    geocoder = Geocoder()
+
+    total_incidents = 0
+    total_added_incidents = 0
+
+    # Incident Key Tracking
+    num_information_incidents = 0
+    information_incidents_predicted = 0
+
+    screened_chunks = (
+        screen_incidents(chunk, stored_hashes, storage_counts)
+        for chunk in chunked(incidents, chunk_size)
+    )
+    on_written = (
+        (lambda chunk: on_handled([i[INCIDENT_KEY_ID] for i in chunk]))
+        if on_handled
+        else None
+    )
+    with nbd_client.incident_writer(on_written) as writer:
+        for screened, normalized in iter_normalized_chunks(
+            screened_chunks, workers
+        ):
+            information_incidents = []
+            parsed_incidents = []
+            void_malformed_incidents = list(screened.malformed)
+            skipped_ids = list(screened.skipped_ids)
+            inter_incidents = screened.num_scraped
+            total_incidents += inter_incidents
+            for original, i in zip(
+                screened.candidates, normalized, strict=True
+            ):
+                if i is None:
+                    void_malformed_incidents.append(original)
+                    skipped_ids.append(original[INCIDENT_KEY_ID])
+                    logging.debug(
+                        f"This incident has a malformed date: {original}"
+                    )
+                    continue
+
+                if i[INCIDENT_KEY_TYPE] == INCIDENT_TYPE_INFO:
+                    information_incidents.append(i)
+
+                address = (
+                    i[INCIDENT_KEY_LOCATION].split(" (")[0]
+                    if "(" in i[INCIDENT_KEY_LOCATION]
+                    else i[INCIDENT_KEY_LOCATION]
+                )
+                parsed_incidents.append((address, i))
+
+            num_information_incidents += len(information_incidents)
+            if information_incidents:
+                information_incidents_predicted += (
+                    predict_information_incidents(information_incidents)
+                )
+
+            incident_objs, geocode_error_incidents = geocode_incidents(
+                parsed_incidents, geocoder
+            )
+            if on_handled:
+                on_handled(
+                    skipped_ids
+                    + [i[INCIDENT_KEY_ID] for i in geocode_error_incidents]
+                )
+            added_incidents = len(incident_objs)
+            logging.info(
+                f"{len(void_malformed_incidents)} of {inter_incidents} contained "
+                "malformed or voided information."
+            )
+            logging.info(
+                f"{len(geocode_error_incidents)} of {inter_incidents} could not be "
+                f"processed by the Geocoder."
+            )
+            logging.info(
+                f"{added_incidents} of {inter_incidents} incidents were "
+                "successfully processed."
+            )
+            if len(incident_objs):
+                logging.info(
+                    f"Adding {added_incidents} of {inter_incidents} incidents to "
+                    "the GCP Datastore."
+                )
+                writer.write(incident_objs)
+            total_added_incidents += added_incidents
+
+    logging.info(
+        f"Completed adding {total_added_incidents} incidents to the GCP "
+        "Datastore."
+    )
+    logging.info(f"Bulk writer stats: {writer.stats()}")
+
+    logging.info(
+        f"{total_incidents} total incidents were scraped from the UCPD "
+        "Incidents' site."
+    )
+    logging.info(
+        f"{information_incidents_predicted} of {num_information_incidents} "
+        "'Information' incidents predicted into other categories."
+    )
+    logging.info(
+        f"{storage_counts[STORED_UNCHANGED]} unchanged incidents were skipped, "
+        f"{storage_counts[STORED_NEW]} were new and "
+        f"{storage_counts[STORED_CHANGED]} had changed."
+    )
+    not_added_incidents = (
+        total_incidents
+        - total_added_incidents
+        - storage_counts[STORED_UNCHANGED]
+    )
+    logging.info(
+        f"{not_added_incidents} of {total_incidents} "
+        "incidents could NOT be added to the GCP Datastore."
+    )
+
+
+def screen_incidents(
+    chunk: List[Tuple[str, dict]],
+    stored_hashes: Dict[str, Set[str]],
+    storage_counts: Counter,
+) -> ScreenedChunk:
+    """
+    Set aside a chunk's malformed and unchanged incidents.
+
+    The rest are keyed by their UCPD ID and content hash, ready to be
+    normalized.
+    """
+    malformed = []
+    candidates = []
+    skipped_ids = []
+    for key, i in chunk:
+        if len(i.keys()) != 6:
+            malformed.append(i)
+            skipped_ids.append(key)
+            logging.debug(
+                f"This incident has an insufficient number of keys: {i}"
+            )
+            continue
+
+        content_hash = incident_content_hash(i)
+        stored_status = get_stored_status(key, content_hash, stored_hashes)
+        storage_counts[stored_status] += 1
+        if stored_status == STORED_UNCHANGED:
+            skipped_ids.append(key)
+            continue
+
+        i[INCIDENT_KEY_ID] = key
+        i[INCIDENT_KEY_CONTENT_HASH] = content_hash
+        candidates.append(i)
+
+    return ScreenedChunk(len(chunk), malformed, candidates, skipped_ids)
+
+
+def normalize_incident(i: dict) -> Optional[dict]:
+    """
+    Standardize an incident's location, report time, type and comments.
+
+    This is pure CPU work that uses no clients, so it can run in a worker
+    process. The incident is updated in place and returned, or None is
+    returned if its report time can't be parsed.
+    """
+    i[INCIDENT_KEY_LOCATION] = AddressParser().process(i[INCIDENT_KEY_LOCATION])
+
+    reported = parse_scraped_incident_timestamp(i[INCIDENT_KEY_REPORTED])
+
+    if not reported:
+        return None
+
+    i[INCIDENT_KEY_TYPE] = Lemmatizer.process(i[INCIDENT_KEY_TYPE])
+
+    i[INCIDENT_KEY_COMMENTS] = (
+        i[INCIDENT_KEY_COMMENTS].replace("\n", " ")
+    ).strip()
+
+    i[INCIDENT_KEY_COMMENTS] = re.sub(r"\s{2,}", " ", i[INCIDENT_KEY_COMMENTS])
+
+    i[INCIDENT_PREDICTED_TYPE] = ""
+
+    i[INCIDENT_KEY_REPORTED_DATE] = reported.strftime(UCPD_MDY_KEY_DATE_FORMAT)
+    i[INCIDENT_KEY_REPORTED] = reported
+
+    i[INCIDENT_KEY_SEASON] = determine_season(i[INCIDENT_KEY_REPORTED])
+
+    return i
+
+
+def normalize_incidents(incidents: List[dict]) -> List[Optional[dict]]:
+    return [normalize_incident(i) for i in incidents]
+
+
+def iter_normalized_chunks(
+    screened_chunks: Iterable[ScreenedChunk], workers: int = 0
+) -> Iterator[Tuple[ScreenedChunk, List[Optional[dict]]]]:
+    """
+    Yield each screened chunk with its normalized incidents, in order.
+
+    With more than one worker, chunks are normalized by a pool of processes,
+    with only a small window of chunks submitted ahead of the consumer.
+    Workers are spawned rather than forked, so they don't inherit the
+    parent's logging handlers and client threads.
+    """
+    if workers <= 1:
+        for screened in screened_chunks:
+            yield screened, normalize_incidents(screened.candidates)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=get_context("spawn")
+    ) as executor:
+        pending = deque()
+        for screened in screened_chunks:
+            pending.append(
+                (
+                    screened,
+                    executor.submit(normalize_incidents, screened.candidates),
+                )
+            )
+            if len(pending) > workers * 2:
+                screened, future = pending.popleft()
+                yield screened, future.result()
+
+        while pending:
+            screened, future = pending.popleft()
+            yield screened, future.result()
+
+
+def get_stored_status(
+    ucpd_id: str, content_hash: str, stored_hashes: Dict[str, Set[str]]
+) -> str:
+    """
+    Compare a scraped incident to the versions already stored.
+
+    An incident stored without a content hash counts as changed, so it's
+    rewritten once, with its hash.
+    """
+    if ucpd_id not in stored_hashes:
+        return STORED_NEW
+    elif content_hash in stored_hashes[ucpd_id]:
+        return STORED_UNCHANGED
+    else:
+        return STORED_CHANGED
+
+
+def predict_information_incidents(information_incidents: [dict]) -> int:
+    """
+    Predict the types of a chunk's 'Information' incidents in one batch.
+
+    The Classifier is imported here, so sklearn and xgboost are only loaded by
+    runs that have incidents to classify. Returns the number predicted. If
+    no model has been built, the incidents are saved without a prediction.
+    """
+    from incident_scraper.models.classifier import Classifier
+
+    predicted = 0
+    try:
+        pred_types = Classifier().predict_batch(
+            [i[INCIDENT_KEY_COMMENTS] for i in information_incidents]
+        )
+    except FileNotFoundError as e:
+        logging.warning(
+            f"{e} {len(information_incidents)} 'Information' incidents were "
+            "not classified."
+        )
+        return predicted
+
+    for i, pred_type in zip(information_incidents, pred_types, strict=True):
+        if pred_type is not None:
+            predicted += 1
+            i[INCIDENT_PREDICTED_TYPE] = pred_type
+
+    return predicted
+
+
+def geocode_incidents(
+    parsed_incidents: [Tuple[str, dict]], geocoder: Geocoder
+) -> Tuple[list, list]:
+    """
+    Geocode (address, incident) pairs and split them by outcome.
+
+    Returns the incidents with a valid location and those without one.
+    """
+    incident_objs = []
+    geocode_error_incidents = []
+
+    # Each unique address in the chunk is only geocoded once
+    results = geocoder.resolve_addresses(a for a, _ in parsed_incidents)
+
+    for address, i in parsed_incidents:
+        if (
+            Geocoder.assign_address(i, results[address])
+            and INCIDENT_KEY_ADDRESS in i
+            and -90.0 <= i[INCIDENT_KEY_LATITUDE] <= 90.0
+            and -90.0 <= i[INCIDENT_KEY_LONGITUDE] <= 90.0
+        ):
+            incident_objs.append(i)
+        else:
+            geocode_error_incidents.append(i)
+            logging.debug(
+                "This incident failed to get a valid location with the "
+                f"Geocoder: {i}"
+            )
+
+    return incident_objs, geocode_error_incidents
+
+
+def update_records(workers: int = 0, chunk_size: int = CHUNK_SIZE) -> None:
+    """Update incident records based on last scraped incident."""
+    nbd_client = GoogleNBD()
+    scraper = UCPDScraper()
+    day_diff = (datetime.now().date() - nbd_client.get_latest_date()).days
+    if day_diff > 0:
+        parse_and_save_records(
+            scraper.iter_last_days(day_diff - 1),
+            nbd_client,
+            scraper.last_days_start(day_diff - 1),
+            workers,
+            chunk_size,
+        )
+    else:
+        logging.info("Saved incidents are up-to-date.")
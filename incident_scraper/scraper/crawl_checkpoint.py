@@ -0,0 +1,184 @@
+"""Contains the on-disk checkpoint of a long UCPD crawl."""
+
+import json
+import sqlite3
+import threading
+from datetime import date
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class CrawlState(NamedTuple):
+    start_date: date
+    end_date: date
+    next_offset: int
+    # Unknown until the first page is stored
+    total_pages: Optional[int]
+    completed: bool
+
+
+class CrawlCheckpoint:
+    """
+    A SQLite-backed record of a crawl's progress that outlives the process.
+
+    It keeps the crawl's date range, the offset of the next page to fetch,
+    the number of pages, every scraped row and whether each row has been
+    handled, i.e. saved to the Datastore or skipped by the pipeline. A page's
+    rows and the next offset are committed together, so a crawl that dies
+    can resume after its last complete page. Every thread gets its own
+    connection, so rows can be marked as handled by the bulk writer's
+    threads while the crawl goes on.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()
+
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS crawl (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    start_date TEXT NOT NULL,
+                    end_date TEXT NOT NULL,
+                    next_offset INTEGER NOT NULL,
+                    total_pages INTEGER,
+                    completed INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS incidents (
+                    ucpd_id TEXT PRIMARY KEY,
+                    incident TEXT NOT NULL,
+                    handled INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def start(self, start_date: date, end_date: date) -> CrawlState:
+        """Forget any earlier crawl, and begin one over a date range."""
+        state = CrawlState(start_date, end_date, 0, None, False)
+        with self._connection() as conn:
+            conn.execute("DELETE FROM crawl")
+            conn.execute("DELETE FROM incidents")
+            conn.execute(
+                "INSERT INTO crawl VALUES (0, ?, ?, ?, ?, ?)",
+                (
+                    start_date.isoformat(),
+                    end_date.isoformat(),
+                    state.next_offset,
+                    state.total_pages,
+                    state.completed,
+                ),
+            )
+        return state
+
+    def state(self) -> Optional[CrawlState]:
+        """Get the progress of the checkpointed crawl, if there is one."""
+        row = (
+            self._connection()
+            .execute(
+                "SELECT start_date, end_date, next_offset, total_pages, "
+                "completed FROM crawl"
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+
+        return CrawlState(
+            date.fromisoformat(row[0]),
+            date.fromisoformat(row[1]),
+            row[2],
+            row[3],
+            bool(row[4]),
+        )
+
+    def save_page(
+        self, incidents: dict, next_offset: int, total_pages: int
+    ) -> List[str]:
+        """
+        Store a page's rows, and move the crawl on to the next page.
+
+        Returns the UCPD IDs that weren't already stored. A row that was
+        stored before, e.g. after new reports shifted it onto the next page,
+        keeps its handled flag.
+        """
+        with self._connection() as conn:
+            stored_ids = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT ucpd_id FROM incidents WHERE ucpd_id IN "
+                    f"({', '.join('?' * len(incidents))})",
+                    list(incidents),
+                )
+            }
+            conn.executemany(
+                "INSERT INTO incidents (ucpd_id, incident) VALUES (?, ?) "
+                "ON CONFLICT (ucpd_id) DO UPDATE SET incident = excluded.incident",
+                ((k, json.dumps(i)) for k, i in incidents.items()),
+            )
+            conn.execute(
+                "UPDATE crawl SET next_offset = ?, total_pages = ?",
+                (next_offset, total_pages),
+            )
+
+        return [k for k in incidents if k not in stored_ids]
+
+    def complete(self) -> None:
+        """Record that every page of the crawl has been stored."""
+        with self._connection() as conn:
+            conn.execute("UPDATE crawl SET completed = 1")
+
+    def mark_handled(self, ucpd_ids: Iterable[str]) -> None:
+        """Record that incidents have been saved or skipped."""
+        with self._connection() as conn:
+            conn.executemany(
+                "UPDATE incidents SET handled = 1 WHERE ucpd_id = ?",
+                ((ucpd_id,) for ucpd_id in ucpd_ids),
+            )
+
+    def iter_unhandled(self) -> Iterator[Tuple[str, dict]]:
+        """
+        Yield the stored (UCPD ID, incident) pairs that haven't been handled.
+
+        Only the rows stored before the call are yielded, a batch at a time,
+        so pages stored while iterating are left to the crawl.
+        """
+        conn = self._connection()
+        (last_row,) = conn.execute(
+            "SELECT COALESCE(MAX(rowid), 0) FROM incidents"
+        ).fetchone()
+        row_id = 0
+        while rows := conn.execute(
+            "SELECT rowid, ucpd_id, incident FROM incidents "
+            "WHERE rowid > ? AND rowid <= ? AND NOT handled "
+            "ORDER BY rowid LIMIT ?",
+            (row_id, last_row, self.BATCH_SIZE),
+        ).fetchall():
+            for _, ucpd_id, incident in rows:
+                yield ucpd_id, json.loads(incident)
+            row_id = rows[-1][0]
+
+    def stats(self) -> dict:
+        """Report how many rows are stored, and how many have been handled."""
+        rows, handled = (
+            self._connection()
+            .execute(
+                "SELECT COUNT(*), COALESCE(SUM(handled), 0) FROM incidents"
+            )
+            .fetchone()
+        )
+        return {"rows": rows, "handled": handled}
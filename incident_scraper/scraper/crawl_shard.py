@@ -0,0 +1,59 @@
+"""Contains the date-range shards that split a crawl across processes."""
+
+from datetime import date, timedelta
+from typing import List, NamedTuple, Tuple
+
+Window = Tuple[date, date]
+
+
+def monthly_windows(start_date: date, end_date: date) -> List[Window]:
+    """Split a date range into calendar months, with inclusive end dates."""
+    windows = []
+    window_start = start_date
+    while window_start <= end_date:
+        next_month = (window_start.replace(day=1) + timedelta(days=32)).replace(
+            day=1
+        )
+        windows.append(
+            (window_start, min(next_month - timedelta(days=1), end_date))
+        )
+        window_start = next_month
+
+    return windows
+
+
+class CrawlShard(NamedTuple):
+    """
+    The i-th of N shards of a crawl, numbered from 1.
+
+    Windows are dealt out round-robin, so every shard gets a similar mix of
+    quiet and busy years, and the shards together cover every window once.
+    """
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "CrawlShard":
+        """Parse a shard spec like "2/4"."""
+        index, _, count = spec.partition("/")
+        try:
+            shard = cls(int(index), int(count))
+        except ValueError:
+            raise ValueError(
+                f"A shard must be given as i/N, not {spec!r}."
+            ) from None
+        if not 1 <= shard.index <= shard.count:
+            raise ValueError(
+                f"A shard's index must be between 1 and {shard.count}, not "
+                f"{shard.index}."
+            )
+
+        return shard
+
+    def select(self, windows: List[Window]) -> List[Window]:
+        """Get this shard's share of the windows, in order."""
+        return windows[self.index - 1 :: self.count]
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
@@ -0,0 +1,81 @@
+"""Contains the extractor that parses UCPD incident report pages."""
+
+import logging
+from typing import Dict, Iterator, List, Tuple
+
+from lxml import etree
+from lxml.cssselect import CSSSelector
+
+# Compiled once, rather than translated from CSS to XPath on every call
+SELECT_HEADERS = CSSSelector("thead th")
+SELECT_TABLE_BODY = CSSSelector("tbody")
+SELECT_PAGE_LINK = CSSSelector("span.page-link")
+SELECT_ROWS = CSSSelector("tr")
+
+
+class IncidentTableExtractor:
+    """
+    Extract the incidents and page count from a UCPD incident report page.
+
+    The page is parsed into plain lxml elements, which are cheaper to visit
+    than lxml.html's, and each row's cells are visited once. The column names
+    are read once per page, and rows are only serialized for their log
+    messages when debug logging is enabled.
+    """
+
+    INCIDENT_INDEX = 6
+    INVALID_IDS = ("None", ":")
+    VOID_VALUE = "Void"
+
+    def extract(self, content: bytes) -> Tuple[Dict[str, dict], int]:
+        """Get the incidents, keyed by UCPD ID, and the total page count."""
+        # Parsers can't be shared across the scraper's threads, but they're
+        # cheap to create
+        document = etree.fromstring(content, etree.HTMLParser())
+        # The last column is the UCPD ID, which keys the incident instead
+        columns = [str(h.text).strip() for h in SELECT_HEADERS(document)][:-1]
+        rows = SELECT_ROWS(SELECT_TABLE_BODY(document)[0])
+
+        incident_dict = {}
+        for row, incident_id, values in self._iter_rows(rows, len(columns)):
+            if self.VOID_VALUE in values:
+                # Voided incidents are still kept, without any information
+                incident_dict[incident_id] = {}
+                self._log_row("This incident contains voided information", row)
+            else:
+                incident_dict[incident_id] = dict(
+                    zip(columns, values, strict=True)
+                )
+
+        # Track page count, as offset will take you back to zero
+        page_link = SELECT_PAGE_LINK(document)[0]
+        page_numbers = [num.strip() for num in page_link.text.split(" / ")]
+        return incident_dict, int(page_numbers[1])
+
+    def _iter_rows(
+        self, rows: List, num_columns: int
+    ) -> Iterator[Tuple[etree._Element, str, Tuple[str, ...]]]:
+        for row in rows:
+            cells = [cell.text for cell in row]
+            if len(cells) == 1:
+                self._log_row("This incident has a length of 1", row)
+                continue
+
+            incident_id = cells[self.INCIDENT_INDEX]
+            if (
+                incident_id in self.INVALID_IDS
+                or "No Incident Reports" in row.text
+            ):
+                self._log_row("This incident has an ID of 'None'", row)
+                continue
+
+            yield (
+                row,
+                incident_id,
+                tuple(str(text).strip() for text in cells[:num_columns]),
+            )
+
+    @staticmethod
+    def _log_row(message: str, row) -> None:
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"{message}: {etree.tostring(row)}")
@@ -1,17 +1,33 @@
 """Contains code related to scraping UCPD incident reports."""
 
 import logging
-import time
-from datetime import datetime, timedelta
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
 
 import requests
-from lxml import etree, html
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from incident_scraper.scraper.crawl_checkpoint import CrawlCheckpoint
+from incident_scraper.scraper.crawl_shard import CrawlShard, monthly_windows
 from incident_scraper.scraper.headers import Headers
+from incident_scraper.scraper.table_extractor import IncidentTableExtractor
 from incident_scraper.utils.constants import (
     TIMEZONE_CHICAGO,
     UCPD_MDY_DATE_FORMAT,
 )
+from incident_scraper.utils.metrics import METRICS
+from incident_scraper.utils.rate_limiter import RateLimiter
+
+
+class ScrapedPage(NamedTuple):
+    offset: int
+    incidents: Dict[str, dict]
+    total_pages: int
 
 
 class UCPDScraper:
@@ -22,9 +38,20 @@ class UCPDScraper:
     BASE_UCPD_URL = (
         "https://incidentreports.uchicago.edu/incidentReportArchive.php"
     )
+    CONNECT_TIMEOUT = 5
+    FIRST_INCIDENT_DATE = date(2011, 1, 1)
+    NUM_RETRIES = 5
+    PAGE_SIZE = 5
+    READ_TIMEOUT = 30
+    RETRY_BACKOFF = 0.5
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
 
-    def __init__(self, request_delay=0.15):
-        self._request_delay = request_delay
+    def __init__(self, request_delay=0.15, max_workers=4):
+        # The request delay is enforced globally, across all workers.
+        self._rate_limiter = RateLimiter(request_delay)
+        self._max_workers = max_workers
+        self._retry_count = 0
+        self._retry_lock = threading.Lock()
         self._headers = {
             "Accept": (
                 "text/html,application/xhtml+xml,application/xml;q=0.9,"
@@ -39,120 +66,268 @@ class UCPDScraper:
             "Upgrade-Insecure-Requests": "1",
         }
         self._user_agent_rotator = Headers()
+        self._session = self._create_session()
+        self._table_extractor = IncidentTableExtractor()
 
-    def scrape_from_beginning_2011(self):
-        """Scrape and parse all tables from January 1, 2011, to today."""
-        new_url = self._construct_url(year_beginning=True)
-        return self._get_incidents(new_url)
+    def _create_session(self) -> requests.Session:
+        """
+        Create a pooled, keep-alive session for the UCPD site.
 
-    def scrape_last_days(self, num_days: int = 3):
-        """Scrape and parse all tables from num_days ago to today."""
-        new_url = self._construct_url(num_days=num_days)
-        return self._get_incidents(new_url)
+        Each worker can hold its own connection open, and failed or throttled
+        page requests are retried with an exponential backoff.
+        """
+        retry = Retry(
+            total=self.NUM_RETRIES,
+            backoff_factor=self.RETRY_BACKOFF,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self._max_workers,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self._headers)
+        return session
+
+    def connection_stats(self) -> dict:
+        """Report how many connections were opened, reused and retried."""
+        num_connections = 0
+        num_requests = 0
+        # The same adapter is mounted for both schemes, so count it once.
+        for adapter in set(self._session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                num_connections += pool.num_connections
+                num_requests += pool.num_requests
+
+        return {
+            "connections": num_connections,
+            "requests": num_requests,
+            "reused": num_requests - num_connections,
+            "retries": self._retry_count,
+        }
 
-    def _construct_url(
-        self, num_days: int = 0, year_beginning: bool = False
-    ) -> str:
+    def iter_incidents(
+        self, start_date: date, end_date: Optional[date] = None
+    ) -> Iterator[Tuple[str, dict]]:
         """
-        Construct the scraping URL.
+        Yield (UCPD ID, incident) pairs between two dates, page by page.
 
-        Constructs the URL to scrape from by getting the epochs of the present
-        day and the first day of the current year.
+        Pages are handed over as soon as they are scraped, so callers can
+        start processing before the crawl is finished. New reports can shift
+        rows across pages mid-crawl, so an incident listed on more than one
+        page is only yielded the first time.
         """
-        today = datetime.now(TIMEZONE_CHICAGO).date()
-        today_str = today.strftime(UCPD_MDY_DATE_FORMAT)
+        end_date = end_date or datetime.now(TIMEZONE_CHICAGO).date()
+        new_url = self._construct_url(start_date, end_date)
+        seen_ids = set()
+        for page in self._iter_pages(new_url):
+            for incident_id, incident in page.incidents.items():
+                if incident_id not in seen_ids:
+                    seen_ids.add(incident_id)
+                    yield incident_id, incident
 
-        previous_datetime = (
-            datetime(2011, 1, 1).date()
-            if year_beginning
-            else today - timedelta(days=num_days)
-        )
-        previous_date_str = previous_datetime.strftime(UCPD_MDY_DATE_FORMAT)
+    def iter_from_beginning_2011(self) -> Iterator[Tuple[str, dict]]:
+        """Yield all incidents from January 1, 2011, to today."""
+        return self.iter_incidents(self.FIRST_INCIDENT_DATE)
 
-        return (
-            f"{self.BASE_UCPD_URL}?startDate={previous_date_str}&endDate="
-            f"{today_str}&offset="
-        )
+    def iter_checkpointed(
+        self, checkpoint: CrawlCheckpoint, resume: bool = False
+    ) -> Iterator[Tuple[str, dict]]:
+        """
+        Yield all incidents from January 1, 2011, to today, page by page,
+        storing each page in a checkpoint as it's handed over.
 
-    def _get_table(self, url: str):
+        When resuming, the rows an earlier crawl stored but didn't handle
+        are yielded first, and then the crawl carries on from the page after
+        the last one it stored, over the same date range. Rows that are
+        already stored, e.g. shifted onto the next page, aren't yielded again.
         """
-        Get the table information from that UCPD incident page.
+        state = checkpoint.state() if resume else None
+        if state is None:
+            if resume:
+                logging.warning("No crawl checkpoint was found, starting over.")
+            state = checkpoint.start(
+                self.FIRST_INCIDENT_DATE, datetime.now(TIMEZONE_CHICAGO).date()
+            )
+        else:
+            stats = checkpoint.stats()
+            logging.info(
+                f"Resuming the crawl from offset {state.next_offset}, with "
+                f"{stats['handled']} of {stats['rows']} stored rows handled."
+            )
+            yield from checkpoint.iter_unhandled()
+
+        if state.completed:
+            return
+
+        if (
+            state.total_pages is None
+            or state.next_offset < state.total_pages * self.PAGE_SIZE
+        ):
+            new_url = self._construct_url(state.start_date, state.end_date)
+            for page in self._iter_pages(new_url, state.next_offset):
+                new_ids = checkpoint.save_page(
+                    page.incidents,
+                    page.offset + self.PAGE_SIZE,
+                    page.total_pages,
+                )
+                for incident_id in new_ids:
+                    yield incident_id, page.incidents[incident_id]
+        checkpoint.complete()
+
+    def iter_shard(
+        self,
+        shard: CrawlShard,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> Iterator[Tuple[str, dict]]:
+        """
+        Yield a shard's incidents between two dates, once per UCPD ID.
 
-        Scrapes the table from the given url and returns a dictionary and a
-        boolean stating if it scraped the last page.
+        The dates, from January 1, 2011, to today by default, are split into
+        monthly windows, and only the shard's windows are scraped. An
+        incident listed in more than one of them is only yielded the first
+        time.
         """
-        FIRST_INDEX = 0
-        INCIDENT_INDEX = 6
-        incident_dict = {}
-
-        time.sleep(self._request_delay)
-        # Change user_agent randomly
-        self._headers["User-Agent"] = (
-            self._user_agent_rotator.get_random_header()
+        start_date = start_date or self.FIRST_INCIDENT_DATE
+        end_date = end_date or datetime.now(TIMEZONE_CHICAGO).date()
+        windows = shard.select(monthly_windows(start_date, end_date))
+        logging.info(
+            f"Scraping {len(windows)} monthly windows as shard {shard}."
         )
-        r = requests.get(url, headers=self._headers)
-        response = html.fromstring(r.content)
-        container = response.cssselect("thead")
-        categories = container[FIRST_INDEX].cssselect("th")
-        incidents = response.cssselect("tbody")
-        incident_rows = incidents[FIRST_INDEX].cssselect("tr")
-        for incident in incident_rows:
-            if len(incident) == 1:
-                logging.debug(
-                    "This incident has a length of 1: "
-                    f"{etree.tostring(incident)}"
-                )
-                continue
 
-            incident_id = incident[INCIDENT_INDEX].text
-            if (
-                incident_id in ["None", ":"]
-                or "No Incident Reports" in incident.text
+        seen_ids = set()
+        for window_start, window_end in windows:
+            for incident_id, incident in self.iter_incidents(
+                window_start, window_end
             ):
-                logging.debug(
-                    "This incident has an ID of 'None': "
-                    f"{etree.tostring(incident)}"
-                )
-                continue
+                if incident_id not in seen_ids:
+                    seen_ids.add(incident_id)
+                    yield incident_id, incident
 
-            incident_dict[incident_id] = {}
-            i_dict = {}
-            for index in range(len(categories) - 1):
-                i_dict[str(categories[index].text).strip()] = str(
-                    incident[index].text
-                ).strip()
+    def iter_last_days(self, num_days: int = 3) -> Iterator[Tuple[str, dict]]:
+        """Yield all incidents from num_days ago to today."""
+        start_date = self.last_days_start(num_days)
+        return self.iter_incidents(
+            start_date, start_date + timedelta(days=num_days)
+        )
 
-            if [v for v in i_dict.values() if v == "Void"]:
-                logging.debug(
-                    "This incident contains voided "
-                    f"information: {etree.tostring(incident)}"
-                )
-                continue
+    @staticmethod
+    def last_days_start(num_days: int) -> date:
+        """Get the first date that iter_last_days(num_days) covers."""
+        return datetime.now(TIMEZONE_CHICAGO).date() - timedelta(days=num_days)
+
+    def scrape_from_beginning_2011(self) -> dict:
+        """Scrape and parse all tables from January 1, 2011, to today."""
+        return dict(self.iter_from_beginning_2011())
+
+    def scrape_last_days(self, num_days: int = 3) -> dict:
+        """Scrape and parse all tables from num_days ago to today."""
+        return dict(self.iter_last_days(num_days))
 
-            incident_dict[incident_id] = i_dict
+    def _construct_url(self, start_date: date, end_date: date) -> str:
+        """Construct the scraping URL for the given date range."""
+        start_date_str = start_date.strftime(UCPD_MDY_DATE_FORMAT)
+        end_date_str = end_date.strftime(UCPD_MDY_DATE_FORMAT)
 
-        # Track page number, as offset will take you back to zero
-        pages = response.cssselect("span.page-link")
-        page_numbers = [
-            num.strip() for num in pages[FIRST_INDEX].text.split(" / ")
-        ]
-        return incident_dict, page_numbers[0] == page_numbers[1]
+        return (
+            f"{self.BASE_UCPD_URL}?startDate={start_date_str}&endDate="
+            f"{end_date_str}&offset="
+        )
 
-    def _get_incidents(self, new_url: str) -> dict:
-        """Get all incidents for a given URL."""
-        at_last_page = False
-        incidents = {}
-        offset = 0
+    def _get_table(self, url: str):
+        """
+        Get the table information from that UCPD incident page.
 
-        # Loop until function arrives at last page
+        Scrapes the table from the given url and returns a dictionary and the
+        total number of pages for the queried date range.
+        """
+        self._rate_limiter.wait()
+        # Change user_agent randomly, on top of the session's headers
+        with METRICS.time("ucpd_page_fetch"):
+            r = self._session.get(
+                url,
+                headers={
+                    "User-Agent": self._user_agent_rotator.get_random_header()
+                },
+                timeout=(self.CONNECT_TIMEOUT, self.READ_TIMEOUT),
+            )
+        METRICS.increment("ucpd_pages_fetched")
+        if r.raw.retries is not None and r.raw.retries.history:
+            METRICS.increment("ucpd_fetch_retries", len(r.raw.retries.history))
+            with self._retry_lock:
+                self._retry_count += len(r.raw.retries.history)
+        r.raise_for_status()
+        return self._table_extractor.extract(r.content)
+
+    def _iter_pages(
+        self, new_url: str, first_offset: int = 0
+    ) -> Iterator[ScrapedPage]:
+        """
+        Yield every page for a given URL, in offset order, starting at
+        first_offset.
+
+        The first page tells us how many pages there are, after which the
+        remaining offsets are fetched by a bounded pool of workers. Only a
+        small window of pages is fetched ahead of the consumer, so memory
+        stays flat regardless of how many pages the date range spans.
+        """
         logging.info("Beginning the UCPD Incident scraping process.")
-        while not at_last_page:
-            rev_dict, at_last_page = self._get_table(new_url + str(offset))
-            incidents.update(rev_dict)
-            logging.debug(
-                f"Scraped {len(incidents)} incidents from the UCPD "
-                "Incident page."
+        first_page, total_pages = self._get_table(new_url + str(first_offset))
+        if first_offset and first_offset >= total_pages * self.PAGE_SIZE:
+            # The site wraps an offset past the last page back to the first
+            logging.info(
+                f"Offset {first_offset} is past the last of {total_pages} "
+                "pages, there are no more incidents to scrape."
             )
-            offset += 5
+            return
+        yield ScrapedPage(first_offset, first_page, total_pages)
+
+        offsets = iter(
+            range(
+                first_offset + self.PAGE_SIZE,
+                total_pages * self.PAGE_SIZE,
+                self.PAGE_SIZE,
+            )
+        )
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            pending = deque(
+                (
+                    offset,
+                    executor.submit(self._get_table, new_url + str(offset)),
+                )
+                for offset in islice(offsets, self._max_workers * 2)
+            )
+            while pending:
+                offset, future = pending.popleft()
+                page, _ = future.result()
+                next_offset = next(offsets, None)
+                if next_offset is not None:
+                    pending.append(
+                        (
+                            next_offset,
+                            executor.submit(
+                                self._get_table, new_url + str(next_offset)
+                            ),
+                        )
+                    )
+                logging.debug(
+                    f"Scraped {len(page)} incidents from the UCPD Incident "
+                    "page."
+                )
+                yield ScrapedPage(offset, page, total_pages)
+
+        stats = self.connection_stats()
+        logging.info(
+            f"Made {stats['requests']} requests to the UCPD Incident page "
+            f"over {stats['connections']} connections ({stats['reused']} "
+            f"reused, {stats['retries']} retried)."
+        )
         logging.info("Finished with the UCPD Incident scraping process.")
-        return incidents
@@ -5,34 +5,40 @@ import os
 import pytz
 
 # Date/Time Constants
-UCPD_DATE_FORMATS = [
-    "%m/%d/%y %I:%M %p",
-    "%-m/%-d/%y %-I:%M %p",
-    "%-m/%-d/%y %-I:%M%p",
-    "%m/%d/%y %-H:%M",
-    "%m/%d/%Y %-H:%M",
-    "%-m/%-d/%Y %-H:%M",
-]
 UCPD_MDY_DATE_FORMAT = "%m/%d/%Y"
 UCPD_MDY_KEY_DATE_FORMAT = "%Y-%m-%d"
 
 # Environment Constants
 ENV_GCP_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 ENV_GCP_PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
+ENV_GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH")
 ENV_GOOGLE_MAPS_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 
 # File Constants
 FILE_ENCODING_UTF_8 = "utf-8"
+FILE_NAME_GEOCODE_CACHE = "geocode_cache.sqlite3"
 FILE_NAME_INCIDENT_DUMP = "incident_dump.csv"
+FILE_NAME_INCIDENT_PARQUET = "incident_dump.parquet"
+FILE_NAME_SEED_CHECKPOINT = "seed_checkpoint.sqlite3"
 FILE_OPEN_READ = "r"
 FILE_OPEN_WRITE = "w"
 
 # File Type Constants
 FILE_TYPE_JSON = "json"
 
+# Incident Dump Constants
+PARQUET_COMPRESSION = "zstd"
+PARQUET_ROW_GROUP_SIZE = 10_000
+
+# Geocoder Constants
+GEOCODER_PROVIDER_CENSUS = "census"
+GEOCODER_PROVIDER_GOOGLE = "google"
+GEOCODER_PROVIDER_NONE = "none"
+
 # Incident Key Constants
 INCIDENT_KEY_ADDRESS = "ValidatedAddress"
 INCIDENT_KEY_COMMENTS = "Comments / Nature of Fire"
+INCIDENT_KEY_CONTENT_HASH = "ContentHash"
 INCIDENT_KEY_ID = "UCPD_ID"
 INCIDENT_KEY_LATITUDE = "ValidatedLatitude"
 INCIDENT_KEY_LOCATION = "Location"
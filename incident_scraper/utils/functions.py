@@ -1,52 +1,73 @@
+import hashlib
+import json
 import re
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, tzinfo
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator, Optional
 
 from incident_scraper.utils.constants import (
-    INCIDENT_KEY_REPORTED,
-    UCPD_DATE_FORMATS,
+    FILE_ENCODING_UTF_8,
+    TIMEZONE_CHICAGO,
 )
 
+# List of articles.
+ARTICLES = ["a", "an", "the"]
+
+# List of coordinating conjunctions.
+CONJUNCTIONS = ["and", "but", "for", "nor", "or", "so", "yet"]
+
+# List of some short articles.
+PREPOSITIONS = [
+    "about",
+    "after",
+    "against",
+    "among",
+    "around",
+    "as",
+    "at",
+    "before",
+    "between",
+    "by",
+    "during",
+    "for",
+    "from",
+    "in",
+    "into",
+    "like",
+    "of",
+    "on",
+    "out",
+    "over",
+    "through",
+    "to",
+    "under",
+    "via",
+    "with",
+    "without",
+]
+
+LOWER_CASE_WORDS = frozenset(ARTICLES + CONJUNCTIONS + PREPOSITIONS)
+
+# Every variant of the UCPD's report times, e.g. "10/1/24 1:00 PM",
+# "10//1/2024 at 13:00" or "1/!/24 1: 00PM", where "!" is a typo for "1".
+UCPD_TIMESTAMP_PATTERN = re.compile(
+    r"""
+    \s*
+    (?P<month>[0-9!]{1,2}) /{1,2} (?P<day>[0-9!]{1,2}) /{1,2}
+    (?P<year>[0-9!]{4}|[0-9!]{2})
+    \s+ (?:at\s+)?
+    (?P<hour>[0-9!]{1,2}) \s*[:;]\s* (?P<minute>[0-9!]{1,2})
+    (?:\s*[:;]?\s* (?P<meridiem>[AP]M))?
+    \s*
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+UCPD_TIMESTAMP_FIELDS = ("year", "month", "day", "hour", "minute")
+
 
 # Source: https://www.geeksforgeeks.org/convert-string-to-title-case-in-python/
 def custom_title_case(input_string: str) -> str:
-    # List of articles.
-    articles = ["a", "an", "the"]
-
-    # List of coordinating conjunctions.
-    conjunctions = ["and", "but", "for", "nor", "or", "so", "yet"]
-
-    # List of some short articles.
-    prepositions = [
-        "about",
-        "after",
-        "against",
-        "among",
-        "around",
-        "as",
-        "at",
-        "before",
-        "between",
-        "by",
-        "during",
-        "for",
-        "from",
-        "in",
-        "into",
-        "like",
-        "of",
-        "on",
-        "out",
-        "over",
-        "through",
-        "to",
-        "under",
-        "via",
-        "with",
-        "without",
-    ]
-
-    lower_case = articles + conjunctions + prepositions
     output_list = []
 
     # separating each word in the string
@@ -56,7 +77,7 @@ def custom_title_case(input_string: str) -> str:
     for word in input_list:
         # if the word exists in the list
         # then no need to capitalize it
-        if word in lower_case:
+        if word in LOWER_CASE_WORDS:
             output_list.append(word)
 
         # if the word does not exist in
@@ -67,38 +88,46 @@ def custom_title_case(input_string: str) -> str:
     return " ".join(output_list)
 
 
-def parse_scraped_incident_timestamp(i: dict) -> Optional[str]:
-    result = None
-
-    # Compensate for date input irregularities
-    i[INCIDENT_KEY_REPORTED] = re.sub(
-        r"\s{0}AM", " AM", i[INCIDENT_KEY_REPORTED]
-    )
-    i[INCIDENT_KEY_REPORTED] = re.sub(
-        r"\s{0}PM", " PM", i[INCIDENT_KEY_REPORTED]
-    )
-    i[INCIDENT_KEY_REPORTED] = re.sub(r"\s{2,}", " ", i[INCIDENT_KEY_REPORTED])
-    i[INCIDENT_KEY_REPORTED] = (
-        i[INCIDENT_KEY_REPORTED]
-        .replace("//", "/")
-        .replace("!", "1")
-        .replace(" at ", " ")
-        .replace(":PM", " PM")
-        .replace(":AM", " AM")
-        .replace(": PM", " PM")
-        .replace(": AM", " AM")
-        .replace(": ", ":")
-    )
+def parse_scraped_incident_timestamp(reported: str) -> Optional[datetime]:
+    """
+    Parse a scraped report time into a Chicago datetime, or None if it's
+    malformed.
 
-    for time_format in UCPD_DATE_FORMATS:
-        try:
-            result = datetime.strptime(i[INCIDENT_KEY_REPORTED], time_format)
-        except ValueError:
-            continue
-        # If a date is successfully parsed, break from the loop.
-        break
+    Two-digit years follow strptime's %y convention, and a time without a
+    meridiem is read as a 24-hour time.
+    """
+    match = UCPD_TIMESTAMP_PATTERN.fullmatch(reported)
+    if not match:
+        return None
 
-    return result
+    year, month, day, hour, minute = (
+        int(match[field].replace("!", "1")) for field in UCPD_TIMESTAMP_FIELDS
+    )
+    if len(match["year"]) == 2:
+        year += 1900 if year >= 69 else 2000
+    if match["meridiem"]:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if match["meridiem"].upper() == "PM" else 0)
+
+    try:
+        return datetime(
+            year,
+            month,
+            day,
+            hour,
+            minute,
+            tzinfo=_chicago_tzinfo(year, month, day, hour),
+        )
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _chicago_tzinfo(year: int, month: int, day: int, hour: int) -> tzinfo:
+    # Chicago's offset only changes on the hour, so the costly localization
+    # can be shared by every report time within the same hour
+    return TIMEZONE_CHICAGO.localize(datetime(year, month, day, hour)).tzinfo
 
 
 def determine_season(test_date: datetime) -> str:
@@ -111,3 +140,17 @@ def determine_season(test_date: datetime) -> str:
         return "Fall"
     else:
         return "Winter"
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """Split an iterable into lists of at most size elements, lazily."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def incident_content_hash(i: dict) -> str:
+    """Hash an incident's scraped fields, independent of their order."""
+    return hashlib.sha256(
+        json.dumps(i, sort_keys=True).encode(FILE_ENCODING_UTF_8)
+    ).hexdigest()
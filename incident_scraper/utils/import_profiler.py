@@ -0,0 +1,88 @@
+"""Contains the import timer used to profile the CLI's startup."""
+
+import sys
+import time
+from importlib.abc import MetaPathFinder
+from typing import Dict, List, Tuple
+
+
+class _TimedLoader:
+    """Wrap a module loader and time how long it takes to run the module."""
+
+    def __init__(self, loader, profiler: "ImportProfiler", name: str):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def exec_module(self, module) -> None:
+        self._profiler._start(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._stop(self._name)
+
+
+class ImportProfiler(MetaPathFinder):
+    """
+    Record the time spent importing each module while installed.
+
+    A module's self time excludes the modules it imports in turn, which are
+    recorded separately, so the self times add up to the total import time.
+    """
+
+    def __init__(self):
+        self._stack: List[Tuple[str, float, float]] = []
+        self.timings: Dict[str, Tuple[float, float]] = {}
+
+    def __enter__(self) -> "ImportProfiler":
+        sys.meta_path.insert(0, self)
+        return self
+
+    def __exit__(self, *args) -> None:
+        sys.meta_path.remove(self)
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self, name)
+                return spec
+
+        return None
+
+    def _start(self, name: str) -> None:
+        self._stack.append((name, time.perf_counter(), 0.0))
+
+    def _stop(self, name: str) -> None:
+        _, started, children = self._stack.pop()
+        cumulative = time.perf_counter() - started
+        self.timings[name] = (cumulative - children, cumulative)
+        if self._stack:
+            parent, parent_started, parent_children = self._stack.pop()
+            self._stack.append(
+                (parent, parent_started, parent_children + cumulative)
+            )
+
+    def report(self, limit: int = 25) -> str:
+        """Format the slowest imports by self time, with their totals."""
+        total = sum(self_time for self_time, _ in self.timings.values())
+        lines = [
+            f"{len(self.timings)} modules imported in {total * 1000:.1f}ms",
+            f"{'self (ms)':>10} {'cumulative (ms)':>16}  module",
+        ]
+        slowest = sorted(
+            self.timings.items(), key=lambda t: t[1][0], reverse=True
+        )
+        for name, (self_time, cumulative) in slowest[:limit]:
+            lines.append(
+                f"{self_time * 1000:>10.1f} {cumulative * 1000:>16.1f}  {name}"
+            )
+
+        return "\n".join(lines)
@@ -0,0 +1,187 @@
+"""Contains the counters and timers recorded over the course of a run."""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from incident_scraper.utils.constants import (
+    FILE_ENCODING_UTF_8,
+    FILE_OPEN_WRITE,
+)
+
+METRIC_PREFIX = "incident_scraper"
+PROMETHEUS_FILE_EXTENSION = ".prom"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Metrics:
+    """
+    Thread-safe counters and timers, each keyed by a name and its labels.
+
+    Timers keep the number of observations and their total and maximum
+    seconds, which is enough for a summary without keeping every sample.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._timers: Dict[Tuple[str, Labels], Tuple[int, float, float]] = {}
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = (name, self._labels(labels))
+        with self._lock:
+            count, total, maximum = self._timers.get(key, (0, 0.0, 0.0))
+            self._timers[key] = (
+                count + 1,
+                total + seconds,
+                max(maximum, seconds),
+            )
+
+    @contextmanager
+    def time(self, name: str, **labels) -> Iterator[None]:
+        """Time the wrapped block, whether or not it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def summary(self) -> dict:
+        """Get every counter and timer, sorted by name and labels."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            timers = sorted(self._timers.items())
+
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in counters
+            ],
+            "timers": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": count,
+                    "total_seconds": total,
+                    "mean_seconds": total / count,
+                    "max_seconds": maximum,
+                }
+                for (name, labels), (count, total, maximum) in timers
+            ],
+        }
+
+    def report(self) -> str:
+        """Format the summary as one line per counter and timer."""
+        summary = self.summary()
+        lines = []
+        for c in summary["counters"]:
+            lines.append(f"{self._display_name(c)}: {c['value']:g}")
+        for t in summary["timers"]:
+            lines.append(
+                f"{self._display_name(t)}: {t['count']} in "
+                f"{t['total_seconds']:.3f}s (mean "
+                f"{t['mean_seconds'] * 1000:.1f}ms, max "
+                f"{t['max_seconds'] * 1000:.1f}ms)"
+            )
+
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Format the metrics in the Prometheus text exposition format.
+
+        Counters are exported as <name>_total, and timers as summaries with
+        a _seconds_count and _seconds_sum, plus a _seconds_max gauge.
+        """
+        summary = self.summary()
+        lines = []
+        for name, counters in self._group(summary["counters"]):
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for c in counters:
+                lines.append(f"{metric}{self._format_labels(c)} {c['value']:g}")
+        for name, timers in self._group(summary["timers"]):
+            metric = f"{METRIC_PREFIX}_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for t in timers:
+                labels = self._format_labels(t)
+                lines.append(f"{metric}_count{labels} {t['count']}")
+                lines.append(f"{metric}_sum{labels} {t['total_seconds']:.6f}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            for t in timers:
+                lines.append(
+                    f"{metric}_max{self._format_labels(t)} "
+                    f"{t['max_seconds']:.6f}"
+                )
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Export the metrics to a file, as Prometheus text for a .prom file and
+        as JSON otherwise.
+
+        The file is written next to its destination and then moved into
+        place, so a textfile collector never reads a partial file.
+        """
+        if path.endswith(PROMETHEUS_FILE_EXTENSION):
+            content = self.to_prometheus()
+        else:
+            content = self.to_json()
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(
+            temp_path, FILE_OPEN_WRITE, encoding=FILE_ENCODING_UTF_8
+        ) as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _labels(labels: dict) -> Labels:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    @staticmethod
+    def _display_name(metric: dict) -> str:
+        if not metric["labels"]:
+            return metric["name"]
+
+        labels = ",".join(f"{k}={v}" for k, v in metric["labels"].items())
+        return f"{metric['name']}[{labels}]"
+
+    @staticmethod
+    def _format_labels(metric: dict) -> str:
+        if not metric["labels"]:
+            return ""
+
+        labels = ",".join(
+            f'{k}="{json.dumps(v)[1:-1]}"' for k, v in metric["labels"].items()
+        )
+        return f"{{{labels}}}"
+
+    @staticmethod
+    def _group(metrics: List[dict]) -> Iterator[Tuple[str, List[dict]]]:
+        groups: Dict[str, List[dict]] = {}
+        for m in metrics:
+            groups.setdefault(m["name"], []).append(m)
+        yield from groups.items()
+
+
+# The metrics of the current run, shared by every client
+METRICS = Metrics()
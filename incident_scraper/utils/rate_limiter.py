@@ -0,0 +1,29 @@
+"""Contains the thread-safe rate limiter shared by the network clients."""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Space out calls so that no two start within min_interval seconds.
+
+    The limiter is shared across threads, so a pool of workers is held to the
+    same global rate as a single serial loop.
+    """
+
+    def __init__(self, min_interval: float):
+        self._min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        """Block until the caller is allowed to make its next call."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._min_interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
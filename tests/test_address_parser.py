@@ -0,0 +1,40 @@
+"""Test functionality of the AddressParser."""
+
+import json
+import os
+
+from incident_scraper.models.address_parser import AddressParser
+from incident_scraper.utils.constants import (
+    FILE_ENCODING_UTF_8,
+    FILE_OPEN_READ,
+)
+
+GOLDEN_CORPUS = os.path.join(
+    os.path.dirname(__file__), "fixtures", "address_parser_golden.json"
+)
+
+
+def test_process_matches_golden_corpus():
+    """Test that every location is standardized as it was before."""
+    with open(GOLDEN_CORPUS, FILE_OPEN_READ, encoding=FILE_ENCODING_UTF_8) as f:
+        corpus = json.load(f)
+    addr_parser = AddressParser()
+
+    mismatches = {
+        raw: (addr_parser.process(raw), expected)
+        for raw, expected in corpus.items()
+        if addr_parser.process(raw) != expected
+    }
+
+    assert not mismatches
+
+
+def test_process_is_memoized():
+    """Test that the singleton keeps one memo across instantiations."""
+    AddressParser().process("5500 S. University Ave.")
+    hits = AddressParser().cache_info().hits
+
+    assert AddressParser().process("5500 S. University Ave.") == (
+        "5500 S. University Ave."
+    )
+    assert AddressParser().cache_info().hits == hits + 1
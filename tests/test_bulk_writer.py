@@ -0,0 +1,109 @@
+"""Test functionality of the BulkWriter."""
+
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import pytest
+from google.api_core import exceptions
+
+from incident_scraper.external import bulk_writer as bulk_writer_module
+from incident_scraper.external.bulk_writer import BulkWriter
+
+
+class FakeClient:
+    def __init__(self):
+        self.local = threading.local()
+
+    @contextmanager
+    def context(self):
+        self.local.active = True
+        yield
+        self.local.active = False
+
+
+class FakeDatastore:
+    def __init__(self, client: FakeClient, failures: int = 0):
+        self._client = client
+        self._failures = failures
+        self._lock = threading.Lock()
+        self.batches = []
+
+    def put_multi_async(self, entities):
+        assert self._client.local.active
+        with self._lock:
+            if self._failures:
+                self._failures -= 1
+                raise exceptions.ServiceUnavailable("Try again.")
+            self.batches.append(list(entities))
+
+        futures = []
+        for e in entities:
+            future = Future()
+            future.set_result(e)
+            futures.append(future)
+        return futures
+
+
+@pytest.fixture
+def datastore(monkeypatch):
+    def create(failures=0):
+        client = FakeClient()
+        fake = FakeDatastore(client, failures)
+        monkeypatch.setattr(
+            bulk_writer_module, "put_multi_async", fake.put_multi_async
+        )
+        monkeypatch.setattr(BulkWriter, "RETRY_BACKOFF", 0)
+        return client, fake
+
+    return create
+
+
+def test_writes_in_converted_chunks(datastore):
+    """Test that entities are converted and saved in batch-sized chunks."""
+    client, fake = datastore()
+
+    with BulkWriter(client, str, batch_size=4) as writer:
+        writer.write(range(6))
+        writer.write(range(6, 10))
+
+    assert sorted(map(len, fake.batches)) == [2, 4, 4]
+    assert sorted(e for b in fake.batches for e in b) == sorted(
+        map(str, range(10))
+    )
+    assert writer.stats()["entities"] == 10
+    assert writer.stats()["chunks"] == 3
+
+
+def test_retries_transient_errors(datastore):
+    """Test that a chunk is retried after a transient error."""
+    client, fake = datastore(failures=2)
+
+    with BulkWriter(client, batch_size=4) as writer:
+        writer.write(range(4))
+
+    assert fake.batches == [[0, 1, 2, 3]]
+    assert writer.stats()["retries"] == 2
+
+
+def test_flush_raises_after_retries(datastore):
+    """Test that a chunk that outlasts its retries fails the flush."""
+    client, _ = datastore(failures=BulkWriter.NUM_RETRIES + 1)
+
+    writer = BulkWriter(client, batch_size=4)
+    writer.write(range(4))
+    with pytest.raises(exceptions.ServiceUnavailable):
+        writer.flush()
+
+
+def test_reports_written_chunks(datastore):
+    """Test that every saved chunk is handed back before conversion."""
+    client, _ = datastore()
+    written = []
+
+    with BulkWriter(
+        client, str, batch_size=4, on_written=written.append
+    ) as writer:
+        writer.write(range(6))
+
+    assert sorted(map(tuple, written)) == [(0, 1, 2, 3), (4, 5)]
@@ -0,0 +1,82 @@
+"""Test the CensusBatchClient against a local stub of the batch endpoint."""
+
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from incident_scraper.external.census_batch import CensusBatchClient
+from incident_scraper.utils.constants import (
+    INCIDENT_KEY_ADDRESS,
+    INCIDENT_KEY_LATITUDE,
+    INCIDENT_KEY_LONGITUDE,
+)
+
+MATCHES = {
+    "5801 S. Ellis Ave.": (
+        "5801 S ELLIS AVE, CHICAGO, IL, 60637",
+        "-87.60,41.78",
+    ),
+    "1 E. 55th St.": ("1 E 55TH ST, CHICAGO, IL, 60615", "-87.62,41.79"),
+}
+
+
+class StubCensusHandler(BaseHTTPRequestHandler):
+    """Answer batch submissions the way the Census Geocoder does."""
+
+    requests_seen = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        self.requests_seen.append(self.path)
+
+        rows = []
+        for index, street in re.findall(
+            r"^(\d+),(.+?),Chicago,IL,", body, re.MULTILINE
+        ):
+            if street in MATCHES:
+                matched, coordinates = MATCHES[street]
+                rows.append(
+                    f'"{index}","{street}, Chicago, IL, ","Match","Exact",'
+                    f'"{matched}","{coordinates}","1","L"'
+                )
+            else:
+                rows.append(f'"{index}","{street}, Chicago, IL, ","No_Match"')
+
+        response = "\n".join(rows).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def census_server():
+    server = HTTPServer(("127.0.0.1", 0), StubCensusHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_census_batch_geocode(census_server):
+    """Test that one submission resolves matches and reports misses."""
+    StubCensusHandler.requests_seen.clear()
+    client = CensusBatchClient(base_url=census_server)
+
+    results = client.geocode(
+        ["5801 S. Ellis Ave.", "1 E. 55th St.", "Out of Area"]
+    )
+
+    assert StubCensusHandler.requests_seen == ["/locations/addressbatch"]
+    assert results["5801 S. Ellis Ave."] == {
+        INCIDENT_KEY_ADDRESS: "5801 S ELLIS AVE, CHICAGO, IL, 60637",
+        INCIDENT_KEY_LATITUDE: 41.78,
+        INCIDENT_KEY_LONGITUDE: -87.60,
+    }
+    assert results["1 E. 55th St."][INCIDENT_KEY_LATITUDE] == 41.79
+    assert results["Out of Area"] is None
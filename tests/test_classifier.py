@@ -0,0 +1,154 @@
+"""Test functionality of the Classifier."""
+
+import numpy as np
+import polars as pl
+import pytest
+from neattext import remove_non_ascii, remove_puncts, remove_stopwords
+
+from incident_scraper.models import classifier as classifier_module
+from incident_scraper.models.classifier import (
+    MINIMUM_TYPE_FREQUENCY,
+    MODEL_FILE_IDF,
+    Classifier,
+    load_model_artifacts,
+    load_training_data,
+    normalize_comments,
+)
+from incident_scraper.utils.constants import (
+    FILE_NAME_INCIDENT_DUMP,
+    FILE_NAME_INCIDENT_PARQUET,
+    INCIDENT_TYPE_INFO,
+)
+
+COMMENTS = [
+    "Unknown person took an unattended laptop from the 2nd floor lounge.",
+    "Victim  reports\tbeing STRUCK by a known offender;\nno injuries.",
+    "Officers were advised of a suspicious man at the café — 'she' left!",
+    "Items: wallet, keys & phone... taken? Arrest_made `later`",
+    "Naïve résumé ﬁled at ½ past 3 — see Ⅸ.",
+    "The and a of to in",
+    "   ",
+    "",
+    "Separators\x1cand\x1funit nbsp emspace",
+    "UCPD/CPD responded to 55th-Street & S. Ellis Ave. (Hyde Park)",
+]
+
+
+def test_normalize_comments_matches_neattext():
+    """Test that the polars normalizer gives the same output as neattext."""
+    expected = [
+        remove_puncts(remove_non_ascii(remove_stopwords(c))) for c in COMMENTS
+    ]
+
+    normalized = normalize_comments(
+        pl.Series("comments", COMMENTS + [None], dtype=pl.String)
+    ).to_list()
+
+    assert normalized == expected + [None]
+
+
+def test_label_matrix(tmp_path, monkeypatch):
+    """Test that the multi-hot labels only keep the frequent types."""
+    incidents = (
+        ["Theft"] * MINIMUM_TYPE_FREQUENCY
+        + ["Theft / Battery"] * (MINIMUM_TYPE_FREQUENCY + 1)
+        + ["Lost Property", " ", INCIDENT_TYPE_INFO]
+    )
+    pl.DataFrame(
+        {"comments": ["A comment."] * len(incidents), "incident": incidents}
+    ).write_csv(tmp_path / FILE_NAME_INCIDENT_DUMP)
+    monkeypatch.chdir(tmp_path)
+
+    classifier = Classifier(build_model=True)
+
+    assert classifier._unique_types == ["battery", "theft"]
+    assert classifier._labels.dtype == np.int8
+    assert classifier._labels.tolist() == (
+        [[0, 1]] * MINIMUM_TYPE_FREQUENCY
+        + [[1, 1]] * (MINIMUM_TYPE_FREQUENCY + 1)
+        + [[0, 0], [0, 0]]
+    )
+
+
+def test_training_data_prefers_parquet(tmp_path):
+    """Test that the Parquet dump is read, and only its needed columns."""
+    pl.DataFrame(
+        {"comments": ["From a CSV."], "incident": ["Theft"]}
+    ).write_csv(tmp_path / FILE_NAME_INCIDENT_DUMP)
+    assert load_training_data(str(tmp_path))["comments"].to_list() == [
+        "From a CSV."
+    ]
+
+    pl.DataFrame(
+        {
+            "comments": ["From Parquet."],
+            "disposition": ["Closed"],
+            "incident": ["Theft"],
+        }
+    ).write_parquet(tmp_path / FILE_NAME_INCIDENT_PARQUET)
+    training_data = load_training_data(str(tmp_path))
+
+    assert training_data.columns == ["comments", "incident"]
+    assert training_data["comments"].to_list() == ["From Parquet."]
+
+
+@pytest.fixture
+def trained_classifier(tmp_path, monkeypatch):
+    comments, incidents = [], []
+    for i in range(MINIMUM_TYPE_FREQUENCY * 3):
+        comments.append(f"Unknown person stole a laptop {i}.")
+        incidents.append("Theft")
+        comments.append(f"Victim was struck by a known offender {i}.")
+        incidents.append("Battery")
+    comments.append("A comment.")
+    incidents.append(" ")
+    pl.DataFrame({"comments": comments, "incident": incidents}).write_csv(
+        tmp_path / FILE_NAME_INCIDENT_DUMP
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        classifier_module, "MODEL_DIRECTORY", str(tmp_path / "model")
+    )
+
+    classifier = Classifier(build_model=True)
+    classifier.train_and_save()
+    yield classifier
+    load_model_artifacts.cache_clear()
+
+
+def test_saved_artifacts_match_trained_model(trained_classifier):
+    """Test that the saved artifacts predict what the trained model does."""
+    comments = [
+        "Unknown person stole a bike.",
+        "Victim was struck by a known offender.",
+        "Nothing happened.",
+    ]
+    trained_predictions = trained_classifier._model.predict(
+        trained_classifier._vectorizer.transform(
+            normalize_comments(pl.Series(comments)).str.to_lowercase()
+        )
+    )
+    expected = [
+        " / ".join(
+            t.title()
+            for t, hit in zip(
+                trained_classifier._unique_types, row, strict=True
+            )
+            if hit
+        )
+        or None
+        for row in trained_predictions.tolist()
+    ]
+
+    assert Classifier().predict_batch(comments) == expected
+    assert load_model_artifacts.cache_info().currsize == 1
+
+
+def test_artifact_checksum_mismatch(trained_classifier):
+    """Test that a modified artifact is refused."""
+    idf_path = f"{classifier_module.MODEL_DIRECTORY}/{MODEL_FILE_IDF}"
+    np.save(idf_path, np.ones(len(trained_classifier._vectorizer.idf_)))
+    load_model_artifacts.cache_clear()
+
+    with pytest.raises(ValueError):
+        Classifier().predict_batch(["Unknown person stole a bike."])
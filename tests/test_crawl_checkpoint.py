@@ -0,0 +1,111 @@
+"""Test functionality of the CrawlCheckpoint."""
+
+from datetime import date
+from itertools import islice
+
+from incident_scraper.scraper.crawl_checkpoint import CrawlCheckpoint
+from incident_scraper.scraper.ucpd_scraper import UCPDScraper
+
+NUM_PAGES = 4
+NUM_ROWS = NUM_PAGES * UCPDScraper.PAGE_SIZE
+
+
+class FakeScraper(UCPDScraper):
+    def __init__(self):
+        super().__init__(request_delay=0, max_workers=1)
+        self.fetched_offsets = []
+
+    def _get_table(self, url: str):
+        offset = int(url.rsplit("offset=", 1)[1])
+        self.fetched_offsets.append(offset)
+        # Like the site, an offset past the last page gets the first page
+        if offset >= NUM_ROWS:
+            offset = 0
+        page = {
+            f"C24-{offset + n:05}": {"Incident": "Theft", "Row": str(n)}
+            for n in range(self.PAGE_SIZE)
+        }
+        return page, NUM_PAGES
+
+
+def test_resume_continues_after_last_stored_page(tmp_path, monkeypatch):
+    """Test that a resumed crawl yields unhandled rows, then the next pages."""
+    monkeypatch.setattr(CrawlCheckpoint, "BATCH_SIZE", 2)
+    path = str(tmp_path / "checkpoint.sqlite3")
+    checkpoint = CrawlCheckpoint(path)
+    crawl = FakeScraper().iter_checkpointed(checkpoint)
+    # The first two pages are handed over, and only the first is handled
+    handed_over = list(islice(crawl, 2 * UCPDScraper.PAGE_SIZE))
+    checkpoint.mark_handled(k for k, _ in handed_over[: UCPDScraper.PAGE_SIZE])
+    crawl.close()
+
+    scraper = FakeScraper()
+    resumed = list(scraper.iter_checkpointed(CrawlCheckpoint(path), True))
+
+    assert scraper.fetched_offsets == [10, 15]
+    assert [k for k, _ in resumed] == [
+        f"C24-{n:05}" for n in range(5, NUM_ROWS)
+    ]
+    assert resumed[0][1] == {"Incident": "Theft", "Row": "0"}
+    assert CrawlCheckpoint(path).state().completed
+
+
+def test_resume_past_last_page_completes_without_fetching(tmp_path):
+    """Test that a crawl stopped after its last page doesn't wrap around."""
+    path = str(tmp_path / "checkpoint.sqlite3")
+    checkpoint = CrawlCheckpoint(path)
+    crawl = FakeScraper().iter_checkpointed(checkpoint)
+    # Every row is handed over and handled, but the crawl dies before it's
+    # recorded as complete
+    checkpoint.mark_handled(k for k, _ in islice(crawl, NUM_ROWS))
+    crawl.close()
+    assert not checkpoint.state().completed
+
+    scraper = FakeScraper()
+    resumed = list(scraper.iter_checkpointed(CrawlCheckpoint(path), True))
+
+    assert resumed == []
+    assert scraper.fetched_offsets == []
+    assert checkpoint.state().completed
+    assert checkpoint.stats() == {"rows": NUM_ROWS, "handled": NUM_ROWS}
+
+    url = scraper._construct_url(date(2011, 1, 1), date(2024, 10, 1))
+    assert list(scraper._iter_pages(url, NUM_ROWS)) == []
+
+
+def test_save_page_keeps_handled_rows(tmp_path):
+    """Test that storing a row again neither repeats it nor unhandles it."""
+    checkpoint = CrawlCheckpoint(str(tmp_path / "checkpoint.sqlite3"))
+    checkpoint.start(date(2011, 1, 1), date(2024, 10, 1))
+
+    assert checkpoint.save_page({"C24-00000": {"Row": "0"}}, 5, 2) == [
+        "C24-00000"
+    ]
+    checkpoint.mark_handled(["C24-00000"])
+    # A new report shifted the row onto the next page
+    assert checkpoint.save_page(
+        {"C24-00000": {"Row": "0"}, "C24-00001": {"Row": "1"}}, 10, 2
+    ) == ["C24-00001"]
+
+    assert checkpoint.stats() == {"rows": 2, "handled": 1}
+    assert list(checkpoint.iter_unhandled()) == [("C24-00001", {"Row": "1"})]
+    assert checkpoint.state().total_pages == 2
+
+
+def test_start_forgets_earlier_crawl(tmp_path):
+    """Test that a crawl that isn't resumed starts over from offset zero."""
+    path = str(tmp_path / "checkpoint.sqlite3")
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.start(date(2011, 1, 1), date(2024, 10, 1))
+    checkpoint.save_page({"C24-00000": {"Incident": "Theft"}}, 5, NUM_PAGES)
+    checkpoint.mark_handled(["C24-00000"])
+
+    assert checkpoint.stats() == {"rows": 1, "handled": 1}
+    assert checkpoint.state().next_offset == 5
+
+    scraper = FakeScraper()
+    incidents = dict(scraper.iter_checkpointed(checkpoint))
+
+    assert scraper.fetched_offsets == [0, 5, 10, 15]
+    assert len(incidents) == NUM_ROWS
+    assert checkpoint.stats() == {"rows": NUM_ROWS, "handled": 0}
@@ -0,0 +1,52 @@
+"""Test functionality of the CrawlShard."""
+
+from datetime import date
+
+import pytest
+
+from incident_scraper.scraper.crawl_shard import CrawlShard, monthly_windows
+from incident_scraper.scraper.ucpd_scraper import UCPDScraper
+
+
+def test_shards_cover_every_monthly_window_once():
+    """Test that the shards split a date range's months between them."""
+    windows = monthly_windows(date(2023, 11, 15), date(2024, 2, 10))
+    shards = [CrawlShard.parse(f"{i}/3") for i in range(1, 4)]
+
+    assert windows == [
+        (date(2023, 11, 15), date(2023, 11, 30)),
+        (date(2023, 12, 1), date(2023, 12, 31)),
+        (date(2024, 1, 1), date(2024, 1, 31)),
+        (date(2024, 2, 1), date(2024, 2, 10)),
+    ]
+    assert shards[0].select(windows) == [windows[0], windows[3]]
+    assert sorted(w for s in shards for w in s.select(windows)) == windows
+    for spec in ("0/3", "4/3", "1", "a/b"):
+        with pytest.raises(ValueError):
+            CrawlShard.parse(spec)
+
+
+def test_iter_shard_dedupes_incidents_by_id():
+    """Test that an incident listed in two windows is only yielded once."""
+
+    class FakeScraper(UCPDScraper):
+        def __init__(self):
+            super().__init__(request_delay=0)
+            self.windows = []
+
+        def iter_incidents(self, start_date, end_date=None):
+            self.windows.append((start_date, end_date))
+            # Each window lists its month's incident and the one before it
+            yield f"C24-{start_date.month - 1:05}", {"Month": "Earlier"}
+            yield f"C24-{start_date.month:05}", {"Month": str(start_date)}
+
+    scraper = FakeScraper()
+    incidents = list(
+        scraper.iter_shard(
+            CrawlShard(1, 1), date(2024, 1, 1), date(2024, 3, 31)
+        )
+    )
+
+    assert len(scraper.windows) == 3
+    assert [k for k, _ in incidents] == [f"C24-{n:05}" for n in range(4)]
+    assert incidents[1] == ("C24-00001", {"Month": "2024-01-01"})
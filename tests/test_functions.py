@@ -0,0 +1,48 @@
+"""Test functionality of the shared utility functions."""
+
+import json
+import os
+from datetime import datetime
+
+from incident_scraper.utils.constants import (
+    FILE_ENCODING_UTF_8,
+    FILE_OPEN_READ,
+    TIMEZONE_CHICAGO,
+)
+from incident_scraper.utils.functions import parse_scraped_incident_timestamp
+
+TIMESTAMP_CORPUS = os.path.join(
+    os.path.dirname(__file__), "fixtures", "timestamp_corpus.json"
+)
+
+
+def test_parse_timestamp_matches_corpus():
+    """Test that every variant of report time is parsed to its datetime."""
+    with open(
+        TIMESTAMP_CORPUS, FILE_OPEN_READ, encoding=FILE_ENCODING_UTF_8
+    ) as f:
+        corpus = json.load(f)
+
+    mismatches = {}
+    for raw, expected in corpus.items():
+        parsed = parse_scraped_incident_timestamp(raw)
+        if (parsed and parsed.isoformat()) != expected:
+            mismatches[raw] = (parsed, expected)
+
+    assert not mismatches
+
+
+def test_parse_timestamp_localizes_like_pytz():
+    """Test that times around DST changes get the offset localize gives."""
+    for reported, naive in [
+        ("3/10/24 1:59 AM", datetime(2024, 3, 10, 1, 59)),
+        ("3/10/24 2:30 AM", datetime(2024, 3, 10, 2, 30)),
+        ("3/10/24 3:00 AM", datetime(2024, 3, 10, 3, 0)),
+        ("11/3/24 1:30 AM", datetime(2024, 11, 3, 1, 30)),
+        ("11/3/24 2:00 AM", datetime(2024, 11, 3, 2, 0)),
+    ]:
+        parsed = parse_scraped_incident_timestamp(reported)
+        localized = TIMEZONE_CHICAGO.localize(naive)
+
+        assert parsed == localized
+        assert parsed.tzinfo is localized.tzinfo
@@ -0,0 +1,40 @@
+"""Test functionality of the GeocodeCache class."""
+
+from incident_scraper.external.geocode_cache import GeocodeCache
+from incident_scraper.utils.constants import (
+    GEOCODER_PROVIDER_CENSUS,
+    INCIDENT_KEY_ADDRESS,
+    INCIDENT_KEY_LATITUDE,
+    INCIDENT_KEY_LONGITUDE,
+)
+
+RESULT = {
+    INCIDENT_KEY_ADDRESS: "5801 S Ellis Ave, Chicago, IL 60637",
+    INCIDENT_KEY_LATITUDE: 41.78,
+    INCIDENT_KEY_LONGITUDE: -87.60,
+}
+
+
+def test_geocode_cache_persists_normalized_addresses(tmp_path):
+    """Test that results survive a new cache instance and share a key."""
+    path = str(tmp_path / "cache.sqlite3")
+    GeocodeCache(path).set(
+        "5801 S. Ellis Ave.", RESULT, GEOCODER_PROVIDER_CENSUS
+    )
+
+    assert GeocodeCache(path).get("5801  s. ellis ave.") == RESULT
+
+
+def test_geocode_cache_expiry_and_eviction(tmp_path):
+    """Test that expired and overflowing entries are dropped."""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = GeocodeCache(path, ttl_days=0)
+    cache.set("5801 S. Ellis Ave.", RESULT, GEOCODER_PROVIDER_CENSUS)
+    assert cache.get("5801 S. Ellis Ave.") is None
+
+    cache = GeocodeCache(path, max_entries=1)
+    cache.set("5801 S. Ellis Ave.", RESULT, GEOCODER_PROVIDER_CENSUS)
+    cache.set("1 E. 55th St.", RESULT, GEOCODER_PROVIDER_CENSUS)
+    cache.evict()
+    assert cache.get("5801 S. Ellis Ave.") is None
+    assert cache.get("1 E. 55th St.") == RESULT
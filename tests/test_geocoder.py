@@ -0,0 +1,187 @@
+"""Test the Geocoder's coalescing, rate limits and retries with stub clients."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from incident_scraper.external import geocoder as geocoder_module
+from incident_scraper.external.geocoder import Geocoder
+from incident_scraper.utils.constants import (
+    INCIDENT_KEY_ADDRESS,
+    INCIDENT_KEY_LATITUDE,
+    INCIDENT_KEY_LONGITUDE,
+)
+
+
+class StubCensus:
+    """Answer single address lookups, after failing the first few."""
+
+    def __init__(self, latency=0.0, failures=0, misses=()):
+        self._latency = latency
+        self._failures = failures
+        self._misses = misses
+        self._lock = threading.Lock()
+        self.calls = []
+
+    def address(self, street, **kwargs):
+        with self._lock:
+            self.calls.append((street, time.monotonic()))
+            if self._failures:
+                self._failures -= 1
+                raise requests.exceptions.ConnectionError("Try again.")
+        time.sleep(self._latency)
+        if street in self._misses:
+            return []
+
+        return [
+            {
+                "matchedAddress": street.upper(),
+                "coordinates": {"x": -87.60, "y": 41.78},
+            }
+        ]
+
+
+class StubCensusBatch:
+    """Record batch submissions, and fail them like an unreachable service."""
+
+    def __init__(self):
+        self.submissions = []
+
+    def geocode(self, addresses):
+        self.submissions.append(list(addresses))
+        raise requests.exceptions.ConnectionError("Unavailable.")
+
+
+class StubGoogle:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = []
+
+    def addressvalidation(self, addresses, **kwargs):
+        with self._lock:
+            self.calls.append((addresses[0], time.monotonic()))
+        return {
+            "result": {
+                "address": {"formattedAddress": f"{addresses[0]}, USA"},
+                "geocode": {
+                    "location": {"latitude": 41.79, "longitude": -87.59}
+                },
+            }
+        }
+
+
+@pytest.fixture
+def create_geocoder(tmp_path, monkeypatch):
+    def create(census=None, google=None):
+        batch = StubCensusBatch()
+        census = census or StubCensus()
+        google = google or StubGoogle()
+        monkeypatch.setattr(geocoder_module, "CensusBatchClient", lambda: batch)
+        monkeypatch.setattr(geocoder_module, "CensusGeocode", lambda: census)
+        monkeypatch.setattr(geocoder_module, "Client", lambda key: google)
+        monkeypatch.setattr(
+            geocoder_module,
+            "ENV_GEOCODE_CACHE_PATH",
+            str(tmp_path / "cache.sqlite3"),
+        )
+        return Geocoder(), batch
+
+    return create
+
+
+def test_concurrent_lookups_of_an_address_make_one_call(create_geocoder):
+    """Test that concurrent lookups of the same address share one request."""
+    census = StubCensus(latency=0.2)
+    geocoder, _ = create_geocoder(census=census)
+    incidents = [{"Location": "5801 S. Ellis Ave."} for _ in range(8)]
+
+    with ThreadPoolExecutor(max_workers=len(incidents)) as executor:
+        found = list(
+            executor.map(
+                lambda i: geocoder.get_address_information(
+                    "5801 S. Ellis Ave.", i
+                ),
+                incidents,
+            )
+        )
+
+    assert found == [True] * len(incidents)
+    assert [street for street, _ in census.calls] == ["5801 S. Ellis Ave."]
+    assert incidents[-1] == {
+        "Location": "5801 S. Ellis Ave.",
+        INCIDENT_KEY_ADDRESS: "5801 S. ELLIS AVE.",
+        INCIDENT_KEY_LATITUDE: 41.78,
+        INCIDENT_KEY_LONGITUDE: -87.60,
+    }
+
+
+def test_duplicates_within_a_batch_are_resolved_once(create_geocoder):
+    """Test that every unique address in a chunk is geocoded once."""
+    census = StubCensus()
+    geocoder, batch = create_geocoder(census=census)
+    addresses = ["5801 S. Ellis Ave.", "1 E. 55th St.", "5801 S. Ellis Ave."]
+
+    results = geocoder.resolve_addresses(addresses * 2)
+
+    assert batch.submissions == [["5801 S. Ellis Ave.", "1 E. 55th St."]]
+    assert sorted(street for street, _ in census.calls) == [
+        "1 E. 55th St.",
+        "5801 S. Ellis Ave.",
+    ]
+    assert list(results) == ["5801 S. Ellis Ave.", "1 E. 55th St."]
+
+
+def test_requests_are_rate_limited_per_provider(create_geocoder, monkeypatch):
+    """Test that each provider's requests are spaced by its own interval."""
+    monkeypatch.setattr(Geocoder, "CENSUS_REQUEST_INTERVAL", 0.05)
+    monkeypatch.setattr(Geocoder, "GOOGLE_REQUEST_INTERVAL", 0.03)
+    census = StubCensus()
+    google = StubGoogle()
+    geocoder, _ = create_geocoder(census=census, google=google)
+    # Intersections can't be looked up by the Census, only by Google Maps
+    census_addresses = [f"{n}00 E. 55th St." for n in range(1, 7)]
+    google_addresses = [
+        f"E. 55th St. at S. {street} Ave."
+        for street in [
+            "Ellis",
+            "Woodlawn",
+            "Kimbark",
+            "Kenwood",
+            "Dorchester",
+            "Blackstone",
+        ]
+    ]
+
+    geocoder.resolve_addresses(census_addresses + google_addresses)
+
+    for calls, interval in [(census.calls, 0.05), (google.calls, 0.03)]:
+        times = sorted(t for _, t in calls)
+        assert len(times) == len(census_addresses)
+        assert (
+            min(b - a for a, b in zip(times, times[1:], strict=False))
+            >= interval * 0.9
+        )
+
+
+def test_census_retries_back_off_then_give_up(create_geocoder, monkeypatch):
+    """Test that failed Census requests back off exponentially, then stop."""
+    sleeps = []
+    monkeypatch.setattr(geocoder_module, "sleep", sleeps.append)
+    geocoder, _ = create_geocoder(census=StubCensus(failures=2))
+
+    assert geocoder._census_validate_address("5801 S. Ellis Ave.")
+    assert sleeps == [0.5, 1.0]
+
+    sleeps.clear()
+    census = StubCensus(failures=Geocoder.NUM_RETRIES)
+    geocoder, _ = create_geocoder(census=census)
+
+    assert geocoder._census_validate_address("1 E. 55th St.") is None
+    assert len(census.calls) == Geocoder.NUM_RETRIES
+    assert sleeps == [
+        min(Geocoder.RETRY_BACKOFF * 2**n, Geocoder.RETRY_BACKOFF_MAX)
+        for n in range(Geocoder.NUM_RETRIES)
+    ]
@@ -0,0 +1,168 @@
+"""Test functionality of the GoogleNBD client's paging and exports."""
+
+import csv
+import gzip
+from contextlib import contextmanager
+from datetime import date
+from types import SimpleNamespace
+
+import polars as pl
+from google.cloud.ndb.model import GeoPt
+
+from incident_scraper.external.google_nbd import GoogleNBD
+from incident_scraper.models.incident import Incident
+from incident_scraper.utils.constants import (
+    FILE_NAME_INCIDENT_DUMP,
+    FILE_NAME_INCIDENT_PARQUET,
+)
+
+# The exported header, which downstream consumers of the dump depend on
+EXPORTED_COLUMNS = [
+    "comments",
+    "disposition",
+    "incident",
+    "location",
+    "occurred",
+    "predicted_incident",
+    "reported",
+    "reported_date",
+    "season",
+    "ucpd_id",
+    "validated_address",
+    "validated_location",
+]
+
+
+class FakeClient:
+    def __init__(self):
+        self.active_contexts = 0
+        self.contexts_opened = 0
+
+    @contextmanager
+    def context(self):
+        self.active_contexts += 1
+        self.contexts_opened += 1
+        yield
+        self.active_contexts -= 1
+
+
+class FakeQuery:
+    def __init__(self, client: FakeClient, results: list):
+        self._client = client
+        self._results = results
+
+    def fetch_page(self, page_size, start_cursor=None):
+        assert self._client.active_contexts == 1
+        start = start_cursor or 0
+        end = start + page_size
+        return self._results[start:end], end, end < len(self._results)
+
+
+def test_iter_query_pages_with_cursors():
+    """Test that results are fetched one page per client context."""
+    client = FakeClient()
+    nbd_client = GoogleNBD.__new__(GoogleNBD)
+    nbd_client._client = client
+    nbd_client._page_size = 4
+
+    pages = nbd_client._iter_query(lambda: FakeQuery(client, list(range(10))))
+
+    assert next(pages) == 0
+    assert client.active_contexts == 0
+    assert list(pages) == list(range(1, 10))
+    assert client.contexts_opened == 3
+
+
+def test_get_content_hashes_keeps_unhashed_incidents(monkeypatch):
+    """Test that incidents stored without a hash are still listed."""
+    nbd_client = GoogleNBD.__new__(GoogleNBD)
+    keys = [
+        SimpleNamespace(id=lambda: "C24-00001_2024-10-01"),
+        SimpleNamespace(id=lambda: "C24-00002_2024-10-01"),
+        SimpleNamespace(id=lambda: "C24-00002_2024-10-02"),
+    ]
+    # The projection leaves out the incident that has no content hash
+    projected = [
+        Incident(ucpd_id="C24-00002", content_hash="a"),
+        Incident(ucpd_id="C24-00002", content_hash="b"),
+    ]
+    monkeypatch.setattr(
+        nbd_client,
+        "_iter_query",
+        lambda create_query, keys_only=False: iter(
+            keys if keys_only else projected
+        ),
+    )
+
+    assert nbd_client.get_content_hashes(date(2024, 10, 1)) == {
+        "C24-00001": set(),
+        "C24-00002": {"a", "b"},
+    }
+
+
+def test_download_all_streams_fixed_schema(tmp_path, monkeypatch):
+    """Test that the CSV and its gzipped copy share the Incident schema."""
+    client = FakeClient()
+    nbd_client = GoogleNBD.__new__(GoogleNBD)
+    nbd_client._client = client
+    nbd_client._page_size = 2
+
+    incidents = []
+    for n in range(5):
+        incident = Incident(
+            ucpd_id=f"I24-{n:05}", incident="Theft", content_hash="abc"
+        )
+        if n % 2:
+            incident.validated_location = GeoPt(41.79, -87.6)
+        incidents.append(incident)
+    monkeypatch.setattr(
+        nbd_client, "_iter_query", lambda *args, **kwargs: iter(incidents)
+    )
+    monkeypatch.chdir(tmp_path)
+
+    nbd_client.download_all(gzip_copy=True)
+
+    with open(FILE_NAME_INCIDENT_DUMP, newline="") as f:
+        rows = list(csv.reader(f))
+    with gzip.open(f"{FILE_NAME_INCIDENT_DUMP}.gz", "rt", newline="") as f:
+        assert list(csv.reader(f)) == rows
+
+    assert rows[0] == EXPORTED_COLUMNS
+    assert len(rows) == len(incidents) + 1
+    location = rows[0].index("validated_location")
+    assert [r[location] for r in rows[1:3]] == ["", "41.79,-87.6"]
+
+
+def test_download_all_parquet_types_columns(tmp_path, monkeypatch):
+    """Test that the Parquet dump has typed dates, times and coordinates."""
+    nbd_client = GoogleNBD.__new__(GoogleNBD)
+    incidents = [
+        Incident(
+            ucpd_id="I24-00001",
+            reported="2024-03-01T22:15:00-06:00",
+            reported_date="2024-03-01",
+            validated_location=GeoPt(41.79, -87.6),
+        ),
+        Incident(ucpd_id="I24-00002"),
+    ]
+    monkeypatch.setattr(
+        nbd_client, "_iter_query", lambda *args, **kwargs: iter(incidents)
+    )
+    monkeypatch.chdir(tmp_path)
+
+    nbd_client.download_all_parquet()
+    incident_dump = pl.read_parquet(FILE_NAME_INCIDENT_PARQUET)
+
+    assert incident_dump.schema["reported_date"] == pl.Date
+    assert incident_dump.schema["reported"] == pl.Datetime(
+        "us", "America/Chicago"
+    )
+    assert incident_dump["reported_date"].to_list() == [date(2024, 3, 1), None]
+    assert incident_dump["reported"][0].hour == 22
+    assert incident_dump["validated_location_latitude"].to_list() == [
+        41.79,
+        None,
+    ]
+    assert incident_dump["validated_location_longitude"][0] == -87.6
+    assert "validated_location" not in incident_dump.columns
+    assert "content_hash" not in incident_dump.columns
@@ -0,0 +1,27 @@
+"""Test functionality of the ImportProfiler."""
+
+import sys
+
+from incident_scraper.utils.import_profiler import ImportProfiler
+
+
+def test_import_profiler_records_nested_imports(tmp_path, monkeypatch):
+    """Test that self time excludes the time spent in nested imports."""
+    (tmp_path / "profiled_child.py").write_text(
+        "import time\ntime.sleep(0.05)\n"
+    )
+    (tmp_path / "profiled_parent.py").write_text("import profiled_child\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    with ImportProfiler() as profiler:
+        import profiled_parent  # noqa: F401
+
+    assert profiler not in sys.meta_path
+    child_self, child_cumulative = profiler.timings["profiled_child"]
+    parent_self, parent_cumulative = profiler.timings["profiled_parent"]
+    assert child_self >= 0.05
+    assert parent_cumulative >= child_cumulative
+    assert parent_self < 0.05
+    assert "profiled_child" in profiler.report()
+
+    del sys.modules["profiled_parent"], sys.modules["profiled_child"]
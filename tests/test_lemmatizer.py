@@ -0,0 +1,71 @@
+"""Test functionality of the Lemmatizer."""
+
+import json
+import os
+
+import nltk
+import pytest
+
+from incident_scraper.external.lemmatizer import (
+    TYPE_ALIASES,
+    Lemmatizer,
+    load_word_class,
+)
+from incident_scraper.utils.constants import (
+    FILE_ENCODING_UTF_8,
+    FILE_OPEN_READ,
+)
+
+GOLDEN_CORPUS = os.path.join(
+    os.path.dirname(__file__), "fixtures", "lemmatizer_golden.json"
+)
+
+
+def test_process_matches_golden_corpus():
+    """Test that every raw type is standardized as it was before."""
+    with open(GOLDEN_CORPUS, FILE_OPEN_READ, encoding=FILE_ENCODING_UTF_8) as f:
+        corpus = json.load(f)
+
+    mismatches = {
+        raw: (Lemmatizer.process(raw), expected)
+        for raw, expected in corpus.items()
+        if Lemmatizer.process(raw) != expected
+    }
+
+    assert not mismatches
+
+
+def test_process_is_memoized():
+    """Test that repeated raw types are served from the memo."""
+    Lemmatizer.process.cache_clear()
+
+    for _ in range(3):
+        assert Lemmatizer.process("Theft (Att.)") == "Theft / Attempted"
+
+    cache_info = Lemmatizer.process.cache_info()
+    assert (cache_info.hits, cache_info.misses) == (2, 1)
+
+
+def test_first_type_mapping_wins():
+    """Test that an alias listed under two types maps to the first one."""
+    assert TYPE_ALIASES["Harassing Message"] == "Harassment by Electronic Means"
+    assert TYPE_ALIASES["Recovered Motor Vehicle"] == "Recovered Vehicle"
+
+
+def test_missing_wordnet_fails_without_downloading(monkeypatch):
+    """Test that a missing WordNet raises, instead of being downloaded."""
+
+    def find(resource):
+        raise LookupError(resource)
+
+    def download(*args, **kwargs):
+        raise AssertionError("WordNet shouldn't be downloaded.")
+
+    monkeypatch.setattr(nltk.data, "find", find)
+    monkeypatch.setattr(nltk, "download", download)
+    load_word_class.cache_clear()
+    try:
+        with pytest.raises(LookupError, match="make wordnet"):
+            load_word_class()
+    finally:
+        load_word_class.cache_clear()
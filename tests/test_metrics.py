@@ -0,0 +1,73 @@
+"""Test functionality of the run metrics."""
+
+import json
+
+from incident_scraper.utils.metrics import Metrics
+
+
+def test_counters_and_timers_by_labels():
+    """Test that counters and timers are kept apart by their labels."""
+    metrics = Metrics()
+    metrics.increment("geocoder_calls", provider="census")
+    metrics.increment("geocoder_calls", 2, provider="census")
+    metrics.increment("geocoder_calls", provider="google")
+    metrics.observe("ucpd_page_fetch", 0.5)
+    metrics.observe("ucpd_page_fetch", 1.5)
+
+    summary = metrics.summary()
+
+    assert summary["counters"] == [
+        {
+            "name": "geocoder_calls",
+            "labels": {"provider": "census"},
+            "value": 3,
+        },
+        {
+            "name": "geocoder_calls",
+            "labels": {"provider": "google"},
+            "value": 1,
+        },
+    ]
+    assert summary["timers"] == [
+        {
+            "name": "ucpd_page_fetch",
+            "labels": {},
+            "count": 2,
+            "total_seconds": 2.0,
+            "mean_seconds": 1.0,
+            "max_seconds": 1.5,
+        }
+    ]
+
+
+def test_prometheus_export():
+    """Test that the metrics are exported in the Prometheus text format."""
+    metrics = Metrics()
+    metrics.increment("geocoder_cache_hits", cache="memory")
+    metrics.observe("datastore_write", 0.25)
+
+    assert metrics.to_prometheus().splitlines() == [
+        "# TYPE incident_scraper_geocoder_cache_hits_total counter",
+        'incident_scraper_geocoder_cache_hits_total{cache="memory"} 1',
+        "# TYPE incident_scraper_datastore_write_seconds summary",
+        "incident_scraper_datastore_write_seconds_count 1",
+        "incident_scraper_datastore_write_seconds_sum 0.250000",
+        "# TYPE incident_scraper_datastore_write_seconds_max gauge",
+        "incident_scraper_datastore_write_seconds_max 0.250000",
+    ]
+
+
+def test_write_by_file_extension(tmp_path):
+    """Test that .prom files get Prometheus text and other files get JSON."""
+    metrics = Metrics()
+    metrics.increment("ucpd_pages_fetched")
+
+    metrics.write(str(tmp_path / "run.prom"))
+    metrics.write(str(tmp_path / "run.json"))
+
+    assert (tmp_path / "run.prom").read_text() == metrics.to_prometheus()
+    assert json.loads((tmp_path / "run.json").read_text()) == metrics.summary()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "run.json",
+        "run.prom",
+    ]
@@ -0,0 +1,256 @@
+"""Test functionality of the incident pipeline's helpers."""
+
+import copy
+import pickle
+from collections import Counter
+from datetime import date
+from types import SimpleNamespace
+
+from incident_scraper import pipeline
+from incident_scraper.models import classifier as classifier_module
+from incident_scraper.pipeline import (
+    STORED_CHANGED,
+    STORED_NEW,
+    STORED_UNCHANGED,
+    get_stored_status,
+    iter_normalized_chunks,
+    screen_incidents,
+)
+from incident_scraper.utils.constants import (
+    INCIDENT_KEY_COMMENTS,
+    INCIDENT_KEY_ID,
+    INCIDENT_PREDICTED_TYPE,
+)
+from incident_scraper.utils.functions import chunked, incident_content_hash
+
+INCIDENT = {
+    "Incident": "Theft",
+    "Location": "5801 S. Ellis Ave.",
+    "Reported": "10/1/24 1:00 PM",
+    "Occurred": "10/1/24 12:30 PM",
+    "Comments / Nature of Fire": "Unknown person took a laptop.",
+    "Disposition": "Open",
+}
+
+
+def test_incident_content_hash():
+    """Test that the hash follows the content, not the key order."""
+    reordered = dict(reversed(INCIDENT.items()))
+    changed = {**INCIDENT, "Disposition": "Closed"}
+
+    assert incident_content_hash(INCIDENT) == incident_content_hash(reordered)
+    assert incident_content_hash(INCIDENT) != incident_content_hash(changed)
+
+
+def test_get_stored_status():
+    """Test that scraped incidents are compared to their stored versions."""
+    content_hash = incident_content_hash(INCIDENT)
+    stored_hashes = {
+        "C24-00001": {content_hash},
+        "C24-00002": {"other"},
+        # Stored before content hashes were
+        "C24-00004": set(),
+    }
+
+    assert (
+        get_stored_status("C24-00001", content_hash, stored_hashes)
+        == STORED_UNCHANGED
+    )
+    assert (
+        get_stored_status("C24-00002", content_hash, stored_hashes)
+        == STORED_CHANGED
+    )
+    assert (
+        get_stored_status("C24-00003", content_hash, stored_hashes)
+        == STORED_NEW
+    )
+    assert (
+        get_stored_status("C24-00004", content_hash, stored_hashes)
+        == STORED_CHANGED
+    )
+
+
+def test_process_pool_matches_serial_normalization():
+    """Test that the process pool normalizes incidents like the serial path."""
+    incidents = [
+        (
+            f"C24-{n:05}",
+            {**INCIDENT, "Location": location, "Reported": reported},
+        )
+        for n, (location, reported) in enumerate(
+            [
+                ("5801 S. Ellis Ave.", "10/1/24 1:00 PM"),
+                ("1414 E. 59th St (International House)", "10/2/24 9:05AM"),
+                ("E. 55th St. & S. Woodlawn", "10/3/24 11;45 PM"),
+                ("5500 S. Shore Drive", "Not a date"),
+            ]
+            * 5
+        )
+    ]
+    chunks = [
+        screen_incidents(chunk, {}, Counter())
+        for chunk in chunked(incidents, 3)
+    ]
+
+    serial = [
+        pickle.dumps(i)
+        for _, normalized in iter_normalized_chunks(copy.deepcopy(chunks))
+        for i in normalized
+    ]
+    parallel = [
+        pickle.dumps(i)
+        for _, normalized in iter_normalized_chunks(
+            copy.deepcopy(chunks), workers=2
+        )
+        for i in normalized
+    ]
+
+    assert parallel == serial
+    assert [i == pickle.dumps(None) for i in serial] == [
+        n == 3 for n in range(4)
+    ] * 5
+
+
+def test_skipped_incidents_are_reported_handled(monkeypatch):
+    """Test that saved and skipped incidents are all reported as handled."""
+
+    class FakeWriter:
+        def __init__(self, on_written):
+            self._on_written = on_written
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def write(self, incidents):
+            self._on_written(list(incidents))
+
+        def stats(self):
+            return {}
+
+    class FakeNBD:
+        def get_content_hashes(self, start_date):
+            return {"C24-00002": {incident_content_hash(INCIDENT)}}
+
+        def incident_writer(self, on_written=None):
+            return FakeWriter(on_written)
+
+    def geocode(parsed_incidents, geocoder):
+        located = [
+            i for _, i in parsed_incidents if i[INCIDENT_KEY_ID] != "C24-00004"
+        ]
+        failed = [
+            i for _, i in parsed_incidents if i[INCIDENT_KEY_ID] == "C24-00004"
+        ]
+        return located, failed
+
+    monkeypatch.setattr(pipeline, "Geocoder", lambda: None)
+    monkeypatch.setattr(pipeline, "geocode_incidents", geocode)
+    handled = []
+
+    pipeline.parse_and_save_records(
+        [
+            ("C24-00001", dict(INCIDENT)),
+            # Unchanged
+            ("C24-00002", dict(INCIDENT)),
+            # Missing fields
+            ("C24-00003", {"Incident": "Theft"}),
+            # Can't be geocoded
+            ("C24-00004", dict(INCIDENT)),
+            # Malformed report time
+            ("C24-00005", {**INCIDENT, "Reported": "Not a date"}),
+        ],
+        FakeNBD(),
+        date(2024, 10, 1),
+        on_handled=handled.extend,
+    )
+
+    assert sorted(handled) == [f"C24-{n:05}" for n in range(1, 6)]
+
+
+class LemmaWriter:
+    """Record each chunk the lemmatizer writes."""
+
+    def __init__(self, events: list):
+        self._events = events
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def write(self, incidents):
+        self._events.append(("write", sorted(i.key for i in incidents)))
+
+    def stats(self):
+        return {}
+
+
+class LemmaNBD:
+    """Hold a few incidents, and record each type query that's scanned."""
+
+    def __init__(self):
+        self.events = []
+        self.incidents = {
+            1: SimpleNamespace(key=1, incident="Theft (Att.)"),
+            2: SimpleNamespace(key=2, incident="Theft"),
+            3: SimpleNamespace(key=3, incident="Theft (Att.)"),
+            4: SimpleNamespace(key=4, incident="Hit & Run"),
+        }
+
+    def count_incidents(self):
+        return len(self.incidents)
+
+    def get_incident_types(self):
+        return sorted({i.incident for i in self.incidents.values()})
+
+    def get_incident_keys_of_type(self, incident_type):
+        self.events.append(("scan", incident_type))
+        return [
+            k for k, i in self.incidents.items() if i.incident == incident_type
+        ]
+
+    def get_incidents(self, keys):
+        # The third incident is deleted before it's looked up
+        return [self.incidents.get(k) if k != 3 else None for k in keys]
+
+    def bulk_writer(self):
+        return LemmaWriter(self.events)
+
+
+def test_lemmatize_categories_scans_before_writing(monkeypatch):
+    """Test that no incident is rewritten while the type queries are paged."""
+    monkeypatch.setattr(pipeline.GoogleNBD, "PAGE_SIZE", 1)
+    nbd_client = LemmaNBD()
+
+    pipeline.lemmatize_categories(nbd_client)
+
+    assert nbd_client.events == [
+        ("scan", "Hit & Run"),
+        ("scan", "Theft (Att.)"),
+        ("write", [4]),
+        ("write", [1]),
+    ]
+    assert [i.incident for i in nbd_client.incidents.values()] == [
+        "Theft / Attempted",
+        "Theft",
+        "Theft (Att.)",
+        "Hit and Run",
+    ]
+
+
+def test_information_incidents_are_kept_without_a_model(tmp_path, monkeypatch):
+    """Test that a missing model leaves 'Information' incidents unclassified."""
+    monkeypatch.setattr(classifier_module, "MODEL_DIRECTORY", str(tmp_path))
+    incidents = [
+        {
+            INCIDENT_KEY_COMMENTS: "A laptop was taken.",
+            INCIDENT_PREDICTED_TYPE: "",
+        }
+    ]
+
+    assert pipeline.predict_information_incidents(incidents) == 0
+    assert incidents[0][INCIDENT_PREDICTED_TYPE] == ""
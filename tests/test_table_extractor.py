@@ -0,0 +1,73 @@
+"""Test functionality of the IncidentTableExtractor."""
+
+import logging
+
+from incident_scraper.scraper.table_extractor import IncidentTableExtractor
+
+HEADERS = [
+    "Incident",
+    "Location",
+    "Reported",
+    "Occurred",
+    "Comments / Nature of Fire",
+    "Disposition",
+    "UCPDI#",
+]
+PAGE = """<!DOCTYPE html>
+<html><body>
+<table>
+<thead><tr>{headers}</tr></thead>
+<tbody>
+  <tr>
+    <td>Theft</td><td>5801 S. Ellis Ave.</td><td>3/1/24 9:15 AM</td>
+    <td>3/1/24 8:00 AM</td><td> Laptop taken. </td><td>Open</td>
+    <td>I24-00001</td>
+  </tr>
+  <tr>
+    <td>Void</td><td>Void</td><td>Void</td><td>Void</td><td>Void</td>
+    <td>Void</td><td>I24-00002</td>
+  </tr>
+  <tr>
+    <td>Information</td><td>1 E. 55th St.</td><td>3/2/24 1:05 PM</td>
+    <td>3/2/24 1:05 PM</td><td></td><td>Closed</td><td>None</td>
+  </tr>
+  <tr>
+    <td colspan="7">No Incident Reports for this date</td>
+  </tr>
+</tbody>
+</table>
+<span class="page-link">1 / 12</span>
+</body></html>
+""".format(headers="".join(f"<th>{h}</th>" for h in HEADERS))
+
+
+def test_extract_incidents_and_page_count(caplog):
+    """Test that rows are keyed by ID, voided rows are emptied and the rest
+    are skipped."""
+    with caplog.at_level(logging.INFO):
+        incidents, total_pages = IncidentTableExtractor().extract(PAGE.encode())
+
+    assert total_pages == 12
+    assert incidents == {
+        "I24-00001": {
+            "Incident": "Theft",
+            "Location": "5801 S. Ellis Ave.",
+            "Reported": "3/1/24 9:15 AM",
+            "Occurred": "3/1/24 8:00 AM",
+            "Comments / Nature of Fire": "Laptop taken.",
+            "Disposition": "Open",
+        },
+        "I24-00002": {},
+    }
+
+
+def test_skipped_rows_are_logged_at_debug(caplog):
+    """Test that skipped and voided rows are logged when debugging."""
+    with caplog.at_level(logging.DEBUG):
+        IncidentTableExtractor().extract(PAGE.encode())
+
+    assert [r.getMessage().split(":")[0] for r in caplog.records] == [
+        "This incident contains voided information",
+        "This incident has an ID of 'None'",
+        "This incident has a length of 1",
+    ]
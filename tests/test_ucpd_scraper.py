@@ -0,0 +1,231 @@
+"""Test functionality of the UCPDScraper."""
+
+import re
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+import pytest
+from requests import Response
+from requests.adapters import HTTPAdapter
+
+from incident_scraper.scraper.ucpd_scraper import UCPDScraper
+from incident_scraper.utils.metrics import METRICS
+
+COLUMNS = [
+    "Incident",
+    "Location",
+    "Reported",
+    "Occurred",
+    "Comments / Nature of Fire",
+    "Disposition",
+    "UCPDI#",
+]
+
+
+def render_page(ids: List[str], total_pages: int) -> bytes:
+    headers = "".join(f"<th>{c}</th>" for c in COLUMNS)
+    rows = "".join(
+        "<tr>\n<td>Theft</td><td>5500 S. University Ave.</td>"
+        "<td>10/1/24 1:00 PM</td><td>10/1/24</td><td>A comment.</td>"
+        f"<td>Open</td><td>{i}</td></tr>"
+        for i in ids
+    )
+    return (
+        f"<html><body><table><thead><tr>{headers}</tr></thead>"
+        f"<tbody>{rows}</tbody></table>"
+        f'<span class="page-link">1 / {total_pages}</span></body></html>'
+    ).encode()
+
+
+class StubAdapter(HTTPAdapter):
+    """Serve the incident IDs listed for each offset, after some latency."""
+
+    def __init__(
+        self,
+        pages: Dict[int, List[str]],
+        latency: Callable[[int], float] = lambda offset: 0.0,
+    ):
+        super().__init__()
+        self._pages = pages
+        self._latency = latency
+        self.lock = threading.Lock()
+        self.offsets = []
+        self.sent_at = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def send(self, request, **kwargs) -> Response:
+        offset = int(re.search(r"offset=(\d+)", request.url).group(1))
+        with self.lock:
+            self.offsets.append(offset)
+            self.sent_at.append(time.monotonic())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self._latency(offset))
+        with self.lock:
+            self.in_flight -= 1
+
+        response = Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response.raw = SimpleNamespace(retries=None)
+        response._content = render_page(self._pages[offset], len(self._pages))
+        return response
+
+
+def stub_scraper(adapter: HTTPAdapter, **kwargs) -> UCPDScraper:
+    scraper = UCPDScraper(**{"request_delay": 0, **kwargs})
+    scraper._session.mount("https://", adapter)
+    return scraper
+
+
+def test_iter_incidents_yields_each_id_once():
+    """Test that an incident shifted onto the next page isn't repeated."""
+    adapter = StubAdapter(
+        {0: ["C24-00001", "C24-00002"], 5: ["C24-00002", "C24-00003"]}
+    )
+    scraper = stub_scraper(adapter)
+
+    incidents = list(
+        scraper.iter_incidents(date(2024, 10, 1), date(2024, 10, 2))
+    )
+
+    assert adapter.offsets == [0, 5]
+    assert [k for k, _ in incidents] == ["C24-00001", "C24-00002", "C24-00003"]
+
+
+def numbered_pages(num_pages: int) -> Dict[int, List[str]]:
+    return {
+        offset: [f"C24-{offset + n:05}" for n in range(UCPDScraper.PAGE_SIZE)]
+        for offset in range(
+            0, num_pages * UCPDScraper.PAGE_SIZE, UCPDScraper.PAGE_SIZE
+        )
+    }
+
+
+def test_iter_pages_yields_pages_in_offset_order():
+    """Test that pages fetched out of order are still yielded in order."""
+    # Later pages come back first
+    adapter = StubAdapter(
+        numbered_pages(12), lambda offset: 0.06 - offset / 1e3
+    )
+    scraper = stub_scraper(adapter, max_workers=4)
+    url = scraper._construct_url(date(2024, 10, 1), date(2024, 10, 2))
+
+    pages = list(scraper._iter_pages(url))
+
+    assert [p.offset for p in pages] == sorted(adapter.offsets)
+    assert [k for p in pages for k in p.incidents] == [
+        k for ids in numbered_pages(12).values() for k in ids
+    ]
+
+
+def test_iter_pages_fetches_a_bounded_window_ahead():
+    """Test that no more than max_workers * 2 pages are fetched ahead."""
+    max_workers = 2
+    adapter = StubAdapter(numbered_pages(20), lambda offset: 0.005)
+    scraper = stub_scraper(adapter, max_workers=max_workers)
+    url = scraper._construct_url(date(2024, 10, 1), date(2024, 10, 2))
+
+    for num_yielded, _ in enumerate(scraper._iter_pages(url), 1):
+        # Give the workers time to run as far ahead as they're allowed
+        time.sleep(0.02)
+        with adapter.lock:
+            assert len(adapter.offsets) - num_yielded <= max_workers * 2
+
+    assert len(adapter.offsets) == 20
+    assert adapter.max_in_flight <= max_workers
+
+
+def test_requests_are_spaced_by_the_request_delay():
+    """Test that the workers share one rate limit."""
+    adapter = StubAdapter(numbered_pages(8))
+    scraper = stub_scraper(adapter, request_delay=0.03, max_workers=4)
+    url = scraper._construct_url(date(2024, 10, 1), date(2024, 10, 2))
+
+    list(scraper._iter_pages(url))
+
+    times = sorted(adapter.sent_at)
+    assert len(times) == 8
+    assert min(b - a for a, b in zip(times, times[1:], strict=False)) >= 0.027
+
+
+class FlakyUCPDHandler(BaseHTTPRequestHandler):
+    """Serve two pages over keep-alive, after failing the first request."""
+
+    # Keep connections open between requests, like the UCPD site
+    protocol_version = "HTTP/1.1"
+    failures = 0
+
+    def do_GET(self):
+        offset = int(re.search(r"offset=(\d+)", self.path).group(1))
+        if FlakyUCPDHandler.failures:
+            FlakyUCPDHandler.failures -= 1
+            self._respond(503, b"Try again.")
+        else:
+            self._respond(200, render_page([f"C24-{offset:05}"], 2))
+
+    def _respond(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ucpd_server():
+    # Kept-alive connections are served by threads that shutdown won't wait on
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyUCPDHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_retries_and_reuses_connections(ucpd_server, monkeypatch):
+    """Test that a 503 is retried on the same pooled connection."""
+    monkeypatch.setattr(UCPDScraper, "BASE_UCPD_URL", ucpd_server)
+    monkeypatch.setattr(UCPDScraper, "RETRY_BACKOFF", 0)
+    FlakyUCPDHandler.failures = 1
+    METRICS.reset()
+    scraper = UCPDScraper(request_delay=0, max_workers=1)
+    adapter = scraper._session.get_adapter(ucpd_server)
+    timeouts = []
+    send = adapter.send
+
+    def record_timeout(request, **kwargs):
+        timeouts.append(kwargs["timeout"])
+        return send(request, **kwargs)
+
+    monkeypatch.setattr(adapter, "send", record_timeout)
+    url = scraper._construct_url(date(2024, 10, 1), date(2024, 10, 2))
+
+    pages = list(scraper._iter_pages(url))
+
+    assert [list(p.incidents) for p in pages] == [["C24-00000"], ["C24-00005"]]
+    assert (
+        timeouts
+        == [(UCPDScraper.CONNECT_TIMEOUT, UCPDScraper.READ_TIMEOUT)] * 2
+    )
+    assert {
+        "name": "ucpd_fetch_retries",
+        "labels": {},
+        "value": 1,
+    } in METRICS.summary()["counters"]
+    # Both pages and the retry are sent over a single connection
+    assert scraper.connection_stats() == {
+        "connections": 1,
+        "requests": 3,
+        "reused": 2,
+        "retries": 1,
+    }